@@ -0,0 +1,1822 @@
+"""Benchmark komponen hot-path bot (offline, tanpa koneksi ke exchange).
+
+Contoh:
+    python bench.py atr
+    python bench.py atr --sizes 1000 100000
+    python bench.py orders --signals 50 --latency 0.1
+    python bench.py kline-latency --fixture fixtures/stream_synthetic_15m.jsonl
+    python bench.py record --seconds 1800 --out fixtures/stream_live.jsonl
+"""
+import argparse
+import collections
+import contextlib
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+import requests
+import pandas as pd
+from prometheus_client import REGISTRY
+
+import main as bot
+from fake_discord import FakeWebhook, FakeWebhookServer
+from fake_exchange import FUTURES_FILTERS, FakeExchange, FakeExchangeServer
+from replay import MarketReplay, offline_bot, synthetic_market
+
+
+# ====================================================
+# Data sintetis
+# ====================================================
+def synthetic_ohlc(n, seed=0, start_ms=1_700_000_000_000, step_ms=15 * 60 * 1000):
+    """Random walk OHLC 15m: (open_time, open, high, low, close) sebagai array NumPy."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.normal(0, 0.0015, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    open_time = start_ms + np.arange(n, dtype=np.int64) * step_ms
+    return open_time, open_, high, low, close
+
+
+def synthetic_rows(n, seed=0):
+    """Seperti synthetic_ohlc tetapi sebagai array main.KLINE_DTYPE."""
+    open_time, open_, high, low, close = synthetic_ohlc(n, seed=seed)
+    rows = np.empty(n, dtype=bot.KLINE_DTYPE)
+    rows["open_time"], rows["open"], rows["high"], rows["low"], rows["close"] = open_time, open_, high, low, close
+    rows["volume"] = 100.0
+    return rows
+
+
+def ohlc_frame(open_time, open_, high, low, close):
+    """DataFrame berbentuk output prepare_data."""
+    dt = pd.to_datetime(open_time, unit="ms").tz_localize("UTC").tz_convert(bot.jakarta_tz)
+    return pd.DataFrame({"datetime": dt, "open": open_, "high": high, "low": low, "close": close})
+
+
+def _fmt_us(seconds):
+    return f"{seconds * 1e6:10.2f} us"
+
+
+def _percentiles(values, qs=(50, 90, 99)):
+    arr = np.asarray(values, dtype=float)
+    return {q: float(np.percentile(arr, q)) for q in qs} if len(arr) else {q: float("nan") for q in qs}
+
+
+@contextlib.contextmanager
+def without_portfolio_caps():
+    """Batas PortfolioRisk dimatikan untuk bench yang mengukur jalur order/strategi, bukan risk."""
+    saved = (bot.max_open_positions, bot.max_correlated_exposure)
+    bot.max_open_positions, bot.max_correlated_exposure = float("inf"), float("inf")
+    try:
+        yield
+    finally:
+        bot.max_open_positions, bot.max_correlated_exposure = saved
+
+
+# ====================================================
+# Fixture stream (format combined stream Binance, satu pesan per baris)
+# ====================================================
+def generate_stream_fixture(path, symbols, candles=40, trades_per_candle=3, seed=0,
+                            interval_ms=15 * 60 * 1000):
+    """Tulis stream @trade + @kline sintetis ke JSONL: {"recv_ms": ..., "raw": "<pesan>"}.
+
+    recv_ms adalah waktu terima lokal; untuk kline close diberi delay 40-250 ms setelah
+    close_time, mendekati yang terlihat di testnet.
+    """
+    rng = np.random.default_rng(seed)
+    lines = []
+    for s_idx, symbol in enumerate(symbols):
+        open_time, open_, high, low, close = synthetic_ohlc(candles, seed=seed + s_idx)
+        stream = symbol.lower()
+        for i in range(candles):
+            t0 = int(open_time[i])
+            close_time = t0 + interval_ms - 1
+            for j in range(trades_per_candle):
+                ts = t0 + int((j + 1) * interval_ms / (trades_per_candle + 1))
+                price = float(rng.uniform(low[i], high[i]))
+                event = {"e": "trade", "E": ts, "T": ts, "s": symbol, "t": i * trades_per_candle + j + 1,
+                         "p": f"{price:.6f}", "q": "1.000", "m": bool(j % 2)}
+                lines.append((ts + 5, {"stream": f"{stream}@trade", "data": event}))
+            event_ms = close_time + 1
+            kline = {"t": t0, "T": close_time, "s": symbol, "i": "15m",
+                     "o": f"{open_[i]:.6f}", "c": f"{close[i]:.6f}",
+                     "h": f"{high[i]:.6f}", "l": f"{low[i]:.6f}",
+                     "v": "100.0", "n": trades_per_candle, "x": True}
+            recv = event_ms + int(rng.integers(40, 250))
+            lines.append((recv, {"stream": f"{stream}@kline_15m",
+                                 "data": {"e": "kline", "E": event_ms, "s": symbol, "k": kline}}))
+    lines.sort(key=lambda item: item[0])
+    with open(path, "w") as f:
+        for recv_ms, msg in lines:
+            f.write(json.dumps({"recv_ms": recv_ms, "raw": json.dumps(msg, separators=(",", ":"))}) + "\n")
+    return len(lines)
+
+
+def load_stream_fixture(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_stream(path, seconds, symbols=None):
+    """Rekam stream live testnet (trade + kline) ke JSONL untuk replay offline."""
+    import websocket
+
+    symbols = symbols or bot.pairs
+    streams = [f"{s.lower()}@trade" for s in symbols] + [f"{s.lower()}@kline_{bot.kline_interval}" for s in symbols]
+    url = "wss://stream.binancefuture.com/stream?streams=" + "/".join(streams)
+    deadline = time.time() + seconds
+    with open(path, "w") as f:
+        def on_message(ws, message):
+            f.write(json.dumps({"recv_ms": int(time.time() * 1000), "raw": message}) + "\n")
+            if time.time() >= deadline:
+                ws.close()
+        websocket.WebSocketApp(url, on_message=on_message).run_forever()
+
+
+# ====================================================
+# Latency candle close -> keputusan sinyal (replay fixture)
+# ====================================================
+def bench_kline_latency(fixture, poll_interval=10.0):
+    records = load_stream_fixture(fixture)
+    processing = []   # on_message(kline close) -> selesai evaluasi sinyal, dalam detik
+    end_to_end = []   # close_time exchange -> keputusan sinyal, dalam detik
+    signals = 0
+    with offline_bot() as b:
+        for record in records:
+            raw = record["raw"]
+            t0 = time.perf_counter()
+            b.on_message(None, raw)
+            while not b.candle_queue.empty():
+                candle = b.candle_queue.get_nowait()
+                trade = b.handle_closed_candle(candle)
+                elapsed = time.perf_counter() - t0
+                processing.append(elapsed)
+                close_ms = json.loads(raw)["data"]["k"]["T"]
+                end_to_end.append((record["recv_ms"] - close_ms) / 1000 + elapsed)
+                if trade is not None:
+                    signals += 1
+                    # Tutup posisi agar simbol ini bisa dievaluasi lagi di candle berikutnya
+                    b.remove_position(trade)
+    p = _percentiles(processing)
+    e = _percentiles(end_to_end)
+    print(f"fixture        : {fixture} ({len(records)} pesan, {len(processing)} candle close, {signals} sinyal)")
+    print(f"processing     : p50 {_fmt_us(p[50])}  p90 {_fmt_us(p[90])}  p99 {_fmt_us(p[99])}")
+    print(f"close->signal  : p50 {e[50] * 1e3:8.1f} ms  p90 {e[90] * 1e3:8.1f} ms  p99 {e[99] * 1e3:8.1f} ms")
+    print(f"REST polling {poll_interval:.0f}s (referensi): rata-rata {poll_interval / 2 * 1e3:8.1f} ms, "
+          f"terburuk {poll_interval * 1e3:8.1f} ms + round-trip REST")
+
+
+# ====================================================
+# Replay harness: throughput live loop, latency sinyal, pertumbuhan memori per minggu simulasi
+# ====================================================
+def _replay_outcome(replay):
+    return replay.signals, replay.opened, replay.closed, round(replay.pnl, 9), replay.exchange.failures
+
+
+def bench_replay(pair_counts=(5, 20), weeks=4, trades_per_candle=20, latency=0.0, failure_rate=0.0, seed=0):
+    week_ms = 7 * 86_400_000
+    print(f"stream sintetis {weeks} minggu candle 15m, {trades_per_candle} tick @trade per candle per pair, "
+          f"fake exchange latency {latency * 1e3:.0f} ms, failure rate {failure_rate:.0%}")
+    print(f"{'pair':>5} | {'tick/s':>9} | {'candle/s':>8} | {'x real':>7} | {'sinyal':>6} | "
+          f"{'close->SL/TP p50/p90/p99 (ms)':>29} | RSS per minggu (MB)")
+    for n in pair_counts:
+        symbols = [f"P{i:03d}USDT" for i in range(n)]
+        exchange = FakeExchange(order_latency=latency, failure_rate=failure_rate, seed=seed)
+        replay = MarketReplay(synthetic_market(symbols, weeks * 7, trades_per_candle, seed=seed), exchange,
+                              sample_every_ms=week_ms).run()
+        elapsed = replay.elapsed
+        ticks = replay.messages - replay.klines
+        p = _percentiles(replay.signal_latency)
+        rss = " ".join(f"{value / 2**20:.0f}" for _, value in replay.memory)
+        print(f"{n:>5} | {ticks / elapsed:>9,.0f} | {replay.candles / elapsed:>8,.0f} | "
+              f"{replay.simulated_ms / 1000 / elapsed:>6,.0f}x | {replay.signals:>6} | "
+              f"{p[50] * 1e3:>9.2f} {p[90] * 1e3:>9.2f} {p[99] * 1e3:>9.2f} | {rss}")
+        if len(replay.memory) > 2:
+            growth = (replay.memory[-1][1] - replay.memory[1][1]) / max(len(replay.memory) - 2, 1)
+            print(f"{'':>5}   pertumbuhan RSS setelah minggu pertama: {growth / 2**20:+.2f} MB/minggu, "
+                  f"{replay.closed} trade ditutup, {len(exchange.orders)} order di fake exchange")
+
+    # Replay deterministik: dua run dengan kegagalan order buatan harus identik
+    symbols = [f"P{i:03d}USDT" for i in range(pair_counts[0])]
+    outcomes = []
+    for _ in range(2):
+        exchange = FakeExchange(order_latency=latency, failure_rate=max(failure_rate, 0.05),
+                                cancel_failure_rate=0.05, seed=seed)
+        replay = MarketReplay(synthetic_market(symbols, 7, trades_per_candle, seed=seed), exchange).run()
+        outcomes.append(_replay_outcome(replay))
+    if outcomes[0] != outcomes[1]:
+        raise AssertionError(f"replay tidak deterministik: {outcomes[0]} != {outcomes[1]}")
+    signals, opened, closed, pnl, failures = outcomes[0]
+    print(f"deterministik OK: 2 run x {len(symbols)} pair x 1 minggu dengan {failures} kegagalan order buatan -> "
+          f"{signals} sinyal, {opened} terpasang, {closed} ditutup, PnL {pnl:+.4f} identik")
+
+
+# ====================================================
+# ATR: full recompute (pd.concat + calculate_atr) vs ATRState
+# ====================================================
+def bench_atr(sizes, repeat=5):
+    print(f"{'candles':>10} | {'concat+calculate_atr/candle':>28} | {'ATRState.update/candle':>23} | max |diff|")
+    for n in sizes:
+        open_time, open_, high, low, close = synthetic_ohlc(n)
+        df = ohlc_frame(open_time, open_, high, low, close)
+
+        # Cara lama: satu candle baru = concat ke seluruh frame + hitung ulang ATR
+        new_df = df.iloc[[-1]]
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            grown = pd.concat([df, new_df], ignore_index=True)
+            bot.calculate_atr(grown)
+        full_cost = (time.perf_counter() - t0) / repeat
+
+        # Cara baru: update streaming untuk seluruh seri
+        state = bot.ATRState()
+        atr_stream = np.empty(n)
+        ot, o, h, l, c = open_time.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist()
+        t0 = time.perf_counter()
+        for i in range(n):
+            atr_stream[i] = state.update(ot[i], o[i], h[i], l[i], c[i])
+        stream_cost = (time.perf_counter() - t0) / n
+
+        expected = bot.calculate_atr(df)["atr"].to_numpy()
+        if not np.array_equal(np.isnan(expected), np.isnan(atr_stream)):
+            raise AssertionError("posisi NaN ATR berbeda dengan calculate_atr")
+        mask = ~np.isnan(expected)
+        max_diff = float(np.max(np.abs(expected[mask] - atr_stream[mask]))) if mask.any() else 0.0
+        if not np.allclose(expected[mask], atr_stream[mask], rtol=1e-9, atol=1e-12):
+            raise AssertionError(f"ATR streaming tidak sama dengan calculate_atr (max diff {max_diff})")
+        print(f"{n:>10} | {_fmt_us(full_cost):>28} | {_fmt_us(stream_cost):>23} | {max_diff:.2e}")
+
+
+# ====================================================
+# Candle store: DataFrame yang terus di-concat (lama) vs CandleStore kolumnar
+# ====================================================
+def legacy_append_candle(df, open_ms, open_, high, low, close):
+    """Jalur candle baru versi lama: konversi zona waktu, concat + calculate_atr, iloc[-2]/iloc[-1]."""
+    candle_open_time = pd.to_datetime(open_ms, unit="ms").tz_localize("UTC").tz_convert(bot.jakarta_tz)
+    if not df.empty and candle_open_time <= df.iloc[-1]["datetime"]:
+        return df, None
+    new_df = pd.DataFrame([{"datetime": candle_open_time, "open": open_, "high": high, "low": low, "close": close}])
+    df = bot.calculate_atr(pd.concat([df, new_df], ignore_index=True))
+    candidate, current = df.iloc[-2], df.iloc[-1]
+    return df, (current["close"] > candidate["high"], current["close"] < candidate["low"], candidate.get("atr", np.nan))
+
+
+def bench_candles(history_sizes, appends=50, retention=None):
+    retention = retention or bot.candle_retention
+    print(f"retention CandleStore {retention} candle; {appends} candle baru per ukuran history")
+    print(f"{'history':>9} | {'concat+iloc/candle':>19} | {'CandleStore/candle':>19} | "
+          f"{'memori lama':>12} | {'memori baru':>12}")
+    for n in history_sizes:
+        open_time, open_, high, low, close = synthetic_ohlc(n + appends)
+        ot, o, h, l, c = open_time.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist()
+
+        df = bot.calculate_atr(ohlc_frame(open_time[:n], open_[:n], high[:n], low[:n], close[:n]))
+        t0 = time.perf_counter()
+        for i in range(n, n + appends):
+            df, legacy_signal = legacy_append_candle(df, ot[i], o[i], h[i], l[i], c[i])
+        legacy_cost = (time.perf_counter() - t0) / appends
+        legacy_memory = df.memory_usage(deep=True).sum()
+
+        state = bot.ATRState(bot.atr_period, size=retention)
+        for i in range(n):
+            state.update(ot[i], o[i], h[i], l[i], c[i])
+        t0 = time.perf_counter()
+        for i in range(n, n + appends):
+            state.update(ot[i], o[i], h[i], l[i], c[i])
+            candidate, current = state.candle(-2), state.candle(-1)
+            signal = (current["close"] > candidate["high"], current["close"] < candidate["low"], candidate["atr"])
+        new_cost = (time.perf_counter() - t0) / appends
+        new_memory = state.candles.nbytes
+
+        if signal[:2] != tuple(bool(x) for x in legacy_signal[:2]) or not np.isclose(signal[2], legacy_signal[2]):
+            raise AssertionError("sinyal CandleStore berbeda dengan jalur DataFrame lama")
+        view = state.candles.view()
+        kept = min(retention, n + appends)
+        if not (np.shares_memory(view["close"], state.candles.values)
+                and np.array_equal(view["close"], close[-kept:]) and np.array_equal(view["open_time"], open_time[-kept:])
+                and np.allclose(view[state.atr_name][-10:], df["atr"].to_numpy()[-10:])):
+            raise AssertionError("view CandleStore bukan view tanpa copy dari candle terakhir")
+        print(f"{n:>9} | {_fmt_us(legacy_cost):>19} | {_fmt_us(new_cost):>19} | "
+              f"{legacy_memory / 1e3:>9.1f} KB | {new_memory / 1e3:>9.1f} KB")
+
+
+# ====================================================
+# Library indikator: parity batch vs streaming, biaya update per candle
+# ====================================================
+def bench_indicator_set():
+    """10 indikator (ATR, EMA, RSI, Donchian, Bollinger, SMA dengan beberapa periode)."""
+    return [bot.ATR(14), bot.ATR(28), bot.EMA(20), bot.EMA(50), bot.RSI(14), bot.RSI(7),
+            bot.Donchian(20), bot.Donchian(55), bot.Bollinger(20), bot.SMA(50)]
+
+
+def bench_indicators(symbols=200, candles=200, parity_bars=5_000, recompute_symbols=20):
+    indicators = bench_indicator_set()
+    resolved = bot.resolve_indicators(indicators)
+
+    # Parity: batch NumPy vs streaming untuk setiap kolom output
+    open_time, open_, high, low, close = synthetic_ohlc(parity_bars, seed=1)
+    state = bot.IndicatorSet(indicators, size=parity_bars)
+    for row in zip(open_time.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist()):
+        state.update(*row)
+    stream = state.candles.view()
+    batch = bot.IndicatorSet.batch(indicators, {"open": open_, "high": high, "low": low, "close": close})
+    checked = []
+    for indicator in resolved:
+        for name in indicator.outputs:
+            expected, got = batch[name], stream[name]
+            if not np.array_equal(expected, got, equal_nan=True):
+                mask = ~np.isnan(expected)
+                diff = float(np.max(np.abs(expected[mask] - got[mask]))) if mask.any() else math.nan
+                raise AssertionError(f"{name}: streaming tidak identik dengan batch (selisih maks {diff:.1e})")
+            checked.append(name)
+    print(f"parity batch vs streaming ({parity_bars} candle): {len(checked)} kolom identik ({', '.join(checked)})")
+
+    # Update streaming: semua simbol menerima candle close yang sama, seperti satu event 15m
+    history = 100
+    states, series = [], []
+    for i in range(symbols):
+        data = [a.tolist() for a in synthetic_ohlc(history + candles, seed=100 + i)]
+        state = bot.IndicatorSet(indicators)
+        for row in zip(*(column[:history] for column in data)):
+            state.update(*row)
+        states.append(state)
+        series.append(list(zip(*(column[history:] for column in data))))
+    t0 = time.perf_counter()
+    for k in range(candles):
+        for state, rows in zip(states, series):
+            state.update(*rows[k])
+    per_candle = (time.perf_counter() - t0) / candles
+
+    # Pembanding: hitung ulang batch dari window candle_retention setiap candle
+    t0 = time.perf_counter()
+    for state in states[:recompute_symbols]:
+        bot.IndicatorSet.batch(indicators, {name: state.candles.column(name) for name in ("open", "high", "low", "close")})
+    recompute = (time.perf_counter() - t0) / recompute_symbols * symbols
+
+    print(f"{symbols} simbol x {len(indicators)} indikator ({len(resolved)} setelah dependensi TR/SMA20)")
+    print(f"  streaming  : {per_candle * 1e3:8.2f} ms per candle close semua simbol, "
+          f"{per_candle / symbols * 1e6:6.1f} us/simbol, {per_candle / symbols / len(resolved) * 1e6:5.2f} us/indikator")
+    print(f"  batch ulang: {recompute * 1e3:8.2f} ms per candle close (window {bot.candle_retention} candle)")
+
+    # Cache dependensi: dua strategi sama-sama butuh ATR
+    strategies = [bot.ATRBreakout(), bot.DonchianTrend()]
+    requested = [indicator for strategy in strategies for indicator in strategy.indicators()]
+
+    def tree_size(indicator):
+        return 1 + sum(tree_size(dependency) for dependency in indicator.requires())
+
+    print(f"strategi {', '.join(s.name for s in strategies)}: tanpa cache {sum(map(tree_size, requested))} "
+          f"update indikator per candle, dengan cache {len(bot.resolve_indicators(requested))}")
+
+
+# ====================================================
+# Startup backfill: serial tanpa cache vs paralel cold vs paralel warm (cache)
+# ====================================================
+def bench_backfill(pair_counts, days=7, latency=0.03, workers=8, weight_per_minute=2400):
+    exchange = FakeExchange(latency=latency, weight_limit=weight_per_minute)
+    step = bot.INTERVAL_MS[bot.kline_interval]
+    print(f"history {days} hari ({days * 86_400_000 // step} candle/pair), latency server {latency * 1e3:.0f} ms, "
+          f"{workers} worker, limit {weight_per_minute} weight/menit")
+    print(f"{'pairs':>6} | {'serial, tanpa cache':>20} | {'paralel cold':>14} | {'paralel warm':>14} | requests cold/warm")
+    with FakeExchangeServer(exchange) as server:
+        saved_client = bot.client
+        bot.client = server.client()
+        try:
+            for n in pair_counts:
+                symbols = [f"P{i:03d}USDT" for i in range(n)]
+                end_ms = int(time.time() * 1000)
+                start_ms = end_ms - days * 86_400_000
+                cache_dir = tempfile.mkdtemp(prefix="kline-cache-")
+                try:
+                    # Serial: satu simbol dan satu halaman per request, seperti startup lama
+                    serial_limiter = bot.WeightLimiter(weight_per_minute)
+                    t0 = time.perf_counter()
+                    for symbol in symbols:
+                        bot.backfill_klines([symbol], bot.kline_interval, start_ms, end_ms,
+                                            cache=False, workers=1, limiter=serial_limiter)
+                    serial = time.perf_counter() - t0
+
+                    cache = bot.KlineCache(cache_dir)
+                    limiter = bot.WeightLimiter(weight_per_minute)
+                    exchange.reset_counters()
+                    t0 = time.perf_counter()
+                    cold_rows = bot.backfill_klines(symbols, bot.kline_interval, start_ms, end_ms,
+                                                    cache=cache, workers=workers, limiter=limiter)
+                    cold = time.perf_counter() - t0
+                    cold_requests = exchange.requests
+
+                    exchange.reset_counters()
+                    t0 = time.perf_counter()
+                    warm_rows = bot.backfill_klines(symbols, bot.kline_interval, start_ms, end_ms,
+                                                    cache=bot.KlineCache(cache_dir), workers=workers, limiter=limiter)
+                    warm = time.perf_counter() - t0
+                    warm_requests = exchange.requests
+
+                    for symbol in symbols:
+                        if not np.array_equal(cold_rows[symbol], warm_rows[symbol]):
+                            raise AssertionError(f"{symbol}: data cache berbeda dengan hasil fetch")
+                finally:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                print(f"{n:>6} | {serial:>18.2f} s | {cold:>12.2f} s | {warm:>12.3f} s | {cold_requests}/{warm_requests}")
+        finally:
+            bot.client = saved_client
+
+
+# ====================================================
+# Backtest: parity dengan jalur live + kecepatan multi-pair
+# ====================================================
+class DeferredExecutor:
+    """Pengganti OrderExecutor untuk parity: job antre sampai run(), urut submit.
+
+    Entry dijalankan tepat setelah candle close, exit yang diklaim tick dicatat di akhir
+    bar, dan SL BEP yang dipicu tick baru berlaku mulai bar berikutnya (seperti backtest),
+    tanpa race dengan tick berikutnya.
+    Leg SL/TP tetap lewat leg_pool OrderExecutor asli.
+    """
+
+    def __init__(self, leg_pool):
+        self.leg_pool = leg_pool
+        self.jobs = []
+
+    def submit(self, symbol, fn, *args, **kwargs):
+        self.jobs.append((fn, args, kwargs))
+
+    def run(self):
+        while self.jobs:
+            jobs, self.jobs = self.jobs, []
+            for fn, args, kwargs in jobs:
+                fn(*args, **kwargs)
+
+    def wait_idle(self, timeout=None):
+        self.run()
+        return True
+
+    def queue_depth(self, symbol=None):
+        return len(self.jobs)
+
+
+def bar_ticks(o, h, l, c, sign, levels):
+    """Jalur harga kontinu satu candle sebagai tick: open, ekstrem yang merugikan posisi
+    lebih dulu (seperti backtest), ekstrem lain, close. Level SL/TP/BEP yang dilewati di
+    antara dua titik disisipkan sebagai tick, jadi exit live terjadi tepat di level itu."""
+    path = [o, l, h, c] if sign >= 0 else [o, h, l, c]
+    ticks = [o]
+    for a, b in zip(path, path[1:]):
+        lo, hi = min(a, b), max(a, b)
+        crossed = sorted((x for x in levels if lo < x < hi), reverse=b < a)
+        ticks.extend(crossed)
+        ticks.append(b)
+    return ticks
+
+
+def live_bar_by_bar(rows, symbol):
+    """Jalankan jalur live untuk satu simbol candle per candle: tick tiap bar lewat on_trade
+    (exit SL/TP dan BEP di close_position / move_stop_to_breakeven), lalu handle_closed_candle.
+
+    Posisi yang masih terbuka di candle terakhir ditutup di close (seperti backtest). Saldo
+    dikembalikan ke initial_capital setiap trade ditutup (backtest compound=False).
+    """
+    saved_executor = bot.order_executor
+    executor = bot.order_executor = DeferredExecutor(saved_executor.leg_pool)
+    trades = []
+    position = None
+    try:
+        for i, row in enumerate(rows.tolist()):
+            open_time, o, h, l, c, _ = row
+            if position is not None:
+                live = bot.positions[symbol]
+                sign = 1 if live["direction"] == "long" else -1
+                levels = [live["stop_loss"], live["take_profit"],
+                          bot.breakeven_trigger_price(live["entry_price"], sign, bot.breakeven_trigger)]
+                for price in bar_ticks(o, h, l, c, sign, levels):
+                    bot.on_trade(symbol, price)
+                executor.run()  # Exit yang diklaim tick dicatat; SL BEP dari bar ini berlaku mulai bar berikutnya
+                if symbol in bot.positions and i == len(rows) - 1:
+                    bot.close_position(live, c, "end_of_data")
+                if symbol not in bot.positions:
+                    record = bot.executed_trades[-1]
+                    position["exit_bar"], position["exit_price"] = i, record["exit_price"]
+                    position["exit_reason"] = record["exit_reason"]
+                    position["breakeven"] = record["stop_loss"] == record["entry_price"]
+                    trades.append(position)
+                    position = None
+                    bot.global_balance = bot.initial_capital
+            else:
+                bot.on_trade(symbol, c)
+            trade = bot.handle_closed_candle({"symbol": symbol, "open_time": open_time, "open": o, "high": h,
+                                              "low": l, "close": c, "evaluate": True})
+            executor.run()
+            if trade is not None and i < len(rows) - 1:
+                position = dict(trade, signal_bar=i)
+        if symbol in bot.positions:  # Sinyal di candle terakhir tidak dieksekusi backtest
+            bot.remove_position(bot.positions[symbol])
+        executor.run()
+    finally:
+        bot.order_executor = saved_executor
+    return trades
+
+
+def bench_backtest_parity(symbols=5, bars=5_000, breakeven=None):
+    """breakeven menimpa breakeven_trigger di kedua jalur (default 30% hampir tidak pernah tercapai
+    sebelum TP, jadi nilai kecil dipakai untuk menguji pemindahan SL ke BEP)."""
+    data = {f"P{i:03d}USDT": synthetic_rows(bars, seed=i) for i in range(symbols)}
+    saved_trigger = bot.breakeven_trigger
+    bot.breakeven_trigger = saved_trigger if breakeven is None else breakeven
+    try:
+        _backtest_parity(data, bars)
+    finally:
+        bot.breakeven_trigger = saved_trigger
+
+
+def _backtest_parity(data, bars):
+    symbols = len(data)
+    trades, _ = bot.backtest(data, compound=False, slippage=0.0, fee=0.0, max_leverage=float("inf"))
+    fields = ["entry_price", "stop_loss", "take_profit", "quantity", "exit_price"]
+    compared = 0
+    reasons = collections.Counter()
+    with without_portfolio_caps(), offline_bot() as b:  # Sama dengan max_leverage=inf di backtest
+        b.global_balance = b.initial_capital
+        for offset, (symbol, rows) in enumerate(data.items()):
+            live = live_bar_by_bar(rows, symbol)
+            vec = trades[trades["symbol"] == symbol]
+            if len(live) != len(vec):
+                raise AssertionError(f"{symbol}: {len(live)} trade live vs {len(vec)} trade backtest")
+            base = offset * bars
+            for t, (_, v) in zip(live, vec.iterrows()):
+                if (t["signal_bar"] + base, t["exit_bar"] + base, t["direction"]) != \
+                        (v["signal_bar"], v["exit_bar"], v["direction"]):
+                    raise AssertionError(f"{symbol}: trade berbeda live={t} backtest={v.to_dict()}")
+                for field in fields:
+                    if not np.isclose(t[field], v[field], rtol=1e-9, atol=0):
+                        raise AssertionError(f"{symbol}: {field} live={t[field]} backtest={v[field]}")
+            compared += len(live)
+            reasons.update(t["exit_reason"] for t in live)
+            reasons["SL dipindah ke BEP"] += sum(t["breakeven"] for t in live)
+    print(f"parity OK: {symbols} simbol x {bars} candle, {compared} trade identik dengan jalur live bar-per-bar "
+          f"(entry lewat handle_closed_candle, exit lewat tick on_trade -> close_position)")
+    print("  exit: " + ", ".join(f"{reason} {count}" for reason, count in sorted(reasons.items())))
+
+
+def bench_backtest(pair_count=200, years=2.0):
+    bars = int(years * 365 * 96)
+    t0 = time.perf_counter()
+    data = {f"P{i:03d}USDT": synthetic_rows(bars, seed=i) for i in range(pair_count)}
+    generate = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    arrays = bot.prepare_backtest_arrays(data)
+    prepare = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    trades, summary = bot.backtest(arrays)
+    run = time.perf_counter() - t0
+    print(f"{pair_count} pair x {bars} candle 15m ({years:g} tahun) = {pair_count * bars / 1e6:.1f} juta bar")
+    print(f"generate data  : {generate:.2f} s")
+    print(f"prepare arrays : {prepare:.2f} s")
+    print(f"backtest       : {run:.2f} s ({pair_count * bars / run / 1e6:.1f} juta bar/s), {summary['total_trades']} trade")
+
+
+# ====================================================
+# Parameter sweep multi-process
+# ====================================================
+def bench_sweep(pair_count=20, days=90, workers=None):
+    data = {f"P{i:03d}USDT": synthetic_rows(days * 96, seed=i) for i in range(pair_count)}
+    space = {"period": [10, 14, 20], "sl_mult": [1.0, 1.5, 2.0], "tp_mult": [1.5, 2.0, 3.0],
+             "vol_scale": [5.0, 10.0], "base_risk": [0.02, 0.05]}
+    combos = bot.parameter_grid(space)
+
+    t0 = time.perf_counter()
+    arrays = bot.prepare_backtest_arrays(data)
+    prepare = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    results = bot.sweep(arrays, combos, workers=workers)
+    elapsed = time.perf_counter() - t0
+    runtime = results["runtime"]
+    print(f"{pair_count} pair x {days} hari 15m, {len(combos)} kombinasi, {workers or bot.os.cpu_count()} worker")
+    print(f"prepare arrays (sekali) : {prepare:.2f} s")
+    print(f"sweep                   : {elapsed:.2f} s ({len(combos) / elapsed:.1f} kombinasi/s)")
+    print(f"runtime per kombinasi   : p50 {runtime.median() * 1e3:.1f} ms, p95 {runtime.quantile(0.95) * 1e3:.1f} ms")
+    print(results[["rank", *space, "final_balance", "total_trades", "max_drawdown"]].head(5).to_string(index=False))
+
+
+# ====================================================
+# Tick path on_message: scan open_trades di bawah data_lock (lama) vs indeks per simbol
+# ====================================================
+def legacy_on_tick(message):
+    """Bagian @trade dari on_message lama: decode, lock, copy + scan seluruh open_trades."""
+    event = json.loads(message).get("data", {})
+    symbol = event.get("s", "")
+    price = float(event.get("p", 0))
+    bot.current_prices[symbol] = price
+    with bot.data_lock:
+        for trade in bot.open_trades.copy():
+            if trade["symbol"] != symbol:
+                continue
+            if trade["direction"] == "long" and price >= trade["entry_price"] * (1 + bot.breakeven_trigger):
+                pass
+            elif trade["direction"] == "short" and price <= trade["entry_price"] * (1 - bot.breakeven_trigger):
+                pass
+
+
+def open_tick_positions(b, symbols):
+    """Posisi terbuka di harga 100 untuk tiap simbol, level SL/TP/BEP jauh dari tick sintetis."""
+    for i, symbol in enumerate(symbols):
+        long = i % 2 == 1
+        trade = {"symbol": symbol, "direction": "long" if long else "short", "entry_price": 100.0,
+                 "stop_loss": 90.0 if long else 110.0, "take_profit": 110.0 if long else 90.0,
+                 "quantity": 1.0, "orders": {"stop_order": {"orderId": i}}, "status": "open"}
+        b.open_trades.append(trade)
+        b.positions[symbol] = trade
+        b._arm_breakeven(trade)
+        b._arm_exits(trade)
+
+
+def bench_ticks(symbol_counts, ticks=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{ticks} tick @trade, setiap simbol punya posisi terbuka (tidak ada trigger break-even/SL/TP)")
+    print(f"{'simbol':>7} | {'lama (lock + scan)':>21} | {'indeks per simbol':>21} | speedup")
+    for n in symbol_counts:
+        symbols = [f"P{i:03d}USDT" for i in range(n)]
+        picks = rng.integers(0, n, ticks)
+        prices = 100.0 * (1 + rng.normal(0, 0.01, ticks))
+        trade_ids = collections.Counter()
+        messages = []
+        for i, p in zip(picks.tolist(), prices.tolist()):
+            trade_ids[i] += 1
+            messages.append(json.dumps({"stream": f"{symbols[i].lower()}@trade",
+                                        "data": {"e": "trade", "s": symbols[i], "t": trade_ids[i],
+                                                 "p": f"{p:.4f}", "q": "1.000"}}, separators=(",", ":")))
+        with offline_bot() as b:
+            open_tick_positions(b, symbols)
+            t0 = time.perf_counter()
+            for message in messages:
+                legacy_on_tick(message)
+            legacy = ticks / (time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for message in messages:
+                b.on_message(None, message)
+            indexed = ticks / (time.perf_counter() - t0)
+        print(f"{n:>7} | {legacy:>14,.0f} tick/s | {indexed:>14,.0f} tick/s | {indexed / legacy:5.1f}x")
+
+
+# ====================================================
+# Ingestion WebSocket: decode, conflation, reconnect + backfill gap terhadap server yang memutus koneksi
+# ====================================================
+def bench_decode(n=200_000):
+    message = ('{"stream":"btcusdt@trade","data":{"e":"trade","E":1700000225000,"T":1700000225000,"s":"BTCUSDT",'
+               '"t":4123456789,"p":"37123.10","q":"0.003","X":"MARKET","m":true}}')
+
+    def full(loads):
+        event = loads(message)["data"]
+        return event["s"], float(event["p"]), event["t"]
+
+    rows = [("json.loads", lambda: full(json.loads))]
+    if bot.orjson is not None:
+        rows.append(("orjson.loads", lambda: full(bot.orjson.loads)))
+    rows.append(("parse_trade (partial)", lambda: bot.parse_trade(message)))
+    print("decode pesan @trade:")
+    for label, fn in rows:
+        print(f"  {label:>22} : {_per_call(fn, n) * 1e6:6.2f} us")
+
+
+def bench_conflation(symbols=50, ticks=200_000, slow_us=20):
+    """Pemroses tick lambat (slow_us per on_trade) vs stream secepat mungkin: inline vs TickConflator."""
+    names = [f"P{i:03d}USDT" for i in range(symbols)]
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, symbols, ticks).tolist()
+    prices = (100.0 * (1 + rng.normal(0, 0.01, ticks))).tolist()
+    seen = {}       # symbol -> (harga, high, low) terakhir yang diproses
+    processed = [0]
+    done = threading.Event()
+    saved = bot.on_trade
+
+    def slow_on_trade(symbol, price, high=None, low=None):
+        deadline = time.perf_counter() + slow_us / 1e6
+        while time.perf_counter() < deadline:
+            pass
+        seen[symbol] = (price, high, low)
+        processed[0] += 1
+        if symbol == "DONE":
+            done.set()
+
+    conflator = bot.TickConflator()
+    bot.on_trade = slow_on_trade
+    try:
+        threading.Thread(target=conflator.run, daemon=True).start()
+        depth = 0
+        t0 = time.perf_counter()
+        for k, (i, price) in enumerate(zip(picks, prices)):
+            conflator.put(names[i], price)
+            if not k % 1000:
+                depth = max(depth, conflator.depth())
+        produced = time.perf_counter()
+        conflator.put("DONE", 0.0)
+        done.wait()
+        drained = time.perf_counter()
+    finally:
+        bot.on_trade = saved
+    last, high, low = {}, {}, {}
+    for i, price in zip(picks, prices):
+        symbol = names[i]
+        last[symbol] = price
+        high[symbol] = max(high.get(symbol, price), price)
+        low[symbol] = min(low.get(symbol, price), price)
+    exact = sum(seen[s][0] == last[s] for s in names)
+    print(f"conflation: {ticks} tick untuk {symbols} simbol secepat mungkin, on_trade {slow_us} us/tick")
+    print(f"  inline     : {ticks} on_trade, tick terakhir diproses setelah ~{ticks * slow_us / 1e3:,.0f} ms")
+    print(f"  conflator  : {processed[0] - 1} on_trade ({conflator.conflated} tick digabung), antrean maks {depth} "
+          f"slot, tick terakhir diproses {(drained - produced) * 1e3:,.1f} ms setelah masuk "
+          f"(produsen {(produced - t0) * 1e3:,.0f} ms)")
+    print(f"  harga terakhir benar untuk {exact}/{symbols} simbol; high/low ekstrem dipertahankan: "
+          f"{all(seen[s][1] <= high[s] and seen[s][2] >= low[s] for s in names)}")
+
+
+def bench_ws_reconnect(pair_count=20, seconds=12.0, rate=100, drop_every=2.0, positions=10):
+    """Ingestion terhadap FakeStreamServer yang memutus koneksi (close/abort/stall) tiap drop_every detik."""
+    from fake_stream import FakeMarket, FakeStreamServer
+
+    symbols = [f"P{i:03d}USDT" for i in range(pair_count)]
+    positions = min(positions, pair_count)
+    market = FakeMarket(symbols)
+    exchange = FakeExchange(market=market, weight_limit=None)  # Budget weight bukan bagian benchmark ini
+    names = ("ws_backoff_base", "ws_backoff_max", "ws_stale_timeout", "ws_ping_interval", "ws_ping_timeout",
+             "ws_streams_per_connection")
+    saved = {name: getattr(bot, name) for name in names}
+    bot.ws_backoff_base, bot.ws_backoff_max, bot.ws_stale_timeout = 0.05, 0.5, 1.0
+    bot.ws_ping_interval, bot.ws_ping_timeout = 2, 1
+    bot.ws_streams_per_connection = max(2, pair_count)  # Dua koneksi untuk pair_count simbol
+    gauge = lambda name, **labels: REGISTRY.get_sample_value(name, labels) or 0.0
+    before = {kind: (gauge("stream_gaps_total", kind=kind), gauge("stream_backfilled_total", kind=kind))
+              for kind in ("trade", "kline")}
+    try:
+        with FakeExchangeServer(exchange) as rest, FakeStreamServer(market, rate, drop_every) as stream, \
+                offline_bot(rest.client()) as b:
+            open_tick_positions(b, symbols[:positions])
+            threading.Thread(target=b.process_candles, daemon=True).start()
+            b.start_tick_consumer()
+            connections = b.start_websocket(symbols, base_url=stream.url)
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                b.check_stale_connections()
+                time.sleep(0.1)
+            # Periode tenang tanpa pemutusan: koneksi pulih dan tick terakhir sampai ke klien
+            stream.drop_every = None
+            deadline = time.monotonic() + 2 * bot.ws_stale_timeout + 1
+            while time.monotonic() < deadline:
+                b.check_stale_connections()
+                time.sleep(0.1)
+            stream.stop_publishing()
+            # Tunggu sampai klien selesai membaca pesan yang masih di buffer socket
+            quiet = time.monotonic() + 10
+            while time.monotonic() < quiet and any(time.monotonic() - c.last_message < 0.5 for c in connections):
+                time.sleep(0.1)
+            b.gap_backfill_pool.submit(lambda: None).result()
+            while b.candle_queue.qsize() or b.tick_conflator.depth():
+                time.sleep(0.05)
+            connected = all(c.connected for c in connections)
+            for connection in connections:
+                connection.stop(timeout=5)
+            received = sum(sum(series[:-1]) for (stage, _), series in list(b.stage_latency.series.items())
+                           if stage == "trade")
+            sent = sum(len(tape) for tape in market.trades.values())
+            complete = 0
+            for symbol in symbols:
+                state = b.indicator_states.get(symbol)
+                rows = market.candles[symbol]
+                if state is None or not rows:
+                    continue
+                n = min(len(state.candles), len(rows))
+                complete += (state.last_open_time == rows[-1][0]
+                             and np.array_equal(state.candles.column("open_time", n), [r[0] for r in rows[-n:]])
+                             and np.allclose(state.candles.column("close", n), [float(r[4]) for r in rows[-n:]]))
+            prices_ok = sum(abs(b.current_prices.get(s, 0.0) - market.prices[k]) < 1e-6 * market.prices[k]
+                            for k, s in enumerate(symbols))
+        stale_timeout = bot.ws_stale_timeout
+    finally:
+        for name, value in saved.items():
+            setattr(bot, name, value)
+    reconnects = sum(c.connects - 1 for c in connections)
+    downtime = sum(c.downtime for c in connections)
+    gaps = {kind: (gauge("stream_gaps_total", kind=kind) - before[kind][0],
+                   gauge("stream_backfilled_total", kind=kind) - before[kind][1]) for kind in before}
+    print(f"{pair_count} pair di {len(connections)} koneksi, {rate} round/s selama {seconds:.0f}s (+ periode tenang), server memutus tiap "
+          f"{drop_every:.0f}s: " + ", ".join(f"{mode} {count}x" for mode, count in stream.drops.items()))
+    print(f"  reconnect        : {reconnects} kali, rata-rata terputus {downtime / max(reconnects, 1) * 1e3:.0f} ms "
+          f"(stall baru terdeteksi setelah ws_stale_timeout {stale_timeout:.0f}s tanpa pesan)")
+    print(f"  trade            : {received:,.0f}/{sent} diterima, {gaps['trade'][0]:.0f} gap trade id, "
+          f"{gaps['trade'][1]:,.0f} trade di-backfill lewat historicalTrades ({positions} pair dengan posisi)")
+    print(f"  candle           : {gaps['kline'][0]:.0f} gap kline, {gaps['kline'][1]:.0f} candle di-backfill; "
+          f"candle lengkap dan sama dengan server untuk {complete}/{pair_count} pair")
+    print(f"  harga terakhir   : sama dengan server untuk {prices_ok}/{pair_count} pair "
+          f"(koneksi {'terbuka' if connected else 'sedang putus'} saat stream berhenti)")
+
+
+def bench_ws(pair_count=20, seconds=12.0, rate=100, drop_every=2.0):
+    bench_decode()
+    bench_conflation()
+    bench_ws_reconnect(pair_count, seconds, rate, drop_every)
+
+
+# ====================================================
+# Instrumentasi hot path: overhead metrics per event, lock wait, profiler, scrape
+# ====================================================
+def _per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def bench_metrics(symbols=50, ticks=2_000, repeat=5):
+    from prometheus_client import generate_latest
+
+    n = 200_000
+    local = bot.LocalHistogram("bench_local_seconds", "bench", ("stage", "symbol"))
+    prom = bot.Histogram("bench_prometheus_seconds", "bench", ["stage", "symbol"], buckets=bot.LATENCY_BUCKETS)
+    child = prom.labels("decode", "P000USDT")
+    plain, timed = threading.Lock(), bot.TimedLock("bench")
+
+    def plain_lock():
+        with plain:
+            pass
+
+    def timed_lock():
+        with timed:
+            pass
+
+    rows = [
+        ("LocalHistogram.observe", _per_call(lambda: local.observe(("decode", "P000USDT"), 3e-5), n)),
+        ("Histogram.labels().observe", _per_call(lambda: prom.labels("decode", "P000USDT").observe(3e-5), n)),
+        ("Histogram child.observe", _per_call(lambda: child.observe(3e-5), n)),
+        ("Lock acquire/release", _per_call(plain_lock, n)),
+        ("TimedLock acquire/release", _per_call(timed_lock, n)),
+    ]
+    print("biaya primitif per panggilan:")
+    for label, cost in rows:
+        print(f"  {label:>28} : {cost * 1e6:6.2f} us")
+
+    names = [f"P{i:03d}USDT" for i in range(symbols)]
+    messages = synthetic_stream(names, ticks)
+    saved = bot.hot_path_metrics
+    with offline_bot() as b:
+        open_tick_positions(b, names)
+
+        def run():
+            t0 = time.perf_counter()
+            for message in messages:
+                b.on_message(None, message)
+            elapsed = (time.perf_counter() - t0) / len(messages)
+            while not b.candle_queue.empty():
+                b.candle_queue.get_nowait()
+            return elapsed
+
+        results = {True: [], False: []}
+        try:
+            for _ in range(repeat):  # Bergantian supaya noise mesin terbagi rata
+                for enabled in (False, True):
+                    bot.hot_path_metrics = enabled
+                    results[enabled].append(run())
+            bot.hot_path_metrics = True
+            bot.profiler.interval = bot.profile_interval
+            bot.profiler.start()
+            profiled = min(run() for _ in range(repeat))
+            bot.profiler.running.clear()
+            bot.profiler.thread.join()
+            bot.profiler.thread = None
+            samples = sum(bot.profiler.samples.values())
+        finally:
+            bot.hot_path_metrics = saved
+    off, on = min(results[False]), min(results[True])
+    print(f"on_message ({len(messages)} pesan @trade + @kline, {symbols} simbol, min dari {repeat} run):")
+    print(f"  metrics mati : {off * 1e6:6.2f} us/pesan")
+    print(f"  metrics aktif: {on * 1e6:6.2f} us/pesan  (overhead {(on - off) * 1e6:.2f} us/pesan)")
+    print(f"  + profiler {bot.profile_interval * 1e3:.0f} ms: {profiled * 1e6:6.2f} us/pesan "
+          f"(overhead {(profiled - on) * 1e6:.2f} us/pesan, {samples} sampel stack)")
+
+    series = len(bot.stage_latency.series)
+    t0 = time.perf_counter()
+    size = len(generate_latest(bot.REGISTRY))
+    print(f"scrape /metrics: {(time.perf_counter() - t0) * 1e3:.1f} ms, {size / 1e3:.0f} KB "
+          f"({series} seri stage_latency_seconds)")
+
+
+# ====================================================
+# Mode supervisor: throughput per jumlah proses worker (generator tick sintetis)
+# ====================================================
+def synthetic_stream(symbols, ticks, ticks_per_candle=50, seed=0, start_ms=1_700_000_000_000,
+                     interval_ms=15 * 60 * 1000):
+    """Pesan combined stream @trade (random walk) dan @kline close tiap `ticks_per_candle` tick per simbol.
+
+    Random walk tiap simbol hanya bergantung pada nama simbol dan seed, bukan pembagian shard.
+    """
+    steps = [np.random.default_rng([seed, zlib.crc32(symbol.encode())]).normal(0, 0.0015, ticks) for symbol in symbols]
+    prices = 100.0 * np.exp(np.cumsum(np.column_stack(steps), axis=0))
+    messages = []
+    opens = prices[0].tolist()
+    highs, lows = list(opens), list(opens)
+    for i, row in enumerate(prices.tolist()):
+        for j, price in enumerate(row):
+            symbol = symbols[j]
+            highs[j] = max(highs[j], price)
+            lows[j] = min(lows[j], price)
+            messages.append(f'{{"stream":"{symbol.lower()}@trade","data":{{"e":"trade","s":"{symbol}","t":{i + 1},'
+                            f'"p":"{price:.6f}","q":"1.000"}}}}')
+            if (i + 1) % ticks_per_candle == 0:
+                t0 = start_ms + (i // ticks_per_candle) * interval_ms
+                messages.append(f'{{"stream":"{symbol.lower()}@kline_15m","data":{{"e":"kline","s":"{symbol}",'
+                                f'"k":{{"t":{t0},"T":{t0 + interval_ms - 1},"s":"{symbol}","o":"{opens[j]:.6f}",'
+                                f'"h":"{highs[j]:.6f}","l":"{lows[j]:.6f}","c":"{price:.6f}","x":true}}}}}}')
+                opens[j] = highs[j] = lows[j] = price
+    return messages
+
+
+def _shard_bench_worker(shard, symbols, slots, events, ticks, barrier, results):
+    messages = synthetic_stream(symbols, ticks)
+    with without_portfolio_caps(), offline_bot() as b:
+        b.ledger = b.SharedLedger(slots, shard, events)
+        b.update_shard_balance()
+        barrier.wait()
+        t0 = time.perf_counter()
+        for raw in messages:
+            b.on_message(None, raw)
+            while not b.candle_queue.empty():
+                b.handle_closed_candle(b.candle_queue.get_nowait())
+            if b.order_executor.pending:  # Seperti replay deterministik: entry/exit selesai sebelum tick berikutnya
+                b.order_executor.wait_idle()
+        elapsed = time.perf_counter() - t0
+        pnl = sum(trade["pnl"] for trade in b.executed_trades)
+        results.put((len(messages), elapsed, len(b.executed_trades), pnl))
+
+
+def bench_shards(pair_count=200, ticks=1000, worker_counts=None):
+    ctx = multiprocessing.get_context("spawn")
+    symbols = [f"P{i:03d}USDT" for i in range(pair_count)]
+    worker_counts = worker_counts or sorted({1, 2, 4, bot.os.cpu_count() or 1})
+    print(f"{pair_count} pair x {ticks} tick @trade (+ kline close tiap 50 tick), {bot.os.cpu_count()} CPU")
+    print(f"{'worker':>7} | {'pesan':>9} | {'pesan/s':>12} | {'scaling':>7} | trade ditutup | saldo ledger")
+    base = None
+    for n in worker_counts:
+        ledger_process, slots, events = bot.start_ledger(n, context=ctx, archive_path=None, journal_file=None)
+        barrier, results = ctx.Barrier(n + 1), ctx.Queue()
+        processes = [ctx.Process(target=_shard_bench_worker, args=(i, shard, slots, events, ticks, barrier, results))
+                     for i, shard in enumerate(bot.shard_pairs(symbols, n))]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        bot.stop_ledger(ledger_process, events)
+        messages = sum(stat[0] for stat in stats)
+        rate = messages / max(stat[1] for stat in stats)
+        base = base or rate
+        closed = sum(stat[2] for stat in stats)
+        expected = bot.initial_capital + sum(stat[3] for stat in stats)
+        balance = slots[0] + sum(slots[1 + n:])  # Saldo awal + PnL yang dibukukan ledger per shard
+        if not np.isclose(balance, expected, rtol=1e-9, atol=1e-9):
+            raise AssertionError(f"saldo ledger {balance} != saldo awal + PnL semua worker {expected}")
+        print(f"{n:>7} | {messages:>9} | {rate:>12,.0f} | {rate / base:>6.2f}x | {closed:>13} | {balance:.4f}")
+
+
+# ====================================================
+# Summary: scan executed_trades (lama) vs RollingTradeStats
+# ====================================================
+def legacy_weekly_summary(executed_trades, now):
+    """Bagian hitung weekly_summary lama: filter seluruh executed_trades per exit_time."""
+    start_period = now - datetime.timedelta(days=7)
+    trades_week = [trade for trade in executed_trades if 'exit_time' in trade and trade['exit_time'] >= start_period]
+    total_trades = len(trades_week)
+    win_count = sum(1 for t in trades_week if t.get('pnl', 0) > 0)
+    return total_trades, win_count
+
+
+def synthetic_closed_trades(n, seed=0, start=None):
+    rng = np.random.default_rng(seed)
+    start = start or bot.jakarta_tz.localize(datetime.datetime(2024, 1, 1))
+    minutes = np.cumsum(rng.integers(1, 30, n)).tolist()
+    pnl = rng.normal(0.05, 1.0, n).tolist()
+    balance = 1000.0
+    for i in range(n):
+        balance += pnl[i]
+        yield {"entry_time": start, "symbol": f"P{i % 200:03d}USDT", "direction": "long" if i % 2 else "short",
+               "entry_price": 100.0, "stop_loss": 98.0, "take_profit": 103.0, "quantity": 1.0,
+               "fill_price": 100.0, "exit_time": start + datetime.timedelta(minutes=minutes[i]),
+               "exit_price": 100.0 + pnl[i], "exit_reason": "take_profit", "pnl": pnl[i], "balance_after": balance}
+
+
+def bench_summary(sizes, repeat=5):
+    import tracemalloc
+
+    print(f"{'trade':>9} | {'weekly lama':>12} | {'weekly baru':>12} | {'memori lama':>12} | {'memori baru':>12} | arsip")
+    for n in sizes:
+        tracemalloc.start()
+        legacy_trades = list(synthetic_closed_trades(n))
+        legacy_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        now = legacy_trades[-1]["exit_time"]
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            legacy_result = legacy_weekly_summary(legacy_trades, now)
+        legacy_time = (time.perf_counter() - t0) / repeat
+        del legacy_trades
+
+        archive_dir = tempfile.mkdtemp(prefix="trade-archive-")
+        try:
+            path = os.path.join(archive_dir, "trades.jsonl")
+            stats, archive = bot.RollingTradeStats(days_kept=10_000), bot.TradeArchive(path)
+            memory = bot.collections.deque(maxlen=bot.executed_trades_in_memory)
+            tracemalloc.start()
+            for record in synthetic_closed_trades(n):
+                memory.append(record)
+                stats.record(record["exit_time"], record["pnl"], record["balance_after"])
+                archive.append(record)
+            new_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            archive.file.close()
+            start_period = now - datetime.timedelta(days=7)
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                week = stats.window(start_period.date(), now.date() + datetime.timedelta(days=1))
+            new_time = (time.perf_counter() - t0) / repeat
+            archive_mb = os.path.getsize(path) / 1e6
+        finally:
+            shutil.rmtree(archive_dir, ignore_errors=True)
+        # Lama memfilter per waktu exit, baru per hari WIB: bandingkan dengan window harian yang sama
+        day_start = bot.jakarta_tz.localize(datetime.datetime.combine(start_period.date(), datetime.time()))
+        expected = legacy_weekly_summary(synthetic_closed_trades(n), day_start + datetime.timedelta(days=7))
+        if (week.count, week.wins) != expected:
+            raise AssertionError(f"window stats {week.count}/{week.wins} != scan {expected}")
+        print(f"{n:>9} | {_fmt_us(legacy_time)} | {_fmt_us(new_time)} | {legacy_memory / 1e6:>9.1f} MB | "
+              f"{new_memory / 1e6:>9.1f} MB | {archive_mb:.1f} MB")
+
+
+# ====================================================
+# Journal: throughput tulis (group commit) dan recovery, rekonsiliasi setelah restart
+# ====================================================
+def synthetic_journal_events(n, seed=0):
+    """Event seperti bot live: open -> pindah SL ke BEP -> close, per trade sintetis."""
+    count = 0
+    for record in synthetic_closed_trades(-(-n // 3), seed=seed):
+        trade = {key: record[key] for key in ("entry_time", "symbol", "direction", "entry_price", "stop_loss",
+                                              "take_profit", "quantity", "fill_price")}
+        trade["orders"] = {"entry_order": {"orderId": count}, "stop_order": {"algoId": count + 1},
+                           "tp_order": {"algoId": count + 2}}
+        for event in (("open", trade),
+                      ("orders", {"symbol": record["symbol"], "orders": {"stop_order": {"algoId": count + 3}},
+                                  "stop_loss": record["entry_price"], "breakeven": True}),
+                      ("close", record)):
+            if count == n:
+                return
+            count += 1
+            yield event
+
+
+def _journal_summary(state):
+    return state.seq, state.balance, sorted(state.positions), state.stats.total.to_list()
+
+
+def bench_journal_writes(sizes, legacy_events=5_000):
+    import sqlite3
+
+    print(f"{'event':>9} | {'append p50/p99':>18} | {'tulis':>12} | {'event/commit':>12} | {'db':>8} | "
+          f"{'recovery':>10} | {'replay penuh':>12}")
+    for n in sizes:
+        tmp = tempfile.mkdtemp(prefix="journal-")
+        try:
+            path = os.path.join(tmp, "journal.sqlite")
+            journal = bot.Journal(path)
+            journal.open()
+            latencies = []
+            t0 = time.perf_counter()
+            for kind, payload in synthetic_journal_events(n):
+                t = time.perf_counter()
+                journal.append(kind, payload)
+                latencies.append(time.perf_counter() - t)
+            journal.flush()
+            write_time = time.perf_counter() - t0
+            commits = journal.commits
+            journal.close()
+            size_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1e6
+
+            t0 = time.perf_counter()
+            recovered = bot.Journal(path)
+            state, tail = recovered.open()
+            recovery = time.perf_counter() - t0
+            recovered.close()
+            t0 = time.perf_counter()
+            replayed = bot.Journal(path)
+            full_state, _ = replayed.open(use_snapshot=False)
+            full_replay = time.perf_counter() - t0
+            replayed.close()
+            if _journal_summary(state) != _journal_summary(full_state) or state.seq != n:
+                raise AssertionError("state dari snapshot + tail berbeda dengan replay penuh")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        p = _percentiles(latencies)
+        print(f"{n:>9} | {p[50] * 1e6:6.1f} / {p[99] * 1e6:6.1f} us | {n / write_time:>8.0f} /s | "
+              f"{n / commits:>12.1f} | {size_mb:>5.1f} MB | {recovery * 1e3:>7.1f} ms | {full_replay * 1e3:>9.1f} ms")
+
+    # Pembanding: INSERT + COMMIT per event di thread pemanggil (synchronous=FULL)
+    tmp = tempfile.mkdtemp(prefix="journal-")
+    try:
+        db = sqlite3.connect(os.path.join(tmp, "journal.sqlite"), isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute("CREATE TABLE events (seq INTEGER PRIMARY KEY, ts REAL, kind TEXT, payload TEXT)")
+        latencies = []
+        for seq, (kind, payload) in enumerate(synthetic_journal_events(legacy_events), 1):
+            t = time.perf_counter()
+            db.execute("INSERT INTO events VALUES (?, ?, ?, ?)",
+                       (seq, time.time(), kind, json.dumps(payload, default=bot._json_default)))
+            latencies.append(time.perf_counter() - t)
+        db.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    p = _percentiles(latencies)
+    print(f"commit per event di thread pemanggil ({legacy_events} event): append p50/p99 "
+          f"{p[50] * 1e6:.1f} / {p[99] * 1e6:.1f} us, {legacy_events / sum(latencies):.0f} event/s")
+
+
+def bench_journal_reconcile(latency=0.01):
+    """Buka 3 posisi, ubah exchange saat bot "mati", lalu restart: recovery + rekonsiliasi."""
+    closed, missing_stop, untouched = "P000USDT", "P001USDT", "P002USDT"
+    tmp = tempfile.mkdtemp(prefix="journal-")
+    exchange = FakeExchange(order_latency=latency)
+    try:
+        path = os.path.join(tmp, "journal.sqlite")
+        with FakeExchangeServer(exchange) as server, offline_bot(server.client()) as b:
+            b.open_journal(path)
+            b.update_global_balance(None)
+            trades = {symbol: b.evaluate_entry(symbol, breakout_state(i))
+                      for i, symbol in enumerate((closed, missing_stop, untouched))}
+            b.order_executor.wait_idle()
+            b.journal.close()
+            before = {symbol: dict(trade["orders"]) for symbol, trade in trades.items()}
+
+            # Saat bot mati: posisi pertama ditutup manual, SL posisi kedua dibatalkan
+            exit_side = "SELL" if trades[closed]["direction"] == "long" else "BUY"
+            b.client.futures_create_order(symbol=closed, side=exit_side, type="MARKET",
+                                          quantity=trades[closed]["quantity"], reduceOnly=True)
+            b.cancel_order(missing_stop, before[missing_stop]["stop_order"])
+
+            for index in (b.open_trades, b.positions, b.breakeven_index, b.exit_levels):
+                index.clear()
+            t0 = time.perf_counter()
+            state = b.open_journal(path)
+            b.update_global_balance(state.balance)
+            b.restore_state(state)
+            recovered = time.perf_counter() - t0
+            b.reconcile_positions()
+            b.order_executor.wait_idle()
+            reconciled = time.perf_counter() - t0
+            b.journal.close()
+            b.journal = None
+            open_ids = {order["algoId"] for order in exchange.open_orders({}, algo=True)}
+
+            checks = {
+                "posisi ditutup di exchange -> dicatat closed (reconcile)":
+                    closed not in b.positions and b.executed_trades[-1]["exit_reason"] == "reconcile",
+                "order proteksi posisi tertutup dibatalkan":
+                    not {before[closed]["stop_order"]["algoId"], before[closed]["tp_order"]["algoId"]} & open_ids,
+                "SL yang hilang dipasang ulang":
+                    b.positions[missing_stop]["orders"]["stop_order"]["algoId"] in open_ids
+                    and b.positions[missing_stop]["orders"]["stop_order"] != before[missing_stop]["stop_order"],
+                "posisi lain tidak berubah": b.positions[untouched]["orders"] == before[untouched],
+                "SL baru tercatat di journal": bot.Journal(path).open()[0].positions[missing_stop]["orders"]
+                                               ["stop_order"]["algoId"] in open_ids,
+            }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"restart: recovery {recovered * 1e3:.1f} ms, + rekonsiliasi {reconciled * 1e3:.1f} ms "
+          f"(latency exchange {latency * 1e3:.0f} ms)")
+    for label, ok in checks.items():
+        print(f"  {'OK ' if ok else 'GAGAL'} {label}")
+    if not all(checks.values()):
+        raise AssertionError("rekonsiliasi tidak sesuai")
+
+
+# ====================================================
+# Order pipeline: bracket serial di bawah data_lock (lama) vs OrderExecutor
+# ====================================================
+def legacy_place_orders(client, symbol, direction, stop_loss, take_profit, quantity, max_retries=3):
+    """place_orders versi lama: tiga order berurutan, gagal di leg mana pun = ulang semua setelah sleep(1)."""
+    for attempt in range(max_retries):
+        try:
+            side = "BUY" if direction == "long" else "SELL"
+            exit_side = "SELL" if direction == "long" else "BUY"
+            market_order = client.futures_create_order(symbol=symbol, side=side, type="MARKET",
+                                                       quantity=round(quantity, 6))
+            stop_order = client.futures_create_order(symbol=symbol, side=exit_side, type="STOP_MARKET",
+                                                     stopPrice=round(stop_loss, 2), closePosition=True)
+            tp_order = client.futures_create_order(symbol=symbol, side=exit_side, type="TAKE_PROFIT_MARKET",
+                                                   stopPrice=round(take_profit, 2), closePosition=True)
+            return {"market_order": market_order, "stop_order": stop_order, "tp_order": tp_order}
+        except Exception:
+            time.sleep(1)
+    return None
+
+
+def breakout_state(seed):
+    """ATRState 21 candle sintetis dengan candle close terakhir breakout ke atas."""
+    open_time, open_, high, low, close = synthetic_ohlc(21, seed=seed)
+    state = bot.ATRState(bot.atr_period)
+    for i in range(20):
+        state.update(int(open_time[i]), open_[i], high[i], low[i], close[i])
+    breakout = high[19] * 1.004
+    state.update(int(open_time[20]), close[19], breakout * 1.001, min(low[20], close[19]), breakout)
+    return state
+
+
+def _entry_orders(exchange):
+    """Jumlah order entry (MARKET, bukan reduceOnly) yang diterima exchange per simbol."""
+    counts = {}
+    for order in exchange.orders.values():
+        if order.get("type") == "MARKET" and not order.get("reduceOnly"):
+            counts[order["symbol"]] = counts.get(order["symbol"], 0) + 1
+    return counts
+
+
+def _leg_mean(leg, before):
+    total = REGISTRY.get_sample_value("order_latency_seconds_sum", {"leg": leg}) or 0.0
+    count = REGISTRY.get_sample_value("order_latency_seconds_count", {"leg": leg}) or 0.0
+    return (total - before[leg][0]) / max(count - before[leg][1], 1)
+
+
+def bench_orders(signals=20, latency=0.05, failure_rate=0.05, workers=4, seed=0):
+    exchange = FakeExchange(order_latency=latency, failure_rate=failure_rate, seed=seed)
+    symbols = [f"P{i:03d}USDT" for i in range(signals)]
+    legs = ("entry", "stop_loss", "take_profit", "bracket")
+    print(f"{signals} sinyal serentak, latency order {latency * 1e3:.0f} ms, failure rate {failure_rate:.0%}, "
+          f"{workers} worker")
+    with FakeExchangeServer(exchange) as server, offline_bot(server.client()) as b, without_portfolio_caps():
+        saved_executor, saved_open_position = b.order_executor, b.open_position
+        b.order_executor = b.OrderExecutor(workers)
+        protected_at = {}
+
+        def timed_open_position(trade):
+            try:
+                return saved_open_position(trade)
+            finally:
+                protected_at[trade["symbol"]] = time.perf_counter()
+
+        b.open_position = timed_open_position
+        try:
+            before = {leg: (REGISTRY.get_sample_value("order_latency_seconds_sum", {"leg": leg}) or 0.0,
+                            REGISTRY.get_sample_value("order_latency_seconds_count", {"leg": leg}) or 0.0)
+                      for leg in legs}
+            states = [breakout_state(i) for i in range(signals)]
+            t0 = time.perf_counter()
+            trades = [b.evaluate_entry(symbol, state) for symbol, state in zip(symbols, states)]
+            blocked = time.perf_counter() - t0
+            b.order_executor.wait_idle()
+            makespan = time.perf_counter() - t0
+            pipeline = sorted(protected_at[s] - t0 for s in symbols)
+            opened = sum(trade["status"] == "open" for trade in trades)
+            pipeline_entries = _entry_orders(exchange)
+            leg_means = {leg: _leg_mean(leg, before) for leg in legs}
+        finally:
+            b.order_executor.pool.shutdown()
+            b.order_executor.leg_pool.shutdown()
+            b.order_executor, b.open_position = saved_executor, saved_open_position
+
+        # Cara lama: loop sinyal memanggil place_orders sambil memegang data_lock
+        exchange.reset_orders()
+        lock = threading.Lock()
+        legacy = []
+        legacy_opened = 0
+        t0 = time.perf_counter()
+        for trade in trades:
+            with lock:
+                orders = legacy_place_orders(b.client, trade["symbol"], trade["direction"], trade["stop_loss"],
+                                             trade["take_profit"], trade["quantity"])
+            legacy_opened += orders is not None
+            legacy.append(time.perf_counter() - t0)
+        legacy_blocked = time.perf_counter() - t0
+        legacy_entries = _entry_orders(exchange)
+
+    p, q = _percentiles(legacy), _percentiles(pipeline)
+    rows = [
+        ("loop sinyal terblokir", f"{legacy_blocked * 1e3:.1f} ms", f"{blocked * 1e3:.1f} ms"),
+        ("sinyal -> SL/TP (p50/p99)", f"{p[50] * 1e3:.0f} / {p[99] * 1e3:.0f} ms", f"{q[50] * 1e3:.0f} / {q[99] * 1e3:.0f} ms"),
+        ("semua selesai", f"{legacy_blocked * 1e3:.1f} ms", f"{makespan * 1e3:.1f} ms"),
+        ("posisi terbuka", legacy_opened, opened),
+        ("order entry duplikat", sum(legacy_entries.values()) - len(legacy_entries),
+         sum(pipeline_entries.values()) - len(pipeline_entries)),
+    ]
+    print(f"{'':>26} | {'serial + lock (lama)':>21} | {'OrderExecutor':>16}")
+    for label, old, new in rows:
+        print(f"{label:>26} | {old:>21} | {new:>16}")
+    print("latency rata-rata per leg : " + ", ".join(f"{leg} {leg_means[leg] * 1e3:.1f} ms" for leg in legs))
+
+
+# ====================================================
+# Filter simbol: pembulatan lama (6/2 desimal) vs cache exchangeInfo + pre-validasi
+# ====================================================
+FILTER_BENCH_PRICES = {"BTCUSDT": 43120.5, "ETHUSDT": 2034.17, "BNBUSDT": 312.45, "ADAUSDT": 0.3512,
+                       "XRPUSDT": 0.5234, "DOGEUSDT": 0.08123}
+
+
+class LegacyRounding(bot.ExchangeFilters):
+    """Perilaku place_orders lama: quantity round(6), harga round(2) untuk semua simbol, tanpa validasi."""
+
+    def price(self, symbol, price):
+        return round(price, 2)
+
+    def quantity(self, symbol, quantity):
+        return round(quantity, 6)
+
+    def bracket(self, symbol, entry_price, stop_loss, take_profit, quantity):
+        return self.price(symbol, stop_loss), self.price(symbol, take_profit), self.quantity(symbol, quantity)
+
+
+def filter_bench_signals(signals, seed=0):
+    """(symbol, direction, entry, SL, TP, quantity) dengan sizing bot; sebagian margin kecil (< minNotional)."""
+    rng = np.random.default_rng(seed)
+    symbols = list(FILTER_BENCH_PRICES)
+    out = []
+    for i in range(signals):
+        symbol = symbols[i % len(symbols)]
+        entry = FILTER_BENCH_PRICES[symbol] * (1 + rng.normal(0, 0.001))
+        atr = entry * rng.uniform(0.003, 0.01)
+        sign = 1 if rng.random() < 0.5 else -1
+        stop_loss, take_profit = bot.breakout_levels(entry, atr, sign, bot.sl_atr_mult, bot.tp_atr_mult)
+        margin = rng.choice([2.0, 50.0, 500.0], p=[0.1, 0.6, 0.3])
+        quantity = float(bot.position_size(entry, stop_loss, atr, margin, bot.volatility_scale, bot.base_risk_percent))
+        out.append((symbol, "long" if sign > 0 else "short", entry, stop_loss, take_profit, quantity))
+    return out
+
+
+def bench_filters(signals=60, latency=0.02, workers=4, seed=0):
+    batch = filter_bench_signals(signals, seed)
+    print(f"{signals} bracket order untuk {len(FILTER_BENCH_PRICES)} pair (harga nyata), latency order "
+          f"{latency * 1e3:.0f} ms, fake exchange menegakkan filter Binance, {workers} worker")
+    exchange = FakeExchange(order_latency=latency, weight_limit=None, filters=FUTURES_FILTERS,
+                            price_source=FILTER_BENCH_PRICES.get)
+    results = {}
+    with FakeExchangeServer(exchange) as server, offline_bot(server.client()) as b:
+        saved_executor = b.order_executor
+        b.order_executor = b.OrderExecutor(workers)
+        t0 = time.perf_counter()
+        b.exchange_filters = b.ExchangeFilters()
+        b.exchange_filters.load()
+        load_ms = (time.perf_counter() - t0) * 1e3
+        try:
+            for mode, filters in (("lama", LegacyRounding()), ("pre-validasi", b.exchange_filters)):
+                b.exchange_filters = filters
+                exchange.reset_orders()
+                exchange.reset_counters()
+                retries = REGISTRY.get_sample_value("order_retry_total") or 0.0
+                local = REGISTRY.get_sample_value("order_rejected_total", {"where": "local"}) or 0.0
+                done = {}
+
+                def timed(i, *args):
+                    try:
+                        return b.place_orders(*args)
+                    finally:
+                        done[i] = time.perf_counter()
+
+                t0 = time.perf_counter()
+                futures = [b.order_executor.submit(f"{s[0]}#{i}", timed, i, *s) for i, s in enumerate(batch)]
+                opened = sum(f.result() is not None for f in futures)
+                makespan = time.perf_counter() - t0
+                # SL/TP yang dikirim bergeser lebih dari satu tick dari level strategi
+                shifted = 0
+                for symbol, _, _, stop_loss, take_profit, _ in batch:
+                    tick = float(FUTURES_FILTERS[symbol]["tickSize"])
+                    shifted += any(abs(filters.price(symbol, level) - level) > tick
+                                   for level in (stop_loss, take_profit))
+                results[mode] = {
+                    "opened": opened, "requests": exchange.requests, "rejects": exchange.filter_rejects,
+                    "retries": (REGISTRY.get_sample_value("order_retry_total") or 0.0) - retries,
+                    "local": (REGISTRY.get_sample_value("order_rejected_total", {"where": "local"}) or 0.0) - local,
+                    "latency": _percentiles([done[i] - t0 for i in range(signals)]),
+                    "makespan": makespan, "shifted": shifted,
+                }
+        finally:
+            b.order_executor.pool.shutdown()
+            b.order_executor.leg_pool.shutdown()
+            b.order_executor = saved_executor
+
+    old, new = results["lama"], results["pre-validasi"]
+    rows = [
+        ("bracket terpasang", old["opened"], new["opened"]),
+        ("request ke exchange", old["requests"], new["requests"]),
+        ("ditolak filter exchange", f"{old['rejects']} ({old['rejects'] / max(old['requests'], 1):.0%})",
+         f"{new['rejects']} ({new['rejects'] / max(new['requests'], 1):.0%})"),
+        ("retry order", int(old["retries"]), int(new["retries"])),
+        ("ditolak lokal (0 request)", int(old["local"]), int(new["local"])),
+        ("SL/TP meleset > 1 tick", old["shifted"], new["shifted"]),
+        ("selesai p50/p99", f"{old['latency'][50] * 1e3:.0f} / {old['latency'][99] * 1e3:.0f} ms",
+         f"{new['latency'][50] * 1e3:.0f} / {new['latency'][99] * 1e3:.0f} ms"),
+        ("semua selesai", f"{old['makespan'] * 1e3:.0f} ms", f"{new['makespan'] * 1e3:.0f} ms"),
+    ]
+    print(f"{'':>26} | {'round(6)/round(2) (lama)':>24} | {'cache exchangeInfo':>18}")
+    for label, a, c in rows:
+        print(f"{label:>26} | {a!s:>24} | {c!s:>18}")
+    print(f"load exchangeInfo ({len(FUTURES_FILTERS)} simbol): {load_ms:.1f} ms, 1 request weight 1")
+
+
+# ====================================================
+# Budget API: request tanpa koordinasi (lama) vs ApiBudget + pool keep-alive bersama
+# ====================================================
+def bench_api(signals=20, seconds=20.0, pollers=8, weight_limit=300, order_limit_10s=40, ban_after=20,
+              ban_seconds=10.0, latency=0.01, workers=4):
+    """Polling klines dari banyak thread + burst sinyal terhadap fake exchange yang menegakkan limit.
+
+    Limit diperkecil (weight per menit, order per 10 detik) supaya pelanggaran terjadi dalam hitungan
+    detik; exchange mem-ban IP (418, ban_seconds) setelah ban_after kali 429 dalam satu menit.
+    """
+    print(f"{pollers} thread polling klines (weight 5) + {signals} sinyal serentak di detik ke-3, {seconds:g} s; "
+          f"limit {weight_limit} weight/menit, {order_limit_10s} order/10 s, ban {ban_seconds:g} s setelah "
+          f"{ban_after}x 429, latency {latency * 1e3:.0f} ms, {workers} worker order")
+    results = {}
+    for mode in ("lama", "ApiBudget"):
+        exchange = FakeExchange(latency=latency, weight_limit=weight_limit, order_limit_10s=order_limit_10s,
+                                ban_after=ban_after, ban_seconds=ban_seconds)
+        with FakeExchangeServer(exchange) as server, offline_bot(server.client()) as b:
+            budget = None
+            if mode == "ApiBudget":
+                budget = b.ApiBudget(weight_limit * b.api_budget_headroom, order_limit_10s * b.api_budget_headroom,
+                                     10 * order_limit_10s)
+                b.use_api_budget(b.client, budget, 3 * workers + pollers + 4)
+            saved_executor = b.order_executor
+            b.order_executor = b.OrderExecutor(workers)
+            stop = threading.Event()
+            polled = collections.Counter()
+
+            def poll(k):
+                symbol = f"P{k:03d}USDT"
+                while not stop.is_set():
+                    try:
+                        b.thread_client().futures_klines(symbol=symbol, interval="15m", limit=1000)
+                        polled["ok"] += 1
+                    except Exception:
+                        polled["gagal"] += 1
+                        time.sleep(0.05)
+
+            threads = [threading.Thread(target=poll, args=(k,), daemon=True) for k in range(pollers)]
+            t0 = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(3.0)
+            done = {}
+
+            def timed(i, symbol, price):
+                try:
+                    return b.place_orders(symbol, "long", price, price * 0.98, price * 1.03, 1.0)
+                finally:
+                    done[i] = time.perf_counter()
+
+            signal_at = time.perf_counter()
+            futures = []
+            for i in range(signals):
+                symbol = f"S{i:03d}USDT"
+                futures.append(b.order_executor.submit(symbol, timed, i, symbol, exchange.mark_price(symbol)))
+            protected = sum(f.result() is not None for f in futures)
+            remaining = seconds - (time.perf_counter() - t0)
+            if remaining > 0:
+                time.sleep(remaining)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            b.order_executor.pool.shutdown()
+            b.order_executor.leg_pool.shutdown()
+            b.order_executor = saved_executor
+            flattened = sum(o.get("reduceOnly") for o in exchange.orders.values() if o.get("type") == "MARKET")
+            results[mode] = {
+                "polled": polled["ok"], "poll_failed": polled["gagal"], "rejected": exchange.rejected,
+                "banned": exchange.banned, "protected": protected, "flattened": flattened,
+                "latency": _percentiles([done[i] - signal_at for i in range(signals)]),
+                "max_weight": exchange.max_used_weight, "connections": exchange.connections,
+            }
+
+    old, new = results["lama"], results["ApiBudget"]
+    rows = [
+        ("ditolak 429/418", old["rejected"], new["rejected"]),
+        ("IP di-ban (418)", old["banned"], new["banned"]),
+        ("weight/menit tertinggi", f"{old['max_weight']} / {weight_limit}", f"{new['max_weight']} / {weight_limit}"),
+        ("polling klines ok / gagal", f"{old['polled']} / {old['poll_failed']}", f"{new['polled']} / {new['poll_failed']}"),
+        ("bracket SL+TP terpasang", f"{old['protected']} / {signals}", f"{new['protected']} / {signals}"),
+        ("posisi di-flatten", old["flattened"], new["flattened"]),
+        ("sinyal -> selesai p50/p99", f"{old['latency'][50] * 1e3:.0f} / {old['latency'][99] * 1e3:.0f} ms",
+         f"{new['latency'][50] * 1e3:.0f} / {new['latency'][99] * 1e3:.0f} ms"),
+        ("koneksi TCP dibuka", old["connections"], new["connections"]),
+    ]
+    print(f"{'':>26} | {'tanpa budget (lama)':>19} | {'ApiBudget':>14}")
+    for label, a, c in rows:
+        print(f"{label:>26} | {a!s:>19} | {c!s:>14}")
+
+
+# ====================================================
+# Risk portofolio: loop open_trades per cek margin (lama) vs PortfolioRisk inkremental
+# ====================================================
+def legacy_effective_margin(balance, trades, prices):
+    """get_effective_margin lama: loop semua posisi tiap cek, PnL dikali leverage, tanpa fee."""
+    effective_margin = balance
+    for trade in trades:
+        price = prices.get(trade['symbol'])
+        if price is None:
+            continue
+        fill_price = trade.get('fill_price', trade['entry_price'])
+        sign = 1 if trade['direction'] == "long" else -1
+        effective_margin += sign * (price - fill_price) * trade['quantity'] * bot.leverage
+    return effective_margin
+
+
+def bench_risk(position_counts=(10, 100, 1000), ticks=200_000, symbols=200, correlated=20, seed=0):
+    """Biaya cek margin & tick, parity PnL/drawdown inkremental vs hitung ulang penuh, korelasi dan batas."""
+    rng = np.random.default_rng(seed)
+    saved = (bot.max_open_positions, bot.max_correlated_exposure)
+    bot.max_open_positions = max(position_counts)
+    try:
+        print(f"{ticks:,} tick acak pada simbol berposisi, leverage {bot.leverage}x, fee {bot.fee_rate:.2%}")
+        print(f"{'posisi':>7} | {'margin lama':>11} | {'margin baru':>11} | {'tick update':>11} | "
+              f"{'selisih PnL':>11} | {'selisih DD':>10} | {'PnL lama (x lev, tanpa fee)':>27} | {'PnL':>9}")
+        for n in position_counts:
+            with offline_bot() as b:
+                names = [f"P{i:04d}USDT" for i in range(n)]
+                prices = dict(zip(names, 100.0 * np.exp(rng.normal(0, 0.5, n))))
+                for symbol in names:
+                    trade = {"symbol": symbol, "direction": "long" if rng.random() < 0.5 else "short",
+                             "entry_price": prices[symbol], "quantity": 50.0 / prices[symbol], "status": "active"}
+                    b.open_trades.append(trade)
+                    b.positions[symbol] = trade
+                    b.portfolio.open(trade)
+                b.current_prices.update(prices)
+                calls = max(10, 100_000 // n)
+                legacy = _per_call(lambda: legacy_effective_margin(b.global_balance, b.open_trades, b.current_prices),
+                                   calls)
+                current = _per_call(b.get_effective_margin, 100_000)
+
+                picks = rng.integers(0, n, ticks)
+                moves = np.exp(rng.normal(0, 0.002, ticks))
+                path = []
+                for k, m in zip(picks.tolist(), moves.tolist()):
+                    symbol = names[k]
+                    prices[symbol] *= m
+                    path.append((symbol, prices[symbol]))
+                start = (b.portfolio.peak, b.portfolio.drawdown)  # Puncak ditandai sejak posisi dibuka
+                t0 = time.perf_counter()
+                for symbol, price in path:
+                    b.portfolio.update(symbol, price)
+                per_tick = (time.perf_counter() - t0) / ticks
+                b.current_prices.update(prices)
+
+                exact = sum(bot.floating_pnl(t, prices[t['symbol']]) for t in b.open_trades)
+                pnl_error = abs(b.portfolio.floating - exact)
+                # Drawdown referensi: jalur tick yang sama, PnL tiap posisi dari floating_pnl
+                contrib = {t['symbol']: bot.floating_pnl(t, t['entry_price']) for t in b.open_trades}
+                trades = {t['symbol']: t for t in b.open_trades}
+                total = sum(contrib.values())
+                peak, drawdown = start
+                for symbol, price in path:
+                    value = bot.floating_pnl(trades[symbol], price)
+                    total += value - contrib[symbol]
+                    contrib[symbol] = value
+                    equity = b.global_balance + total
+                    peak = max(peak, equity)
+                    drawdown = (peak - equity) / peak
+                dd_error = abs(b.portfolio.drawdown - drawdown)
+                old_pnl = legacy_effective_margin(0.0, b.open_trades, prices)
+                b.open_trades.clear()
+                b.positions.clear()
+            print(f"{n:>7} | {legacy * 1e6:>8.2f} µs | {current * 1e6:>8.3f} µs | {per_tick * 1e6:>8.2f} µs | "
+                  f"{pnl_error:>11.2e} | {dd_error:>10.2e} | {old_pnl:>27.2f} | {exact:>9.2f}")
+
+        # ---- korelasi & batas exposure terkorelasi ----
+        window = bot.risk_returns_window
+        print(f"\nkorelasi {symbols} simbol x {window} return 15m ({correlated} simbol pertama digerakkan satu faktor, "
+              f"ρ ≈ 0.8; sisanya independen)")
+        names = [f"C{i:03d}USDT" for i in range(symbols)]
+        factor = rng.normal(0, 0.004, window + 1)
+        noise = rng.normal(0, 0.004, (window + 1, symbols))
+        returns = noise.copy()
+        returns[:, :correlated] = 2.0 * factor[:, None] + noise[:, :correlated]
+        closes = 100.0 * np.exp(np.cumsum(returns, axis=0))
+        interval = bot.INTERVAL_MS[bot.kline_interval]
+        times = np.arange(window + 1, dtype=np.int64) * interval
+        portfolio = bot.PortfolioRisk()
+        portfolio.reserve(names)
+        for k, symbol in enumerate(names):
+            portfolio.seed(symbol, times[:-1], closes[:-1, k])
+        t0 = time.perf_counter()
+        portfolio.refresh_correlation()
+        refresh = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for k, symbol in enumerate(names):  # Bar baru: refresh korelasi sekali + 200 return
+            portfolio.candle_closed(symbol, int(times[-1]), float(closes[-1, k]))
+        bar = time.perf_counter() - t0
+        rho = portfolio.corr[:correlated, :correlated][~np.eye(correlated, dtype=bool)].mean()
+        rho_free = portfolio.corr[correlated:symbols, correlated:symbols][~np.eye(symbols - correlated, dtype=bool)]
+        check = _per_call(lambda: portfolio.entry_quantity(names[0], 1, 100.0, 1.0, 50.0), 100_000)
+        print(f"  refresh korelasi {refresh * 1e3:.2f} ms, candle close semua simbol (bar baru) {bar * 1e3:.2f} ms, "
+              f"cek entry {check * 1e6:.2f} µs")
+        print(f"  ρ rata-rata kelompok berkorelasi {rho:.2f}, simbol independen {rho_free.mean():+.2f} "
+              f"(|ρ| maks {np.abs(rho_free).max():.2f})")
+
+        margin = 50.0
+        bot.max_open_positions = symbols
+        print(f"  entry long berurutan, notional {4 * margin:g} (4x margin {margin:g}), batas "
+              f"{bot.max_correlated_exposure:g}x margin (max_open_positions dinonaktifkan):")
+        for label, group in (("berkorelasi", names[:correlated]), ("independen", names[correlated:2 * correlated])):
+            for symbol in list(portfolio.held):
+                portfolio.close(symbol)
+            accepted, reduced = 0, 0
+            for symbol in group:
+                k = names.index(symbol)
+                price = float(closes[-1, k])
+                quantity, reason = portfolio.entry_quantity(symbol, 1, price, 4 * margin / price, margin)
+                if quantity <= 0:
+                    continue
+                accepted += 1
+                reduced += reason == "reduced"
+                portfolio.open({"symbol": symbol, "direction": "long", "entry_price": price, "quantity": quantity})
+            print(f"    {label:>11}: {accepted}/{len(group)} diterima ({reduced} dipotong), "
+                  f"gross exposure {portfolio.gross:,.0f} = {portfolio.gross / margin:.1f}x margin")
+    finally:
+        bot.max_open_positions, bot.max_correlated_exposure = saved
+
+
+# ====================================================
+# Notifikasi Discord: requests.post sinkron (lama) vs DiscordNotifier
+# ====================================================
+def bench_discord(messages=200, latency=0.1, rate_limit=5, window=2.0, headers=False):
+    texts = [f"🚀 **Trade OPENED** untuk **P{i:03d}USDT**\n🔀 Direction   : long\n📈 Entry Price : {100 + i:.4f}"
+             for i in range(messages)]
+    print(f"burst {messages} pesan, webhook stub latency {latency * 1e3:.0f} ms, rate limit {rate_limit}/{window:g} s, "
+          f"header X-RateLimit {'aktif' if headers else 'mati (hanya 429)'}")
+
+    # Cara lama: satu requests.post per pesan di thread pemanggil, 429 = pesan hilang
+    webhook = FakeWebhook(latency, rate_limit, window, rate_limit_headers=headers)
+    with FakeWebhookServer(webhook) as server:
+        t0 = time.perf_counter()
+        for text in texts:
+            requests.post(server.url, json={"content": text})
+        legacy_blocked = time.perf_counter() - t0
+    legacy = (legacy_blocked, legacy_blocked, webhook.requests, webhook.rate_limited,
+              messages - len(webhook.messages))
+
+    webhook = FakeWebhook(latency, rate_limit, window, rate_limit_headers=headers)
+    with FakeWebhookServer(webhook) as server:
+        notifier = bot.DiscordNotifier()
+        t0 = time.perf_counter()
+        accepted = [text for text in texts if notifier.send(text, server.url)]
+        blocked = time.perf_counter() - t0
+        notifier.flush()
+        delivered = time.perf_counter() - t0
+    received = "\n\n".join(webhook.messages)
+    if received != "\n\n".join(accepted):
+        raise AssertionError("isi/urutan pesan yang diterima webhook berbeda dengan yang dikirim")
+    batched = (blocked, delivered, webhook.requests, webhook.rate_limited, messages - len(accepted))
+
+    print(f"{'':>24} | {'requests.post (lama)':>20} | {'DiscordNotifier':>16}")
+    labels = ("pemanggil terblokir", "semua terkirim", "HTTP request", "respons 429", "pesan hilang/dibuang")
+    for n, label in enumerate(labels):
+        old, new = legacy[n], batched[n]
+        if n < 2:
+            old, new = f"{old * 1e3:.1f} ms", f"{new * 1e3:.1f} ms"
+        print(f"{label:>24} | {old:>20} | {new:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="name", required=True)
+
+    p = sub.add_parser("atr", help="ATR full recompute vs ATRState streaming")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    p.set_defaults(func=lambda a: bench_atr(a.sizes))
+
+    p = sub.add_parser("candles", help="Append candle & memori per simbol: DataFrame concat vs CandleStore")
+    p.add_argument("--history", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    p.add_argument("--retention", type=int, default=None)
+    p.set_defaults(func=lambda a: bench_candles(a.history, retention=a.retention))
+
+    p = sub.add_parser("indicators", help="Indikator: parity batch vs streaming, update 200 simbol x 10 indikator")
+    p.add_argument("--symbols", type=int, default=200)
+    p.add_argument("--candles", type=int, default=200)
+    p.set_defaults(func=lambda a: bench_indicators(a.symbols, a.candles))
+
+    p = sub.add_parser("backfill", help="Startup backfill cold vs warm terhadap fake kline server")
+    p.add_argument("--pairs", type=int, nargs="+", default=[5, 50, 200])
+    p.add_argument("--days", type=int, default=7)
+    p.add_argument("--latency", type=float, default=0.03, help="latency per request fake server (detik)")
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=lambda a: bench_backfill(a.pairs, days=a.days, latency=a.latency, workers=a.workers))
+
+    p = sub.add_parser("backtest", help="Kecepatan backtest vectorized multi-pair multi-tahun")
+    p.add_argument("--pairs", type=int, default=200)
+    p.add_argument("--years", type=float, default=2.0)
+    p.set_defaults(func=lambda a: bench_backtest(a.pairs, a.years))
+
+    p = sub.add_parser("backtest-parity", help="Bandingkan backtest dengan jalur live candle per candle")
+    p.add_argument("--symbols", type=int, default=5)
+    p.add_argument("--bars", type=int, default=5_000)
+    p.add_argument("--breakeven", type=float, default=None, help="breakeven_trigger untuk kedua jalur, mis. 0.004")
+    p.set_defaults(func=lambda a: bench_backtest_parity(a.symbols, a.bars, a.breakeven))
+
+    p = sub.add_parser("sweep", help="Throughput parameter sweep (process pool + mmap)")
+    p.add_argument("--pairs", type=int, default=20)
+    p.add_argument("--days", type=int, default=90)
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(func=lambda a: bench_sweep(a.pairs, a.days, a.workers))
+
+    p = sub.add_parser("ticks", help="Throughput tick @trade di on_message untuk 5/50/500 simbol")
+    p.add_argument("--symbols", type=int, nargs="+", default=[5, 50, 500])
+    p.add_argument("--ticks", type=int, default=200_000)
+    p.set_defaults(func=lambda a: bench_ticks(a.symbols, a.ticks))
+
+    p = sub.add_parser("ws", help="Ingestion WebSocket: decode, conflation, reconnect + backfill gap (server lokal)")
+    p.add_argument("--pairs", type=int, default=20)
+    p.add_argument("--seconds", type=float, default=12.0)
+    p.add_argument("--rate", type=int, default=100, help="round tick per detik (satu tick per pair per round)")
+    p.add_argument("--drop-every", type=float, default=2.0)
+    p.set_defaults(func=lambda a: bench_ws(a.pairs, a.seconds, a.rate, a.drop_every))
+
+    p = sub.add_parser("metrics", help="Overhead instrumentasi hot path per event, TimedLock, profiler, scrape")
+    p.add_argument("--symbols", type=int, default=50)
+    p.add_argument("--ticks", type=int, default=2_000, help="tick @trade per simbol")
+    p.set_defaults(func=lambda a: bench_metrics(a.symbols, a.ticks))
+
+    p = sub.add_parser("shards", help="Throughput mode supervisor untuk 1..N proses worker + ledger pusat")
+    p.add_argument("--pairs", type=int, default=200)
+    p.add_argument("--ticks", type=int, default=1000, help="tick @trade per pair")
+    p.add_argument("--workers", type=int, nargs="+", default=None)
+    p.set_defaults(func=lambda a: bench_shards(a.pairs, a.ticks, a.workers))
+
+    p = sub.add_parser("summary", help="Biaya summary & memori: scan executed_trades vs statistik inkremental + arsip")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    p.set_defaults(func=lambda a: bench_summary(a.sizes))
+
+    p = sub.add_parser("journal", help="Journal SQLite: throughput tulis, recovery, dan rekonsiliasi setelah restart")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    p.set_defaults(func=lambda a: (bench_journal_writes(a.sizes), bench_journal_reconcile()))
+
+    p = sub.add_parser("orders", help="Order pipeline: serial di bawah lock vs OrderExecutor terhadap fake exchange")
+    p.add_argument("--signals", type=int, default=20)
+    p.add_argument("--latency", type=float, default=0.05, help="latency order fake exchange (detik)")
+    p.add_argument("--failure-rate", type=float, default=0.05)
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=lambda a: bench_orders(a.signals, a.latency, a.failure_rate, a.workers))
+
+    p = sub.add_parser("filters", help="Reject/retry & latency order: pembulatan lama vs cache filter exchangeInfo")
+    p.add_argument("--signals", type=int, default=60)
+    p.add_argument("--latency", type=float, default=0.02, help="latency order fake exchange (detik)")
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=lambda a: bench_filters(a.signals, a.latency, a.workers))
+
+    p = sub.add_parser("api", help="Polling + burst order: tanpa budget vs ApiBudget terhadap fake exchange yang menegakkan limit")
+    p.add_argument("--signals", type=int, default=20)
+    p.add_argument("--seconds", type=float, default=20.0)
+    p.add_argument("--pollers", type=int, default=8)
+    p.add_argument("--weight-limit", type=int, default=300)
+    p.add_argument("--order-limit", type=int, default=40, help="order per 10 detik")
+    p.set_defaults(func=lambda a: bench_api(a.signals, a.seconds, a.pollers, a.weight_limit, a.order_limit))
+
+    p = sub.add_parser("risk", help="Risk portofolio: cek margin lama vs inkremental, parity PnL/drawdown, korelasi")
+    p.add_argument("--ticks", type=int, default=200_000)
+    p.add_argument("--symbols", type=int, default=200, help="jumlah simbol matriks korelasi")
+    p.set_defaults(func=lambda a: bench_risk(ticks=a.ticks, symbols=a.symbols))
+
+    p = sub.add_parser("discord", help="Burst notifikasi: requests.post sinkron vs DiscordNotifier terhadap webhook stub")
+    p.add_argument("--messages", type=int, default=200)
+    p.add_argument("--latency", type=float, default=0.1, help="latency webhook stub (detik)")
+    p.add_argument("--headers", action="store_true", help="stub mengirim header X-RateLimit-*")
+    p.set_defaults(func=lambda a: bench_discord(a.messages, a.latency, headers=a.headers))
+
+    p = sub.add_parser("replay", help="Replay stream sintetis berminggu-minggu lewat handler live + fake exchange")
+    p.add_argument("--pairs", type=int, nargs="+", default=[5, 20])
+    p.add_argument("--weeks", type=int, default=4)
+    p.add_argument("--trades-per-candle", type=int, default=20)
+    p.add_argument("--latency", type=float, default=0.0, help="latency order fake exchange (detik)")
+    p.add_argument("--failure-rate", type=float, default=0.0)
+    p.set_defaults(func=lambda a: bench_replay(a.pairs, a.weeks, a.trades_per_candle, a.latency, a.failure_rate))
+
+    p = sub.add_parser("kline-latency", help="Latency candle close -> sinyal dari replay fixture stream")
+    p.add_argument("--fixture", default="fixtures/stream_synthetic_15m.jsonl")
+    p.set_defaults(func=lambda a: bench_kline_latency(a.fixture))
+
+    p = sub.add_parser("gen-fixture", help="Buat fixture stream sintetis")
+    p.add_argument("--out", default="fixtures/stream_synthetic_15m.jsonl")
+    p.add_argument("--candles", type=int, default=40)
+    p.set_defaults(func=lambda a: print(generate_stream_fixture(a.out, bot.pairs, candles=a.candles), "pesan ditulis"))
+
+    p = sub.add_parser("record", help="Rekam stream live testnet ke fixture JSONL")
+    p.add_argument("--out", default="fixtures/stream_live.jsonl")
+    p.add_argument("--seconds", type=float, default=1800)
+    p.set_defaults(func=lambda a: record_stream(a.out, a.seconds))
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Webhook Discord palsu di localhost untuk benchmark notifier offline.
+
+Meniru POST webhook: batas 2000 karakter per pesan, rate limit per window (HTTP 429
+dengan retry_after dalam detik), header X-RateLimit-*, dan latency buatan.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeWebhook:
+    """State webhook: pesan yang diterima, rate limit fixed window, dan latency."""
+
+    def __init__(self, latency=0.0, rate_limit=5, window=2.0, rate_limit_headers=True, content_limit=2000):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.rate_limit_headers = rate_limit_headers
+        self.content_limit = content_limit
+        self.lock = threading.Lock()
+        self.messages = []
+        self.requests = 0
+        self.rate_limited = 0
+        self._window_start = time.monotonic()
+        self._used = 0
+
+    def post(self, payload):
+        """Proses satu POST. Mengembalikan (status HTTP, body, header tambahan)."""
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._used = now, 0
+            reset_after = self.window - (now - self._window_start)
+            if self._used >= self.rate_limit:
+                self.rate_limited += 1
+                return 429, {"message": "You are being rate limited.", "retry_after": round(reset_after, 3),
+                             "global": False}, {"Retry-After": str(max(1, round(reset_after)))}
+            self._used += 1
+            headers = {}
+            if self.rate_limit_headers:
+                headers = {"X-RateLimit-Limit": str(self.rate_limit),
+                           "X-RateLimit-Remaining": str(self.rate_limit - self._used),
+                           "X-RateLimit-Reset-After": f"{reset_after:.3f}"}
+            content = payload.get("content") or ""
+            if len(content) > self.content_limit:
+                return 400, {"content": [f"Must be {self.content_limit} or fewer in length."]}, headers
+            self.messages.append(content)
+            return 204, None, headers
+
+
+class _Handler(BaseHTTPRequestHandler):
+    webhook = None  # Diisi oleh FakeWebhookServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.webhook.latency:
+            time.sleep(self.webhook.latency)
+        status, body, headers = self.webhook.post(payload)
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeWebhookServer:
+    """Jalankan FakeWebhook di thread background pada port acak di 127.0.0.1."""
+
+    def __init__(self, webhook=None):
+        self.webhook = webhook or FakeWebhook()
+        handler = type("Handler", (_Handler,), {"webhook": self.webhook})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/api/webhooks/0/fake"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
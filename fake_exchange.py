@@ -0,0 +1,440 @@
+"""Exchange Binance Futures palsu di localhost untuk benchmark/replay offline.
+
+Server HTTP ini meniru endpoint REST yang dipakai bot (GET /fapi/v1/klines,
+POST/GET/DELETE /fapi/v1/order dan /fapi/v1/algoOrder, serta endpoint rekonsiliasi
+/fapi/v3/positionRisk, /fapi/v1/openOrders, /fapi/v1/openAlgoOrders,
+/fapi/v1/premiumIndex, /fapi/v1/historicalTrades dan /fapi/v1/exchangeInfo) dengan data
+deterministik, latency buatan, kegagalan acak, filter simbol, serta limit request weight per menit dan
+order per 10 detik/menit (429 + Retry-After, 418 jika terus dilanggar), sehingga
+binance Client asli bisa diarahkan ke sini tanpa koneksi ke testnet.
+"""
+import collections
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from binance.client import Client
+
+import main as bot
+
+# Filter USDⓈ-M futures (tickSize, stepSize/minQty/maxQty MARKET_LOT_SIZE, minNotional), mengikuti Binance
+FUTURES_FILTERS = {
+    "BTCUSDT": {"tickSize": "0.10", "stepSize": "0.001", "minQty": "0.001", "maxQty": "120", "notional": "100"},
+    "ETHUSDT": {"tickSize": "0.01", "stepSize": "0.001", "minQty": "0.001", "maxQty": "2000", "notional": "20"},
+    "BNBUSDT": {"tickSize": "0.010", "stepSize": "0.01", "minQty": "0.01", "maxQty": "2000", "notional": "5"},
+    "ADAUSDT": {"tickSize": "0.00010", "stepSize": "1", "minQty": "1", "maxQty": "300000", "notional": "5"},
+    "XRPUSDT": {"tickSize": "0.0001", "stepSize": "0.1", "minQty": "0.1", "maxQty": "1000000", "notional": "5"},
+    "DOGEUSDT": {"tickSize": "0.000010", "stepSize": "1", "minQty": "1", "maxQty": "30000000", "notional": "5"},
+}
+
+
+def _off_step(value, step):
+    ratio = value / step
+    return abs(ratio - round(ratio)) > 1e-6
+
+
+class FakeExchange:
+    """State exchange: generator klines deterministik, order book-keeping, latency, dan akuntansi weight.
+
+    failure_rate adalah peluang request order gagal dengan HTTP 503; separuhnya
+    "unknown execution status" (order tetap tercatat), seperti timeout di Binance.
+    cancel_failure_rate adalah peluang cancel gagal dengan HTTP 503 (order tetap aktif).
+    Kegagalan diundi per (simbol, tipe order, percobaan ke-n) dari seed, jadi hasilnya sama
+    walaupun leg SL/TP dikirim paralel dan urutan request antar thread berubah.
+    price_source (callable symbol -> harga atau None) menggantikan harga sintetis untuk
+    fill MARKET dan markPrice, mis. harga tick terakhir saat replay.
+    market (fake_stream.FakeMarket) membuat klines dan historicalTrades sama dengan isi stream.
+    filters (symbol -> dict seperti FUTURES_FILTERS) diumumkan lewat exchangeInfo dan ditegakkan:
+    order dengan harga/quantity tidak kelipatan tick/step, di luar minQty/maxQty, atau di bawah
+    minNotional ditolak HTTP 400 seperti Binance. None = tanpa filter.
+    weight_limit (per menit), order_limit_10s dan order_limit_1m bernilai None = tidak dibatasi.
+    Request yang melewati limit dijawab 429 + Retry-After; setelah ban_after kali 429 dalam
+    satu menit IP di-ban ban_seconds detik (418), seperti Binance.
+    """
+
+    def __init__(self, latency=0.0, weight_limit=2400, listed_since_ms=1_546_300_800_000,
+                 order_latency=None, failure_rate=0.0, seed=0, cancel_failure_rate=0.0, price_source=None,
+                 market=None, filters=None, order_limit_10s=None, order_limit_1m=None, ban_after=None,
+                 ban_seconds=120.0):
+        self.latency = latency
+        self.order_latency = latency if order_latency is None else order_latency
+        self.failure_rate = failure_rate
+        self.cancel_failure_rate = cancel_failure_rate
+        self.price_source = price_source
+        self.market = market
+        self.filters = filters or {}
+        self.weight_limit = weight_limit
+        self.order_limit_10s = order_limit_10s
+        self.order_limit_1m = order_limit_1m
+        self.ban_after = ban_after
+        self.ban_seconds = ban_seconds
+        self.listed_since_ms = listed_since_ms
+        self.lock = threading.Lock()
+        self.seed = seed
+        self._attempts = collections.Counter()  # (aksi, simbol, tipe) -> jumlah percobaan
+        self.failures = 0
+        self.filter_rejects = 0
+        self.requests = 0
+        self.rejected = 0
+        self.banned = 0
+        self.max_used_weight = 0
+        self.connections = 0
+        self.orders = {}         # orderId/algoId -> order
+        self.client_ids = {}     # clientOrderId/clientAlgoId -> order
+        self.positions = {}      # symbol -> positionAmt (dari fill MARKET)
+        self._ids = itertools.count(1)
+        self._weight_minute = None
+        self._used_weight = 0
+        self._throttled = 0
+        self._order_windows = {10: [None, 0], 60: [None, 0]}  # detik window -> [window, jumlah order]
+        self.banned_until = 0.0
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.rejected = 0
+            self.banned = 0
+            self.max_used_weight = 0
+            self.connections = 0
+            self.failures = 0
+            self.filter_rejects = 0
+
+    def reset_orders(self):
+        with self.lock:
+            self.orders.clear()
+            self.client_ids.clear()
+            self.positions.clear()
+
+    def admit(self, weight, orders=0):
+        """Akuntansi limit satu request. Mengembalikan (status HTTP, kode error, header limit).
+
+        Seperti Binance, window dihitung per menit/10 detik jam dinding dan weight request yang
+        ditolak tetap dihitung.
+        """
+        with self.lock:
+            self.requests += 1
+            now = time.time()
+            if now < self.banned_until:
+                self.rejected += 1
+                return 418, -1003, {"Retry-After": str(math.ceil(self.banned_until - now))}
+            minute = int(now // 60)
+            if minute != self._weight_minute:
+                self._weight_minute = minute
+                self._used_weight = 0
+                self._throttled = 0
+            self._used_weight += weight
+            self.max_used_weight = max(self.max_used_weight, self._used_weight)
+            headers = {"X-MBX-USED-WEIGHT-1M": str(self._used_weight)}
+            retry_after = None
+            if self.weight_limit is not None and self._used_weight > self.weight_limit:
+                retry_after, code = 60 - now % 60, -1003
+            if orders:
+                for seconds, limit in ((10, self.order_limit_10s), (60, self.order_limit_1m)):
+                    window = self._order_windows[seconds]
+                    if window[0] != int(now // seconds):
+                        window[:] = [int(now // seconds), 0]
+                    window[1] += orders
+                    headers[f"X-MBX-ORDER-COUNT-{'10S' if seconds == 10 else '1M'}"] = str(window[1])
+                    if limit is not None and window[1] > limit and retry_after is None:
+                        retry_after, code = seconds - now % seconds, -1015
+            if retry_after is None:
+                return 200, None, headers
+            self.rejected += 1
+            self._throttled += 1
+            if self.ban_after is not None and self._throttled > self.ban_after:
+                self.banned_until = now + self.ban_seconds
+                self.banned += 1
+                return 418, -1003, {"Retry-After": str(math.ceil(self.ban_seconds))}
+            headers["Retry-After"] = str(math.ceil(retry_after))
+            return 429, code, headers
+
+    def _price(self, symbol, t):
+        phase = (sum(symbol.encode()) % 97) / 97.0 * 2 * np.pi
+        base = 1.0 + (sum(symbol.encode()) % 500)
+        t = np.asarray(t, dtype=float)
+        return base * (1 + 0.03 * np.sin(t / 13_300_000 + phase) + 0.01 * np.sin(t / 2_830_000 + 2 * phase))
+
+    def mark_price(self, symbol):
+        if self.price_source is not None:
+            price = self.price_source(symbol)
+            if price:
+                return float(price)
+        return float(self._price(symbol, time.time() * 1000))
+
+    def _draw(self, action, symbol, order_type):
+        """Generator acak untuk percobaan berikutnya dari (aksi, simbol, tipe); dipanggil dengan lock."""
+        key = (action, symbol, order_type)
+        attempt = self._attempts[key]
+        self._attempts[key] += 1
+        return random.Random(f"{self.seed}:{action}:{symbol}:{order_type}:{attempt}")
+
+    def klines(self, symbol, interval, start_ms=None, end_ms=None, limit=500):
+        if self.market is not None:
+            return self.market.klines(symbol, start_ms, end_ms, limit)
+        step = bot.INTERVAL_MS[interval]
+        now_ms = int(time.time() * 1000)
+        last_open = (now_ms // step) * step
+        end = last_open if end_ms is None else min(end_ms, last_open)
+        if start_ms is None:
+            first = end - (limit - 1) * step
+        else:
+            first = -(-start_ms // step) * step
+        first = max(first, -(-self.listed_since_ms // step) * step)
+        if first > end:
+            return []
+        open_time = np.arange(first, min(end, first + (limit - 1) * step) + 1, step, dtype=np.int64)
+        phase = (sum(symbol.encode()) % 97) / 97.0 * 2 * np.pi
+        base = 1.0 + (sum(symbol.encode()) % 500)
+        open_ = self._price(symbol, open_time)
+        close = self._price(symbol, open_time + step)
+        wick = base * 0.002 * (1 + np.sin(open_time.astype(float) / 1_000_000 + phase) ** 2)
+        high = np.maximum(open_, close) + wick
+        low = np.minimum(open_, close) - wick
+        return [
+            [int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", "100.0", int(t) + step - 1,
+             "0", 10, "0", "0", "0"]
+            for t, o, h, l, c in zip(open_time.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist())
+        ]
+
+    def exchange_info(self):
+        symbols = []
+        for symbol, f in self.filters.items():
+            symbols.append({"symbol": symbol, "status": "TRADING", "filters": [
+                {"filterType": "PRICE_FILTER", "tickSize": f["tickSize"], "minPrice": f["tickSize"],
+                 "maxPrice": "1000000"},
+                {"filterType": "LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["minQty"], "maxQty": f["maxQty"]},
+                {"filterType": "MARKET_LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["minQty"],
+                 "maxQty": f["maxQty"]},
+                {"filterType": "MIN_NOTIONAL", "notional": f["notional"]},
+            ]})
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": symbols}
+
+    def check_filters(self, params, algo):
+        """(kode, pesan) error Binance jika order melanggar filter simbol, None jika lolos."""
+        f = self.filters.get(params["symbol"])
+        if f is None:
+            return None
+        price = params.get("triggerPrice" if algo else "stopPrice")
+        if price is not None and _off_step(float(price), float(f["tickSize"])):
+            return -4014, "Price not increased by tick size."
+        if "quantity" in params:
+            quantity = float(params["quantity"])
+            if quantity <= 0:
+                return -4003, "Quantity less than or equal to zero."
+            if _off_step(quantity, float(f["stepSize"])):
+                return -1111, "Precision is over the maximum defined for this asset."
+            if quantity < float(f["minQty"]) or quantity > float(f["maxQty"]):
+                return -1013, "Filter failure: MARKET_LOT_SIZE"
+            reduce_only = str(params.get("reduceOnly")).lower() == "true"
+            if not reduce_only and quantity * self.mark_price(params["symbol"]) < float(f["notional"]):
+                return -4164, f"Order's notional must be no smaller than {f['notional']} (unless you choose reduce only)."
+        return None
+
+    def create_order(self, params, algo=False):
+        """Catat order baru. Mengembalikan (status HTTP, payload)."""
+        id_field = "clientAlgoId" if algo else "newClientOrderId"
+        client_id = params.get(id_field) or f"fake-{time.time_ns()}"
+        with self.lock:
+            if client_id in self.client_ids:
+                return 400, {"code": -4116, "msg": "ClientOrderId is duplicated."}
+            rejected = self.check_filters(params, algo)
+            if rejected is not None:
+                self.filter_rejects += 1
+                return 400, {"code": rejected[0], "msg": rejected[1]}
+            rng = self._draw("create", params["symbol"], params["type"])
+            failed = rng.random() < self.failure_rate
+            self.failures += failed
+            if failed and rng.random() < 0.5:
+                return 503, {"code": -1001, "msg": "Internal error; unable to process your request. Please try again."}
+            order_id = next(self._ids)
+            if algo:
+                order = {"algoId": order_id, "clientAlgoId": client_id, "algoType": "CONDITIONAL",
+                         "orderType": params["type"], "symbol": params["symbol"], "side": params["side"],
+                         "triggerPrice": params.get("triggerPrice"), "algoStatus": "NEW",
+                         "closePosition": str(params.get("closePosition")).lower() == "true"}
+            else:
+                quantity = params.get("quantity", "0")
+                order = {"orderId": order_id, "clientOrderId": client_id, "symbol": params["symbol"],
+                         "side": params["side"], "type": params["type"], "status": "FILLED",
+                         "origQty": quantity, "executedQty": quantity,
+                         "avgPrice": f"{self.mark_price(params['symbol']):.8f}",
+                         "reduceOnly": str(params.get("reduceOnly")).lower() == "true"}
+                signed = float(quantity) * (1 if params["side"] == "BUY" else -1)
+                self.positions[params["symbol"]] = self.positions.get(params["symbol"], 0.0) + signed
+            self.orders[order_id] = order
+            self.client_ids[client_id] = order
+        if failed:
+            return 503, {"code": -1007, "msg": "Timeout waiting for response from backend server. "
+                                               "Send status unknown; execution status unknown."}
+        return 200, order
+
+    def get_order(self, params):
+        with self.lock:
+            order = None
+            for id_field in ("orderId", "algoId"):
+                if id_field in params:
+                    order = self.orders.get(int(params[id_field]))
+            for id_field in ("origClientOrderId", "clientAlgoId"):
+                if id_field in params:
+                    order = self.client_ids.get(params[id_field])
+            if order is None or order["symbol"] != params.get("symbol"):
+                return None
+            return dict(order)
+
+    def position_risk(self, params):
+        with self.lock:
+            return [{"symbol": symbol, "positionAmt": f"{amount:.8f}", "markPrice": f"{self.mark_price(symbol):.8f}"}
+                    for symbol, amount in self.positions.items()
+                    if abs(amount) > 1e-12 and params.get("symbol", symbol) == symbol]
+
+    def open_orders(self, params, algo=False):
+        with self.lock:
+            status_field = "algoStatus" if algo else "status"
+            return [dict(order) for order in self.orders.values()
+                    if (("algoId" in order) == algo) and order[status_field] == "NEW"
+                    and params.get("symbol", order["symbol"]) == order["symbol"]]
+
+    def cancel_order(self, params):
+        order = self.get_order(params)
+        if order is None:
+            return 400, {"code": -2011, "msg": "Unknown order sent."}
+        with self.lock:
+            order_type = order.get("orderType", order.get("type"))
+            if self._draw("cancel", order["symbol"], order_type).random() < self.cancel_failure_rate:
+                self.failures += 1
+                return 503, {"code": -1001, "msg": "Internal error; unable to process your request. Please try again."}
+            stored = self.orders[order.get("orderId", order.get("algoId"))]
+            stored["algoStatus" if "algoId" in stored else "status"] = "CANCELED"
+            return 200, dict(stored)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    exchange = None  # Diisi oleh FakeExchangeServer
+    protocol_version = "HTTP/1.1"  # Keep-alive seperti Binance; setiap response punya Content-Length
+    disable_nagle_algorithm = True  # Header dan body ditulis terpisah; tanpa ini keep-alive kena delayed ACK
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.exchange.lock:
+            self.exchange.connections += 1  # Satu handler per koneksi TCP
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in self._limit_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _admit(self, method, path, params):
+        """Latency buatan + limit request; False (dan 429/418 sudah dikirim) jika request ditolak."""
+        is_order = path in ("/fapi/v1/order", "/fapi/v1/algoOrder")
+        latency = self.exchange.order_latency if is_order or method != "GET" else self.exchange.latency
+        if latency:
+            time.sleep(latency)
+        status, code, self._limit_headers = self.exchange.admit(*bot.api_request_cost(method, path, params))  # Tabel weight yang sama dengan budget bot
+        if status == 200:
+            return True
+        msg = {418: "Way too many requests; IP banned.",
+               429: "Too many new orders." if code == -1015 else "Too many requests."}[status]
+        self._reply(status, {"code": code, "msg": msg})
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if not self._admit("GET", url.path, params):
+            return
+        if url.path == "/fapi/v1/klines":
+            return self._reply(200, self.exchange.klines(
+                params["symbol"], params["interval"],
+                int(params["startTime"]) if "startTime" in params else None,
+                int(params["endTime"]) if "endTime" in params else None,
+                int(params.get("limit", 500)),
+            ))
+        if url.path == "/fapi/v1/historicalTrades":
+            if self.exchange.market is None:
+                return self._reply(200, [])
+            return self._reply(200, self.exchange.market.historical_trades(
+                params["symbol"], int(params.get("fromId", 1)), int(params.get("limit", 500))))
+        if url.path == "/fapi/v1/exchangeInfo":
+            return self._reply(200, self.exchange.exchange_info())
+        if url.path == "/fapi/v3/positionRisk":
+            return self._reply(200, self.exchange.position_risk(params))
+        if url.path in ("/fapi/v1/openOrders", "/fapi/v1/openAlgoOrders"):
+            return self._reply(200, self.exchange.open_orders(params, algo=url.path.endswith("AlgoOrders")))
+        if url.path == "/fapi/v1/premiumIndex":
+            return self._reply(200, {"symbol": params["symbol"],
+                                     "markPrice": f"{self.exchange.mark_price(params['symbol']):.8f}"})
+        if url.path in ("/fapi/v1/order", "/fapi/v1/algoOrder"):
+            order = self.exchange.get_order(params)
+            if order is None:
+                return self._reply(400, {"code": -2013, "msg": "Order does not exist."})
+            return self._reply(200, order)
+        self._reply(404, {"code": -1, "msg": f"unknown path {url.path}"})
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        params = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+        params.update({k: v[-1] for k, v in parse_qs(body).items()})
+        return params
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        params = self._form()
+        if not self._admit("POST", path, params):
+            return
+        if path in ("/fapi/v1/order", "/fapi/v1/algoOrder"):
+            return self._reply(*self.exchange.create_order(params, algo=path.endswith("algoOrder")))
+        self._reply(404, {"code": -1, "msg": f"unknown path {path}"})
+
+    def do_DELETE(self):
+        path = urlparse(self.path).path
+        params = self._form()
+        if not self._admit("DELETE", path, params):
+            return
+        if path in ("/fapi/v1/order", "/fapi/v1/algoOrder"):
+            return self._reply(*self.exchange.cancel_order(params))
+        self._reply(404, {"code": -1, "msg": f"unknown path {path}"})
+
+
+class FakeExchangeServer:
+    """Jalankan FakeExchange di thread background pada port acak di 127.0.0.1."""
+
+    def __init__(self, exchange=None):
+        self.exchange = exchange or FakeExchange()
+        handler = type("Handler", (_Handler,), {"exchange": self.exchange})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def client(self):
+        """binance Client asli yang diarahkan ke server ini."""
+        client = Client("fake-key", "fake-secret", testnet=True, ping=False)
+        client.FUTURES_TESTNET_URL = self.url + "/fapi"
+        return client
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,190 @@
+"""Server WebSocket combined stream Binance palsu di localhost untuk menguji ingestion offline.
+
+FakeMarket membuat tick @trade (trade id berurutan per simbol) dan kline close sintetis dan
+menyimpan semuanya sebagai tape, sehingga FakeExchange(market=...) bisa melayani
+historicalTrades/klines yang konsisten dengan stream untuk backfill gap. FakeStreamServer
+menyiarkan pesan ke klien sesuai path /stream?streams=... dan memutus koneksi secara berkala:
+close frame, socket diputus tanpa close frame, atau koneksi dibiarkan diam (stall).
+"""
+import itertools
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from websockets.sync.server import serve
+
+
+class FakeMarket:
+    """Random walk per simbol; setiap round menghasilkan satu tick per simbol dan kline close
+    tiap `ticks_per_candle` round. Waktu candle dipercepat: satu candle 15m per `ticks_per_candle` round.
+    """
+
+    def __init__(self, symbols, ticks_per_candle=20, seed=0, start_ms=1_700_000_000_000,
+                 interval_ms=15 * 60 * 1000, volatility=0.0015):
+        self.symbols = list(symbols)
+        self.ticks_per_candle = ticks_per_candle
+        self.interval_ms = interval_ms
+        self.volatility = volatility
+        self.lock = threading.Lock()
+        self.rngs = [np.random.default_rng([seed, zlib.crc32(symbol.encode())]) for symbol in self.symbols]
+        self.prices = [100.0] * len(self.symbols)
+        self.rounds = 0
+        self.candle_open = start_ms
+        self.bars = [[price, price, price] for price in self.prices]  # open, high, low candle berjalan
+        self.trades = {symbol: [] for symbol in self.symbols}   # symbol -> [(id, harga, waktu ms)]
+        self.candles = {symbol: [] for symbol in self.symbols}  # symbol -> baris format futures_klines
+
+    def step(self):
+        """Satu round; mengembalikan [(stream, pesan JSON)]."""
+        with self.lock:
+            messages = []
+            ts = self.candle_open + (self.rounds % self.ticks_per_candle + 1) * self.interval_ms // (
+                self.ticks_per_candle + 1)
+            for k, symbol in enumerate(self.symbols):
+                price = self.prices[k] * float(np.exp(self.rngs[k].normal(0, self.volatility)))
+                self.prices[k] = price
+                bar = self.bars[k]
+                bar[1], bar[2] = max(bar[1], price), min(bar[2], price)
+                tape = self.trades[symbol]
+                trade_id = len(tape) + 1
+                tape.append((trade_id, price, ts))
+                messages.append((f"{symbol.lower()}@trade",
+                                 f'{{"stream":"{symbol.lower()}@trade","data":{{"e":"trade","E":{ts},"T":{ts},'
+                                 f'"s":"{symbol}","t":{trade_id},"p":"{price:.6f}","q":"1.000","X":"MARKET",'
+                                 f'"m":false}}}}'))
+            self.rounds += 1
+            if self.rounds % self.ticks_per_candle == 0:
+                t0, close_time = self.candle_open, self.candle_open + self.interval_ms - 1
+                for k, symbol in enumerate(self.symbols):
+                    o, h, l = self.bars[k]
+                    c = self.prices[k]
+                    self.candles[symbol].append([t0, f"{o:.6f}", f"{h:.6f}", f"{l:.6f}", f"{c:.6f}", "100.0",
+                                                 close_time, "0", self.ticks_per_candle, "0", "0", "0"])
+                    stream = f"{symbol.lower()}@kline_15m"
+                    messages.append((stream,
+                                     f'{{"stream":"{stream}","data":{{"e":"kline","E":{close_time + 1},"s":"{symbol}",'
+                                     f'"k":{{"t":{t0},"T":{close_time},"s":"{symbol}","i":"15m","o":"{o:.6f}",'
+                                     f'"c":"{c:.6f}","h":"{h:.6f}","l":"{l:.6f}","v":"100.0",'
+                                     f'"n":{self.ticks_per_candle},"x":true}}}}}}'))
+                    self.bars[k] = [c, c, c]
+                self.candle_open += self.interval_ms
+            return messages
+
+    def historical_trades(self, symbol, from_id, limit=500):
+        with self.lock:
+            tape = self.trades.get(symbol, [])
+            return [{"id": trade_id, "price": f"{price:.6f}", "qty": "1.000", "quoteQty": f"{price:.6f}",
+                     "time": ts, "isBuyerMaker": False}
+                    for trade_id, price, ts in tape[max(from_id - 1, 0):max(from_id - 1, 0) + limit]]
+
+    def klines(self, symbol, start_ms=None, end_ms=None, limit=500):
+        with self.lock:
+            rows = [row for row in self.candles.get(symbol, [])
+                    if (start_ms is None or row[0] >= start_ms) and (end_ms is None or row[0] <= end_ms)]
+        return rows[-limit:] if start_ms is None else rows[:limit]
+
+
+class FakeStreamServer:
+    """Jalankan server WebSocket di thread background pada port acak di 127.0.0.1.
+
+    Publisher menghasilkan `rate` round per detik dari FakeMarket (tetap berjalan walau tidak
+    ada klien, jadi pesan selama koneksi putus hilang seperti di Binance). Tiap `drop_every`
+    detik (None = berhenti memutus) semua koneksi diputus dengan mode bergiliran dari `drop_modes`:
+    "close" (close frame 1001), "abort" (socket ditutup tanpa close frame), "stall" (koneksi
+    tetap terbuka tetapi tidak dikirimi pesan lagi).
+    """
+
+    def __init__(self, market, rate=200, drop_every=None, drop_modes=("close", "abort", "stall")):
+        self.market = market
+        self.rate = rate
+        self.drop_every = drop_every
+        self.drop_modes = drop_modes
+        self.lock = threading.Lock()
+        self.clients = {}   # connection -> set stream
+        self.stalled = set()
+        self.connections = 0
+        self.drops = {mode: 0 for mode in drop_modes}
+        self.sent = 0
+        self.running = threading.Event()
+        self.server = serve(self._handle, "127.0.0.1", 0, compression=None, ping_interval=None)
+        self.threads = [threading.Thread(target=self.server.serve_forever, daemon=True),
+                        threading.Thread(target=self._publish, daemon=True)]
+
+    @property
+    def url(self):
+        host, port = self.server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def _handle(self, connection):
+        query = parse_qs(urlparse(connection.request.path).query)
+        streams = set(query.get("streams", [""])[0].split("/"))
+        with self.lock:
+            self.clients[connection] = streams
+            self.connections += 1
+        try:
+            for _ in connection:  # Ping dari klien dijawab otomatis; pesan lain diabaikan
+                pass
+        except Exception:
+            pass
+        finally:
+            with self.lock:
+                self.clients.pop(connection, None)
+                self.stalled.discard(connection)
+
+    def drop(self, mode):
+        with self.lock:
+            targets = [c for c in self.clients if c not in self.stalled]
+            # Koneksi yang diputus tidak dikirimi lagi (send ke koneksi yang sedang close akan menunggu)
+            self.stalled.update(targets)
+        for connection in targets:
+            if mode == "close":  # close() menunggu closing handshake; jangan tahan publisher
+                threading.Thread(target=connection.close, args=(1001, "going away"), daemon=True).start()
+            elif mode == "abort":
+                connection.close_socket()
+        self.drops[mode] += 1
+
+    def _publish(self):
+        interval = 1.0 / self.rate
+        next_round = time.perf_counter()
+        next_drop = time.monotonic() + self.drop_every if self.drop_every else None
+        modes = itertools.cycle(self.drop_modes)
+        while self.running.is_set():
+            messages = self.market.step()
+            with self.lock:
+                targets = [(c, streams) for c, streams in self.clients.items() if c not in self.stalled]
+            for connection, streams in targets:
+                for stream, message in messages:
+                    if stream in streams:
+                        try:
+                            connection.send(message)
+                            self.sent += 1
+                        except Exception:
+                            break
+            if self.drop_every and next_drop is not None and time.monotonic() >= next_drop:
+                self.drop(next(modes))
+                next_drop += self.drop_every
+            next_round += interval
+            delay = next_round - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def stop_publishing(self):
+        self.running.clear()
+        self.threads[1].join()
+
+    def __enter__(self):
+        self.running.set()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.running.is_set():
+            self.stop_publishing()
+        with self.lock:
+            connections = list(self.clients)
+        for connection in connections:
+            connection.close_socket()
+        self.server.shutdown()
@@ -1,28 +1,248 @@
+import os
+import sys
+import contextlib
+import argparse
+import collections
+import copy
+import heapq
+import itertools
+import random
+import uuid
+import tempfile
 import time
 import datetime
 import threading
+import queue
+import bisect
+import signal
+import sqlite3
 import json
+try:
+    import orjson  # Opsional: decode JSON stream ~3x lebih cepat dari json
+except ImportError:
+    orjson = None
 import pandas as pd
 import numpy as np
 import requests
+import urllib.parse
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 from binance.client import Client
+from binance.exceptions import BinanceAPIException
 import websocket
 import pytz
 import math
-from prometheus_client import start_http_server, Gauge, Counter
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from prometheus_client import start_http_server, Gauge, Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
 
 # ====================================================
 # Konfigurasi Prometheus Metrics
 # ====================================================
 active_orders_gauge = Gauge('active_orders', 'Number of active orders')
-order_latency_gauge = Gauge('order_latency_seconds', 'Latency for order execution in seconds')
+# Latency per leg: entry, stop_loss, take_profit, stop_update (SL ke BEP), dan bracket (entry sampai SL/TP terpasang)
+order_latency_histogram = Histogram('order_latency_seconds', 'Latency for order execution in seconds', ['leg'],
+                                    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
 order_retry_counter = Counter('order_retry_total', 'Total number of order retries')
+order_rejected_counter = Counter('order_rejected_total', 'Orders rejected by symbol filters', ['where'])
 current_pnl_gauge = Gauge('current_pnl', 'Current profit and loss')
 current_drawdown_gauge = Gauge('current_drawdown', 'Current drawdown')
+discord_queue_gauge = Gauge('discord_queue_depth', 'Discord messages waiting to be sent')
+discord_dropped_counter = Counter('discord_dropped_total', 'Discord messages dropped', ['reason'])
+queue_depth_gauge = Gauge('queue_depth', 'Items waiting in internal queues', ['queue'])
+ws_connected_gauge = Gauge('ws_connected', 'WebSocket connection open (1) or not (0)', ['conn'])
+ws_reconnects_counter = Counter('ws_reconnects_total', 'WebSocket reconnects', ['conn'])
+stream_gaps_counter = Counter('stream_gaps_total', 'Gaps detected in stream data', ['kind'])
+stream_backfilled_counter = Counter('stream_backfilled_total', 'Missed stream items fetched over REST', ['kind'])
+api_budget_wait = Histogram('api_budget_wait_seconds', 'Time a REST request waited for API budget', ['priority'],
+                            buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60))
+api_throttled_counter = Counter('api_throttled_total', 'Responses 429/418 from the exchange', ['status'])
+exposure_gauge = Gauge('portfolio_exposure', 'Notional of open and pending positions', ['kind'])
+position_pnl_gauge = Gauge('position_pnl', 'Floating PnL per symbol including fees', ['symbol'])
+risk_rejected_counter = Counter('risk_rejected_total', 'Entries blocked or reduced by portfolio caps', ['reason'])
+ticks_conflated_counter = Counter('ticks_conflated_total', 'Trade ticks merged into a newer tick before processing')
 
-# Mulai HTTP server untuk metrics (misal port 8000)
-start_http_server(8000)
+# ====================================================
+# Instrumentasi hot path: latency per tahap/simbol, lock wait, event per pair
+# ====================================================
+# Observasi hot path tidak memakai Histogram prometheus_client (labels() + lock per
+# observe ~2-5 us); nilainya dikumpulkan di list Python dan dibaca HotPathCollector
+# saat Prometheus scrape.
+hot_path_metrics = True  # False = observasi hot path dilewati
+LATENCY_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LocalHistogram:
+    """Histogram berlabel yang murah di hot path: observe() = bisect + dua penjumlahan list.
+
+    Tanpa lock: jika beberapa thread menulis seri yang sama secara bersamaan, satu
+    increment sesekali bisa hilang (diterima untuk metrics, tidak untuk akuntansi).
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}  # tuple label -> [count per bucket..., count +Inf, sum]
+
+    def observe(self, labels, seconds):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def family(self):
+        family = HistogramMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        for labels, series in list(self.series.items()):
+            counts = list(itertools.accumulate(series[:-1]))
+            buckets = [(floatToGoString(le), count) for le, count in zip(self.buckets, counts)]
+            buckets.append(("+Inf", counts[-1]))
+            family.add_metric(list(labels), buckets, series[-1])
+        return family
+
+# Tahap: decode (json.loads + parsing pesan stream), trade/kline (handler setelah decode),
+# candle_queue (antre sebelum diproses), decision (candle diterima -> sinyal diputuskan),
+# signal_to_fill (sinyal -> entry di-ack exchange), signal_to_protected (sinyal -> SL/TP terpasang)
+stage_latency = LocalHistogram('stage_latency_seconds', 'Hot path latency per stage and symbol', ('stage', 'symbol'))
+lock_wait = LocalHistogram('lock_wait_seconds', 'Time spent waiting to acquire a lock', ('lock',))
+STREAM_EVENT_STAGES = ("trade", "kline")
+
+class HotPathCollector:
+    """Collector prometheus_client untuk LocalHistogram (dibaca saat scrape).
+
+    stream_events_total{symbol,type} diturunkan dari jumlah observasi tahap trade/kline,
+    jadi hot path tidak perlu counter terpisah.
+    """
+
+    def collect(self):
+        yield stage_latency.family()
+        yield lock_wait.family()
+        family = CounterMetricFamily('stream_events', 'Stream messages per pair and type', labels=['symbol', 'type'])
+        for (stage, symbol), series in list(stage_latency.series.items()):
+            if stage in STREAM_EVENT_STAGES:
+                family.add_metric([symbol, stage], sum(series[:-1]))
+        yield family
+
+REGISTRY.register(HotPathCollector())
+
+class TimedLock:
+    """threading.Lock yang mencatat waktu tunggu acquire ke lock_wait_seconds{lock=name}."""
+
+    def __init__(self, name):
+        self._lock = threading.Lock()
+        self._labels = (name,)
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not hot_path_metrics:
+            return self._lock.acquire(blocking, timeout)
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        lock_wait.observe(self._labels, time.perf_counter() - started)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+# ====================================================
+# Sampling profiler (dinyalakan/dimatikan saat runtime dengan SIGUSR2)
+# ====================================================
+profile_interval = 0.005  # Detik antar sampel stack
+profile_dir = os.path.join("data", "profiles")
+
+class SamplingProfiler:
+    """Ambil stack semua thread tiap `interval` detik (sys._current_frames) dan hitung per stack.
+
+    stop() menulis hasil dalam format folded stack ("thread;fungsi;... jumlah"), yang bisa
+    dibaca flamegraph.pl atau speedscope. Tidak ada overhead selama profiler mati.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or profile_interval
+        self.samples = collections.Counter()
+        self.running = threading.Event()
+        self.thread = None
+
+    @property
+    def active(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.samples.clear()
+        self.running.set()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+        self.thread.start()
+
+    def stop(self, path=None):
+        """Hentikan sampling dan tulis folded stack; mengembalikan path file (None jika tidak aktif)."""
+        if self.thread is None:
+            return None
+        self.running.clear()
+        self.thread.join()
+        self.thread = None
+        path = path or os.path.join(profile_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def toggle(self):
+        return self.stop() if self.active else self.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while self.running.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+profiler = SamplingProfiler()
+
+def install_profiler_toggle():
+    """SIGUSR2 menyalakan/mematikan profiler (kill -USR2 <pid>); hanya dari main thread, Unix."""
+    if not hasattr(signal, "SIGUSR2"):
+        return
+
+    def handle(signum, frame):
+        was_active = profiler.active
+        path = profiler.toggle()
+        print(f"Profiler ditulis ke {path}" if was_active else "Profiler aktif")
+
+    signal.signal(signal.SIGUSR2, handle)
+
+# Kedalaman antrean dibaca saat scrape (set_function), tanpa biaya di hot path
+queue_depth_gauge.labels('candle').set_function(lambda: candle_queue.qsize())
+queue_depth_gauge.labels('order').set_function(lambda: order_executor.queue_depth())
+queue_depth_gauge.labels('discord').set_function(lambda: discord_notifier.queue.qsize())
+queue_depth_gauge.labels('journal').set_function(lambda: journal.queue.qsize() if journal is not None else 0)
+Gauge('profiler_active', 'Sampling profiler running (1) or not (0)').set_function(lambda: profiler.active)
+
+# HTTP server untuk metrics (port 8000) dijalankan di main(), supaya modul ini
+# bisa di-import (benchmark/backtest) tanpa membuka port.
+metrics_port = 8000
 
 # ====================================================
 # Set timezone Jakarta (GMT+7)
@@ -34,55 +254,634 @@ jakarta_tz = pytz.timezone("Asia/Jakarta")
 # ====================================================
 api_key = "YOUR KEY"
 api_secret = "YOUR SECRET"
-client = Client(api_key, api_secret, testnet=True)
+client = None  # Diinisialisasi di main() karena Client() langsung melakukan ping ke exchange
+
+_thread_clients = threading.local()
+
+def thread_client():
+    """Salinan `client` untuk thread saat ini.
+
+    Client menyimpan response terakhir di atribut instance (self.response) sebelum
+    memprosesnya, jadi satu instance yang dipakai beberapa thread sekaligus bisa
+    tertukar response. Salinan dangkal tetap berbagi session HTTP (keep-alive).
+    """
+    local = _thread_clients
+    if getattr(local, "base", None) is not client:
+        local.base = client
+        local.client = copy.copy(client)
+    return local.client
 
 discord_webhook_url = "your webhook"
 
 # ====================================================
-# Fungsi untuk mengirim pesan ke Discord
+# Fungsi untuk mengirim pesan ke Discord (background, batched)
 # ====================================================
+DISCORD_MESSAGE_LIMIT = 2000  # Batas panjang content webhook Discord
+discord_queue_size = 1000
+discord_max_retries = 5
+discord_timeout = 10.0
+
+def split_message(content, limit=DISCORD_MESSAGE_LIMIT):
+    """Potong pesan panjang menjadi bagian <= limit karakter, sebisa mungkin di batas baris."""
+    chunks = []
+    while len(content) > limit:
+        cut = content.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        chunks.append(content[:cut])
+        content = content[cut:].lstrip("\n")
+    if content:
+        chunks.append(content)
+    return chunks
+
+class DiscordNotifier:
+    """Pengirim pesan Discord di thread background.
+
+    send() hanya memasukkan pesan ke antrean (bounded; pesan dibuang jika penuh), jadi
+    pemanggil tidak pernah menunggu HTTP. Pesan yang menumpuk digabung menjadi satu
+    request selama masih <= DISCORD_MESSAGE_LIMIT karakter. Respons 429 ditunggu sesuai
+    retry_after, dan header X-RateLimit-* dihormati sebelum limit tercapai.
+    """
+
+    def __init__(self, maxsize=1000, max_retries=5, timeout=10.0):
+        self.queue = queue.Queue(maxsize)
+        self.session = requests.Session()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.pending = 0
+        self.thread = None
+
+    def send(self, content, webhook_url):
+        """Antrekan pesan; False jika antrean penuh (pesan dibuang)."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True, name="discord")
+                self.thread.start()
+            self.pending += 1
+        try:
+            self.queue.put_nowait((webhook_url, content))
+            return True
+        except queue.Full:
+            discord_dropped_counter.labels(reason="queue_full").inc()
+            self._done(1)
+            return False
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua pesan di antrean terkirim/dibuang; False jika timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+    def _done(self, count):
+        with self.lock:
+            self.pending -= count
+            if not self.pending:
+                self.idle.notify_all()
+
+    def _run(self):
+        carry = None
+        while True:
+            webhook_url, content = carry if carry is not None else self.queue.get()
+            carry = None
+            parts = [content]
+            size = len(content)
+            # Gabungkan pesan lain yang sudah mengantre untuk webhook yang sama
+            while size < DISCORD_MESSAGE_LIMIT:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] != webhook_url or size + 2 + len(item[1]) > DISCORD_MESSAGE_LIMIT:
+                    carry = item
+                    break
+                parts.append(item[1])
+                size += 2 + len(item[1])
+            try:
+                if not self._deliver(webhook_url, "\n\n".join(parts)):
+                    discord_dropped_counter.labels(reason="failed").inc(len(parts))
+            except Exception as e:
+                print("Error sending Discord message:", e)
+                discord_dropped_counter.labels(reason="failed").inc(len(parts))
+            self._done(len(parts))
+
+    def _deliver(self, webhook_url, content):
+        ok = True
+        for chunk in split_message(content):
+            attempt = 0
+            while True:
+                try:
+                    response = self.session.post(webhook_url, json={"content": chunk}, timeout=self.timeout)
+                except requests.RequestException as e:
+                    error = e
+                else:
+                    if response.status_code in (200, 204):
+                        self._respect_bucket(response)
+                        break
+                    if response.status_code == 429:
+                        # 429 tidak dihitung sebagai percobaan gagal: Discord menentukan kapan boleh kirim lagi
+                        time.sleep(self._retry_after(response))
+                        continue
+                    error = response.text
+                    if response.status_code < 500:
+                        attempt = self.max_retries  # 4xx selain 429 tidak akan berhasil jika diulang
+                attempt += 1
+                if attempt >= self.max_retries:
+                    print("Failed to send Discord message:", error)
+                    ok = False
+                    break
+                time.sleep(min(30.0, 0.5 * 2 ** attempt))
+        return ok
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json()["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return float(response.headers.get("Retry-After", 1.0))
+
+    @staticmethod
+    def _respect_bucket(response):
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            time.sleep(float(response.headers.get("X-RateLimit-Reset-After", 0.0)))
+
+discord_notifier = DiscordNotifier(discord_queue_size, discord_max_retries, discord_timeout)
+discord_queue_gauge.set_function(discord_notifier.queue.qsize)
+
 def send_discord_message(content, webhook_url=discord_webhook_url):
-    data = {"content": content}
-    try:
-        response = requests.post(webhook_url, json=data)
-        if response.status_code not in (200, 204):
-            print("Failed to send Discord message:", response.text)
-    except Exception as e:
-        print("Error sending Discord message:", e)
+    discord_notifier.send(content, webhook_url)
 
 # ====================================================
 # Fungsi untuk mengambil data historis dari Binance Futures (REST API)
 # ====================================================
-def get_historical_klines(symbol, interval, start_str, end_str=None, limit=1000):
-    start_ts = int(pd.Timestamp(start_str).timestamp() * 1000)
-    end_ts = int(pd.Timestamp(end_str).timestamp() * 1000) if end_str else None
-    klines = []
-    
-    while True:
-        temp_klines = client.futures_klines(
-            symbol=symbol,
-            interval=interval,
-            startTime=start_ts,
-            endTime=end_ts,
-            limit=limit
-        )
-        if not temp_klines:
-            break
-        klines.extend(temp_klines)
-        if len(temp_klines) < limit:
+# Durasi tiap interval kline (ms), untuk membagi rentang waktu menjadi halaman yang bisa diambil paralel
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 3 * 60_000, "5m": 5 * 60_000, "15m": 15 * 60_000, "30m": 30 * 60_000,
+    "1h": 3_600_000, "2h": 2 * 3_600_000, "4h": 4 * 3_600_000, "6h": 6 * 3_600_000,
+    "8h": 8 * 3_600_000, "12h": 12 * 3_600_000, "1d": 86_400_000, "3d": 3 * 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+KLINE_DTYPE = np.dtype([
+    ("open_time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8")
+])
+
+kline_cache_dir = os.path.join("cache", "klines")
+backfill_workers = 8
+# Binance Futures membatasi 2400 weight/menit per IP; backfill hanya memakai separuhnya
+# supaya order dan request lain tetap punya ruang.
+backfill_weight_per_minute = 1200
+
+class WeightLimiter:
+    """Token bucket untuk request weight Binance (thread-safe, blocking)."""
+
+    def __init__(self, weight_per_minute):
+        self.capacity = float(weight_per_minute)
+        self.rate = weight_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+def klines_request_weight(limit):
+    # Tabel weight GET /fapi/v1/klines
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+# ====================================================
+# Budget request weight & order rate bersama untuk semua request REST
+# ====================================================
+api_weight_per_minute = 2400   # Limit REQUEST_WEIGHT USDⓈ-M per IP
+api_orders_per_10s = 300       # Limit ORDERS per akun
+api_orders_per_minute = 1200
+api_budget_headroom = 0.9      # Budget lokal = 90% limit; sisanya untuk request di luar bot (mis. proses lain)
+API_PRIORITIES = ("protective", "order", "data")
+# Fraksi budget yang tidak boleh dipakai prioritas ini, supaya polling data tidak menghabiskan
+# weight/order yang dibutuhkan SL/TP dan entry.
+api_reserve = {"protective": 0.0, "order": 0.1, "data": 0.3}
+
+def api_request_cost(method, path, params):
+    """(weight IP, jumlah order) satu request REST futures, dari tabel weight Binance."""
+    if method == "POST" and path in ("/fapi/v1/order", "/fapi/v1/algoOrder", "/fapi/v1/batchOrders"):
+        return 0, 1  # Order baru dihitung di limit order, weight IP 0
+    if path == "/fapi/v1/klines":
+        return klines_request_weight(int(params.get("limit", 500))), 0
+    if path == "/fapi/v1/historicalTrades":
+        return 20, 0
+    if path in ("/fapi/v3/positionRisk", "/fapi/v2/positionRisk", "/fapi/v2/balance", "/fapi/v2/account"):
+        return 5, 0
+    if path in ("/fapi/v1/openOrders", "/fapi/v1/openAlgoOrders"):
+        return (1 if "symbol" in params else 40), 0
+    if path == "/fapi/v1/premiumIndex":
+        return (1 if "symbol" in params else 10), 0
+    return 1, 0
+
+class _LimitWindow:
+    """Satu limit Binance: token bucket (request tersebar, bukan burst di awal menit) plus
+    jumlah pemakaian di window jam dinding saat ini, yang dikoreksi dari header exchange."""
+
+    __slots__ = ("capacity", "period", "rate", "tokens", "updated", "window", "used")
+
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.window = None
+        self.used = 0.0
+
+    def available(self, now, wall):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        window = int(wall // self.period)
+        if window != self.window:
+            self.window, self.used = window, 0.0
+        return min(self.tokens, self.capacity - self.used)
+
+    def take(self, n):
+        self.tokens -= n
+        self.used += n
+
+    def sync(self, used, wall):
+        """Pemakaian menurut exchange (header X-MBX-*) untuk window yang sama."""
+        if int(wall // self.period) == self.window:
+            self.used = max(self.used, used)
+
+    def wait(self, needed, wall):
+        """Perkiraan detik sampai `needed` unit tersedia."""
+        if self.capacity - self.used < needed:
+            return self.period - wall % self.period
+        return max(0.0, needed - self.tokens) / self.rate
+
+    def utilization(self):
+        return self.used / self.capacity if self.window == int(time.time() // self.period) else 0.0
+
+class ApiBudget:
+    """Token bucket bersama untuk request weight per menit dan order per 10 detik / per menit.
+
+    acquire() memblokir thread pemanggil sampai budget cukup. Prioritas lebih rendah menyisakan
+    api_reserve dari setiap limit dan juga menunggu selama ada request prioritas lebih tinggi
+    yang sedang menunggu. Header X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-* dari exchange
+    mengoreksi hitungan lokal (termasuk pemakaian proses lain dengan IP/akun yang sama), dan
+    429/418 menahan semua request sampai Retry-After.
+    """
+
+    def __init__(self, weight_per_minute, orders_per_10s, orders_per_minute, reserve=None):
+        self.limits = {"weight": _LimitWindow(weight_per_minute, 60),
+                       "orders_10s": _LimitWindow(orders_per_10s, 10),
+                       "orders_1m": _LimitWindow(orders_per_minute, 60)}
+        self.reserve = dict(api_reserve if reserve is None else reserve)
+        self.cond = threading.Condition()
+        self.waiting = collections.Counter()  # prioritas -> jumlah thread yang menunggu
+        self.blocked_until = 0.0              # epoch; diisi dari Retry-After 429/418
+        self.server_weight = 0
+
+    def acquire(self, weight, orders=0, priority="data"):
+        """Ambil budget untuk satu request; mengembalikan lama menunggu (detik)."""
+        needs = [(limit, n) for limit, n in ((self.limits["weight"], weight), (self.limits["orders_10s"], orders),
+                                             (self.limits["orders_1m"], orders)) if n]
+        higher = API_PRIORITIES[:API_PRIORITIES.index(priority)]
+        reserve = self.reserve[priority]
+        started = time.monotonic()
+        with self.cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now, wall = time.monotonic(), time.time()
+                    if wall < self.blocked_until:
+                        delay = self.blocked_until - wall
+                    elif any(self.waiting[p] for p in higher):
+                        delay = 1.0  # Dibangunkan notify_all saat request prioritas lebih tinggi lewat
+                    else:
+                        short = [(limit, n + reserve * limit.capacity) for limit, n in needs
+                                 if limit.available(now, wall) < n + reserve * limit.capacity]
+                        if not short:
+                            break
+                        delay = max(limit.wait(needed, wall) for limit, needed in short)
+                    self.cond.wait(min(max(delay, 0.005), 1.0))
+                for limit, n in needs:
+                    limit.take(n)
+            finally:
+                self.waiting[priority] -= 1
+                self.cond.notify_all()
+        return time.monotonic() - started
+
+    def update(self, status, headers):
+        """Catat header limit dari response exchange."""
+        wall = time.time()
+        with self.cond:
+            for name, header in (("weight", "X-MBX-USED-WEIGHT-1M"), ("orders_10s", "X-MBX-ORDER-COUNT-10S"),
+                                 ("orders_1m", "X-MBX-ORDER-COUNT-1M")):
+                value = headers.get(header)
+                if value is not None:
+                    self.limits[name].sync(float(value), wall)
+                    if name == "weight":
+                        self.server_weight = int(value)
+            if status in (418, 429):
+                api_throttled_counter.labels(str(status)).inc()
+                retry_after = float(headers.get("Retry-After") or (120 if status == 418 else 60))
+                self.blocked_until = max(self.blocked_until, wall + retry_after)
+                self.cond.notify_all()
+
+_api_priority = threading.local()
+
+@contextlib.contextmanager
+def api_priority(level):
+    """Request REST di dalam blok ini memakai prioritas `level` (lihat API_PRIORITIES)."""
+    previous = getattr(_api_priority, "level", "data")
+    _api_priority.level = level
+    try:
+        yield
+    finally:
+        _api_priority.level = previous
+
+def _request_params(kwargs):
+    """Parameter request dari kwargs requests (string query, list pasangan, atau dict)."""
+    params = kwargs.get("params") or kwargs.get("data") or ()
+    if isinstance(params, str):
+        return dict(urllib.parse.parse_qsl(params))
+    return dict(params)
+
+class BudgetedSession(requests.Session):
+    """Session HTTP binance Client: setiap request melewati ApiBudget dan memakai satu pool
+    keep-alive bersama (salinan thread_client berbagi session ini)."""
+
+    def __init__(self, budget, pool_size):
+        super().__init__()
+        self.budget = budget
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        priority = getattr(_api_priority, "level", "data")
+        weight, orders = api_request_cost(method.upper(), urllib.parse.urlparse(url).path, _request_params(kwargs))
+        api_budget_wait.labels(priority).observe(self.budget.acquire(weight, orders, priority))
+        response = super().request(method, url, *args, **kwargs)
+        self.budget.update(response.status_code, response.headers)
+        return response
+
+def api_pool_size():
+    """Koneksi keep-alive: worker order + leg SL/TP, worker backfill, dan thread lain (gap, scheduler, candle)."""
+    return 3 * order_workers + backfill_workers + 4
+
+def use_api_budget(client, budget=None, pool_size=None):
+    """Pasang BudgetedSession ke client (header API key dipertahankan)."""
+    session = BudgetedSession(budget or api_budget, pool_size or api_pool_size())
+    session.headers.update(client.session.headers)
+    client.session.close()
+    client.session = session
+    return client
+
+api_budget = ApiBudget(api_weight_per_minute * api_budget_headroom, api_orders_per_10s * api_budget_headroom,
+                       api_orders_per_minute * api_budget_headroom)
+api_budget_gauge = Gauge('api_budget_utilization', 'Share of the local API budget used in the current window',
+                         ['limit'])
+for _name, _limit in api_budget.limits.items():
+    api_budget_gauge.labels(_name).set_function(_limit.utilization)
+api_used_weight_gauge = Gauge('api_used_weight', 'Request weight used this minute as reported by the exchange')
+api_used_weight_gauge.set_function(lambda: api_budget.server_weight)
+
+def _page_ranges(start_ms, end_ms, step, limit):
+    """Bagi [start_ms, end_ms] menjadi halaman (start, end, jumlah candle) maksimal `limit` candle."""
+    page_start = start_ms
+    while page_start <= end_ms:
+        page_end = min(page_start + step * limit - 1, end_ms)
+        yield page_start, page_end, min(limit, (page_end - page_start) // step + 1)
+        page_start += step * limit
+
+def _fetch_klines_page(symbol, interval, start_ms, end_ms, limit, limiter):
+    limiter.acquire(klines_request_weight(limit))
+    return thread_client().futures_klines(
+        symbol=symbol,
+        interval=interval,
+        startTime=start_ms,
+        endTime=end_ms,
+        limit=limit
+    )
+
+def klines_to_array(klines):
+    return np.array(
+        [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in klines],
+        dtype=KLINE_DTYPE
+    )
+
+def klines_to_frame(rows):
+    """Array KLINE_DTYPE -> DataFrame berbentuk output prepare_data."""
+    return pd.DataFrame({
+        "datetime": pd.to_datetime(rows["open_time"], unit="ms", utc=True).tz_convert(jakarta_tz),
+        "open": rows["open"],
+        "high": rows["high"],
+        "low": rows["low"],
+        "close": rows["close"],
+    })
+
+class KlineCache:
+    """Cache candle close di disk sebagai file .npy yang dibaca memory-mapped.
+
+    Layout: <root>/<SYMBOL>/<interval>/<open_time_pertama>_<open_time_terakhir>.npy
+    Setiap chunk berisi candle kontinu; chunk yang bersebelahan membentuk satu segmen.
+    Saat restart yang diambil dari REST hanya bagian jendela permintaan di luar segmen
+    yang ada, jadi cache lama tidak memaksa fetch seluruh rentang dari ujungnya sampai sekarang.
+    """
+
+    max_chunks = 16
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _chunks(self, symbol, interval):
+        directory = self._dir(symbol, interval)
+        if not os.path.isdir(directory):
+            return []
+        chunks = []
+        for name in os.listdir(directory):
+            if not name.endswith(".npy"):
+                continue
+            first, last = name[:-4].split("_")
+            chunks.append((int(first), int(last), os.path.join(directory, name)))
+        return sorted(chunks)
+
+    def coverage(self, symbol, interval):
+        """Segmen kontinu [(first, last)] urut naik; chunk bersebelahan digabung."""
+        step = INTERVAL_MS[interval]
+        segments = []
+        for first, last, _ in self._chunks(symbol, interval):
+            if segments and first <= segments[-1][1] + step:
+                segments[-1][1] = max(segments[-1][1], last)
+            else:
+                segments.append([first, last])
+        return [tuple(segment) for segment in segments]
+
+    def load(self, symbol, interval, start_ms, end_ms):
+        parts = []
+        for first, last, path in self._chunks(symbol, interval):
+            if last < start_ms or first > end_ms:
+                continue
+            rows = np.load(path, mmap_mode="r")
+            lo = np.searchsorted(rows["open_time"], start_ms, side="left")
+            hi = np.searchsorted(rows["open_time"], end_ms, side="right")
+            parts.append(rows[lo:hi])
+        if not parts:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        if len(parts) == 1:
+            return parts[0]  # View memory-mapped, tanpa copy
+        return np.concatenate(parts)
+
+    def _save(self, path, rows):
+        # Tulis ke file sementara lalu rename, supaya crash tidak meninggalkan chunk setengah jadi
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def store(self, symbol, interval, rows):
+        if not len(rows):
+            return
+        directory = self._dir(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        self._save(os.path.join(directory, f"{rows['open_time'][0]}_{rows['open_time'][-1]}.npy"), rows)
+        if len(self._chunks(symbol, interval)) > self.max_chunks:
+            self.compact(symbol, interval)
+
+    def compact(self, symbol, interval):
+        """Gabungkan chunk per segmen menjadi satu file per segmen (celah antar segmen dipertahankan)."""
+        chunks = self._chunks(symbol, interval)
+        for first, last in self.coverage(symbol, interval):
+            group = [path for f, l, path in chunks if first <= f and l <= last]
+            if len(group) < 2:
+                continue
+            merged = np.concatenate([np.load(path) for path in group])
+            _, idx = np.unique(merged["open_time"], return_index=True)
+            merged = merged[idx]
+            keep = f"{merged['open_time'][0]}_{merged['open_time'][-1]}.npy"
+            self._save(os.path.join(self._dir(symbol, interval), keep), merged)
+            for path in group:
+                if os.path.basename(path) != keep:
+                    os.remove(path)
+
+def _missing_ranges(start_ms, end_ms, coverage, step):
+    """Bagian [start_ms, end_ms] yang tidak tercakup segmen cache (hanya di dalam jendela permintaan)."""
+    ranges = []
+    cursor = start_ms
+    for first, last in coverage or ():
+        if last < cursor:
+            continue
+        if first > end_ms:
             break
-        start_ts = temp_klines[-1][0] + 1
-    return klines
+        if first > cursor:
+            ranges.append((cursor, first - step))
+        cursor = last + step
+    if cursor <= end_ms:
+        ranges.append((cursor, end_ms))
+    return ranges
+
+class BackfillError(RuntimeError):
+    """Sebagian simbol gagal di-backfill.
+
+    failed: symbol -> exception pertama. partial: hasil backfill_klines untuk semua simbol;
+    simbol yang gagal hanya berisi candle yang sudah ada di cache (bisa tidak lengkap).
+    """
+
+    def __init__(self, failed, partial):
+        super().__init__(f"Gagal backfill klines untuk {len(failed)} simbol: {', '.join(sorted(failed))}")
+        self.failed = failed
+        self.partial = partial
+
+def backfill_klines(symbols, interval, start_ms, end_ms=None, cache=None, workers=None, limiter=None, limit=1000):
+    """Ambil candle yang sudah close pada [start_ms, end_ms] untuk banyak simbol sekaligus.
+
+    Candle yang sudah ada di cache dibaca dari disk; hanya bagian jendela yang belum ada
+    yang diambil dari REST. Halaman dari semua simbol dikirim paralel ke satu thread pool dan
+    dibatasi oleh WeightLimiter. Mengembalikan dict symbol -> array KLINE_DTYPE.
+    BackfillError jika ada halaman yang gagal: rentang yang tidak lengkap tidak disimpan
+    ke cache, dan hasil simbol lain tetap tersedia di exception.partial.
+    """
+    cache = kline_cache if cache is None else cache
+    limiter = limiter or backfill_limiter
+    step = INTERVAL_MS[interval]
+    now_ms = int(time.time() * 1000)
+    # Candle terakhir yang sudah close; candle yang masih berjalan tidak pernah di-cache
+    last_closed = (now_ms // step) * step - step
+    end_ms = last_closed if end_ms is None else min(end_ms, last_closed)
+    start_ms = -(-start_ms // step) * step
+
+    tasks = []
+    for symbol in symbols:
+        coverage = cache.coverage(symbol, interval) if cache else None
+        for r, (lo, hi) in enumerate(_missing_ranges(start_ms, end_ms, coverage, step)):
+            for page_start, page_end, count in _page_ranges(lo, hi, step, limit):
+                tasks.append((symbol, r, page_start, page_end, count))
+
+    fetched = {}
+    failed = {}  # symbol -> exception pertama
+    if tasks:
+        with ThreadPoolExecutor(max_workers=workers or backfill_workers) as pool:
+            futures = {
+                pool.submit(_fetch_klines_page, symbol, interval, page_start, page_end, count, limiter):
+                    (symbol, r, page_start)
+                for symbol, r, page_start, page_end, count in tasks
+            }
+            for future in as_completed(futures):
+                symbol, r, page_start = futures[future]
+                try:
+                    fetched.setdefault((symbol, r), []).append((page_start, future.result()))
+                except Exception as e:
+                    failed.setdefault(symbol, e)
+                    fetched.setdefault((symbol, r), []).append((page_start, None))
+                    print(f"[{symbol}] Gagal mengambil klines mulai {page_start}: {e}")
+
+    result = {}
+    for symbol in symbols:
+        ranges = sorted((r, pages) for (s, r), pages in fetched.items() if s == symbol)
+        for _, pages in ranges:
+            if any(page is None for _, page in pages):
+                continue  # Rentang tidak lengkap tidak disimpan: cache hanya berisi segmen kontinu
+            rows = klines_to_array([k for _, page in sorted(pages, key=lambda p: p[0]) for k in page])
+            rows = rows[rows["open_time"] <= end_ms]
+            if cache:
+                cache.store(symbol, interval, rows)
+            else:
+                result.setdefault(symbol, []).append(rows)
+        if cache:
+            result[symbol] = cache.load(symbol, interval, start_ms, end_ms)
+        else:
+            parts = result.get(symbol, [])
+            result[symbol] = np.concatenate(parts) if parts else np.empty(0, dtype=KLINE_DTYPE)
+    if failed:
+        raise BackfillError(failed, result)
+    return result
 
 def prepare_data(symbol, interval, start_date, end_date):
-    klines = get_historical_klines(symbol, interval, start_date, end_date)
-    columns = ["open_time", "open", "high", "low", "close", "volume",
-               "close_time", "quote_asset_volume", "number_of_trades",
-               "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore"]
-    df = pd.DataFrame(klines, columns=columns)
-    df["datetime"] = pd.to_datetime(df["open_time"], unit="ms").dt.tz_localize("UTC").dt.tz_convert(jakarta_tz)
-    df[["open", "high", "low", "close"]] = df[["open", "high", "low", "close"]].astype(float)
-    return df[["datetime", "open", "high", "low", "close"]]
+    start_ms = int(pd.Timestamp(start_date).timestamp() * 1000)
+    end_ms = int(pd.Timestamp(end_date).timestamp() * 1000) if end_date else None
+    rows = backfill_klines([symbol], interval, start_ms, end_ms)[symbol]
+    return klines_to_frame(rows)
+
+backfill_limiter = WeightLimiter(backfill_weight_per_minute)
+kline_cache = KlineCache(kline_cache_dir)
 
 def calculate_atr(data, period=14):
     data = data.copy()
@@ -94,391 +893,3126 @@ def calculate_atr(data, period=14):
     return data
 
 # ====================================================
-# Global Variabel dan Lock
+# Candle store kolumnar per simbol (ring buffer NumPy berkapasitas tetap)
 # ====================================================
-global_balance = 50.0         
-initial_capital = 50.0        
-leverage = 10
-fee_rate = 0.0004             # 0.04%
-slippage_rate = 0.0005        # 0.05%
+candle_retention = 500  # Candle terakhir per simbol yang disimpan (~5 hari candle 15m)
 
-# Daftar pair (misal BTCUSDT agar terlihat di Testnet)
-pairs = ["BNBUSDT", "ETHUSDT", "ADAUSDT", "XRPUSDT", "DOGEUSDT"]
-historical_data = {}
-current_prices = {}
-open_trades = []      # Menyimpan detail posisi/order terbuka (simulasi order)
-executed_trades = []  # Menyimpan detail order yang telah ditutup
+class CandleStore:
+    """Ring buffer OHLCV kolumnar: array float64 + open_time int64 (epoch ms UTC).
 
-data_lock = threading.Lock()
+    Setiap kolom dialokasikan 2x kapasitas dan setiap nilai ditulis di slot i dan
+    i + capacity (mirrored), sehingga N candle terakhir selalu bersebelahan di memori
+    dan view(n) mengembalikan view NumPy tanpa copy. Zona waktu hanya dipakai saat
+    memformat output (to_frame).
+    """
 
-# ====================================================
-# Fungsi untuk menghitung effective margin (free margin + floating PnL dari posisi terbuka)
-# ====================================================
-def get_effective_margin():
-    effective = global_balance
-    for trade in open_trades:
-        symbol = trade['symbol']
-        if symbol in current_prices:
-            current_price = current_prices[symbol]
-            if trade['direction'] == "long":
-                floating = (current_price - trade['entry_price']) * trade['quantity'] * leverage
-            else:
-                floating = (trade['entry_price'] - current_price) * trade['quantity'] * leverage
-            effective += floating
-    return effective
+    COLUMNS = ("open", "high", "low", "close", "volume")
 
-# ====================================================
-# Fungsi untuk menempatkan order dengan retry mechanism
-# ====================================================
-def place_orders(symbol, direction, entry_price, stop_loss, take_profit, quantity, max_retries=3):
-    attempt = 0
-    while attempt < max_retries:
-        try:
-            start_time = time.time()
-            side = "BUY" if direction == "long" else "SELL"
-            market_order = client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type="MARKET",
-                quantity=round(quantity, 6)
-            )
-            # Atur order stop loss dan take profit
-            if direction == "long":
-                stop_side = "SELL"
-                tp_side = "SELL"
-            else:
-                stop_side = "BUY"
-                tp_side = "BUY"
-            stop_order = client.futures_create_order(
-                symbol=symbol,
-                side=stop_side,
-                type="STOP_MARKET",
-                stopPrice=round(stop_loss, 2),
-                closePosition=True
-            )
-            tp_order = client.futures_create_order(
-                symbol=symbol,
-                side=tp_side,
-                type="TAKE_PROFIT_MARKET",
-                stopPrice=round(take_profit, 2),
-                closePosition=True
-            )
-            latency = time.time() - start_time
-            order_latency_gauge.set(latency)
-            return {
-                "market_order": market_order,
-                "stop_order": stop_order,
-                "tp_order": tp_order
-            }
-        except Exception as e:
-            order_retry_counter.inc()
-            print(f"[{symbol}] Order attempt {attempt+1} failed: {e}")
-            time.sleep(1)
-            attempt += 1
-    send_discord_message(f"Failed to place orders for {symbol} after {max_retries} attempts.")
-    return None
+    def __init__(self, capacity=None, extra=()):
+        self.capacity = capacity or candle_retention
+        self.names = self.COLUMNS + tuple(extra)
+        self.open_time = np.zeros(2 * self.capacity, dtype=np.int64)
+        # Satu blok float64 column-major: tiap kolom bersebelahan, satu candle = satu assignment baris
+        self.values = np.full((2 * self.capacity, len(self.names)), np.nan, order="F")
+        self.columns = {"open_time": self.open_time}
+        self.columns.update((name, self.values[:, k]) for k, name in enumerate(self.names))
+        self.count = 0
+
+    def append(self, open_time, values):
+        """Tambah satu candle (menimpa yang tertua jika penuh); O(1).
+
+        values berurutan sesuai self.names: open, high, low, close, volume, lalu kolom extra.
+        """
+        i = self.count % self.capacity
+        # Slice i::capacity = baris i dan cermin-nya i + capacity dalam satu assignment
+        self.open_time[i] = self.open_time[i + self.capacity] = open_time
+        self.values[i::self.capacity] = values
+        self.count += 1
+        return i
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def view(self, n=None):
+        """Dict kolom -> view (tanpa copy) dari n candle terakhir, urut dari yang tertua."""
+        n = len(self) if n is None else min(n, len(self))
+        end = self.count % self.capacity + self.capacity
+        return {name: column[end - n:end] for name, column in self.columns.items()}
+
+    def column(self, name, n=None):
+        n = len(self) if n is None else min(n, len(self))
+        end = self.count % self.capacity + self.capacity
+        return self.columns[name][end - n:end]
+
+    def slot(self, offset=-1):
+        """Index slot untuk candle ke-`offset` dari belakang (-1 = terakhir)."""
+        if not -len(self) <= offset < 0:
+            raise IndexError(f"offset {offset} di luar ring buffer")
+        return (self.count + offset) % self.capacity
+
+    def to_frame(self, n=None):
+        """DataFrame n candle terakhir dengan kolom datetime WIB (untuk output/debug)."""
+        frame = pd.DataFrame({name: column.copy() for name, column in self.view(n).items()})
+        frame.insert(0, "datetime", pd.to_datetime(frame.pop("open_time"), unit="ms", utc=True).dt.tz_convert(jakarta_tz))
+        return frame
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
 
 # ====================================================
-# Fungsi untuk polling candle dan mendeteksi sinyal entry
+# Library indikator: batch NumPy (backfill/backtest) + streaming O(1) (candle live)
 # ====================================================
-def poll_candles():
-    global historical_data, open_trades
+class Indicator:
+    """Dasar indikator. Instance dipakai sebagai spesifikasi; IndicatorSet memakai clone() per simbol.
 
-    interval = Client.KLINE_INTERVAL_15MINUTE
+    Subclass mengisi `outputs` (nama kolom hasil), requires() (indikator yang dihitung lebih
+    dulu), update(row) -> tuple nilai untuk satu candle baru (row = dict OHLCV + output
+    dependensi candle itu), dan batch(columns) -> dict kolom -> array untuk seluruh seri.
+    Indikator dengan key (jenis + parameter) yang sama hanya dihitung sekali per simbol.
+    """
 
-    init_start = (datetime.datetime.now(jakarta_tz) - datetime.timedelta(minutes=50 * 15)).strftime('%Y-%m-%d %H:%M:%S')
-    init_end = datetime.datetime.now(jakarta_tz).strftime('%Y-%m-%d %H:%M:%S')
-    for symbol in pairs:
-        df = prepare_data(symbol, interval, init_start, init_end)
-        df = calculate_atr(df)
-        historical_data[symbol] = df
+    outputs = ()
 
-    send_discord_message("Inisialisasi data historis selesai. Mulai polling candle...")
-    print("Inisialisasi data historis selesai. Mulai polling candle...")
+    def __init__(self, *params):
+        self.params = params
+        self.reset()
 
-    while True:
-        try:
-            for symbol in pairs:
-                # Cegah order duplikasi: jika sudah ada order aktif/pending untuk simbol ini, lewati.
-                with data_lock:
-                    if any(trade for trade in open_trades if trade['symbol'] == symbol):
-                        continue
+    @property
+    def key(self):
+        return (type(self).__name__,) + self.params
 
-                klines = client.futures_klines(symbol=symbol, interval=interval, limit=2)
-                if not klines:
-                    continue
-                candle_open_time = pd.to_datetime(klines[-2][0], unit='ms').tz_localize("UTC").tz_convert(jakarta_tz)
-                df = historical_data.get(symbol, pd.DataFrame())
-                if not df.empty and candle_open_time <= df.iloc[-1]['datetime']:
-                    continue
-                new_row = {
-                    'datetime': candle_open_time,
-                    'open': float(klines[-2][1]),
-                    'high': float(klines[-2][2]),
-                    'low': float(klines[-2][3]),
-                    'close': float(klines[-2][4])
-                }
-                new_df = pd.DataFrame([new_row])
-                df = pd.concat([df, new_df], ignore_index=True)
-                df = calculate_atr(df)
-                historical_data[symbol] = df
-
-                if len(df) < 15:
-                    continue
+    def requires(self):
+        return ()
 
-                candidate = df.iloc[-2]
-                current = df.iloc[-1]
-                atr = candidate.get('atr', np.nan)
-                if np.isnan(atr):
-                    continue
+    def clone(self):
+        indicator = copy.copy(self)
+        indicator.reset()
+        return indicator
 
-                long_signal = current['close'] > candidate['high']
-                short_signal = current['close'] < candidate['low']
-                if not (long_signal or short_signal):
-                    continue
+    def reset(self):
+        pass
 
-                with data_lock:
-                    # Pastikan kembali tidak ada posisi aktif untuk simbol ini (pencegahan duplikasi)
-                    if any(trade for trade in open_trades if trade['symbol'] == symbol):
-                        continue
+    def update(self, row):
+        raise NotImplementedError
 
-                    entry_time = current['datetime']
-                    entry_price = current['open']
-                    if long_signal:
-                        direction = "long"
-                        stop_loss = entry_price - (1.5 * atr)
-                        take_profit = entry_price + (2.0 * atr)
-                    else:
-                        direction = "short"
-                        stop_loss = entry_price + (1.5 * atr)
-                        take_profit = entry_price - (2.0 * atr)
-                    
-                    # Dynamic Position Sizing dengan volatility-adjusted sizing:
-                    # Risk percent dasar (misalnya 5%) dikurangi berdasarkan volatilitas relatif.
-                    volatility_scale = 10.0
-                    # Semakin tinggi ATR relatif terhadap entry_price, semakin kecil risk percent yang digunakan.
-                    dynamic_risk_percent = 0.05 / (1 + volatility_scale * (atr / entry_price))
-                    effective_margin = get_effective_margin()
-                    risk_amount = dynamic_risk_percent * effective_margin
-                    risk_distance = abs(entry_price - stop_loss)
-                    if risk_distance == 0:
-                        continue
-                    quantity = risk_amount / risk_distance
-                    quantity = max(quantity, 0.001)
-                    
-                    orders = place_orders(symbol, direction, entry_price, stop_loss, take_profit, quantity)
-                    if orders is None:
-                        continue
+    def batch(self, columns):
+        raise NotImplementedError
 
-                    trade = {
-                        'entry_time': entry_time,
-                        'symbol': symbol,
-                        'direction': direction,
-                        'entry_price': entry_price,
-                        'stop_loss': stop_loss,
-                        'take_profit': take_profit,
-                        'quantity': quantity,
-                        'orders': orders,
-                        'status': 'open'
-                    }
-                    open_trades.append(trade)
-                    active_orders_gauge.set(len(open_trades))
-                    msg = (f"🚀 **Trade OPENED** untuk **{symbol}** pada {entry_time.strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
-                           f"🔀 Direction   : {direction}\n"
-                           f"📈 Entry Price : {entry_price:.4f}\n"
-                           f"🛑 Stop Loss   : {stop_loss:.4f}\n"
-                           f"🎯 Take Profit : {take_profit:.4f}\n"
-                           f"📦 Quantity    : {quantity:.4f}")
-                    send_discord_message(msg)
-                    print(msg)
-            time.sleep(10)
-        except Exception as e:
-            print("Error in poll_candles:", e)
-            time.sleep(5)
+    def _recurrence(self, values):
+        """Batch untuk indikator rekursif atau jumlah bergulir: _step() yang sama persis dengan
+        update(), jadi hasil batch dan streaming identik sampai bit terakhir."""
+        state = self.clone()
+        return np.array([state._step(x) for x in values.tolist()], dtype=float)
+
+def _rolling(values, period, reduce):
+    """reduce() atas window `period` nilai terakhir tiap bar; NaN sebelum window penuh."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = reduce(np.lib.stride_tricks.sliding_window_view(values, period), axis=1)
+    return out
+
+class _WindowSum:
+    """Jumlah bergulir `period` nilai terakhir dengan kompensasi Kahan (tidak drift setelah jutaan candle)."""
+
+    __slots__ = ("period", "values", "total", "comp")
+
+    def __init__(self, period):
+        self.period = period
+        self.values = collections.deque()
+        self.total = 0.0
+        self.comp = 0.0
+
+    def _add(self, value):
+        y = value - self.comp
+        t = self.total + y
+        self.comp = (t - self.total) - y
+        self.total = t
+
+    def push(self, value):
+        """Tambah nilai; mengembalikan jumlah window (NaN sebelum window penuh)."""
+        if len(self.values) == self.period:
+            self._add(-self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self.total if len(self.values) == self.period else math.nan
+
+class TrueRange(Indicator):
+    outputs = ("tr",)
+
+    def reset(self):
+        self.prev_close = None
+
+    def update(self, row):
+        high, low, prev_close = row['high'], row['low'], self.prev_close
+        self.prev_close = row['close']
+        if prev_close is None:
+            return (high - low,)
+        return (max(high - low, abs(high - prev_close), abs(low - prev_close)),)
+
+    def batch(self, columns):
+        high, low, close = columns['high'], columns['low'], columns['close']
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        return {"tr": np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))}
+
+class ATR(Indicator):
+    """Rolling mean TR (sama dengan calculate_atr)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.outputs = (f"atr{period}",)
+        super().__init__(period)
+
+    def requires(self):
+        return (TrueRange(),)
+
+    def reset(self):
+        self.window = _WindowSum(self.period)
+
+    def _step(self, tr):
+        return self.window.push(tr) / self.period
+
+    def update(self, row):
+        return (self._step(row['tr']),)
+
+    def batch(self, columns):
+        return {self.outputs[0]: self._recurrence(columns['tr'])}
+
+class SMA(Indicator):
+    def __init__(self, period, source="close"):
+        self.period, self.source = period, source
+        self.outputs = (f"sma{period}" + ("" if source == "close" else f"_{source}"),)
+        super().__init__(period, source)
+
+    def reset(self):
+        self.window = _WindowSum(self.period)
+
+    def _step(self, x):
+        return self.window.push(x) / self.period
+
+    def update(self, row):
+        return (self._step(row[self.source]),)
+
+    def batch(self, columns):
+        return {self.outputs[0]: self._recurrence(columns[self.source])}
+
+class EMA(Indicator):
+    """EMA dengan alpha 2/(period+1), diawali SMA `period` nilai pertama."""
+
+    def __init__(self, period, source="close"):
+        self.period, self.source = period, source
+        self.alpha = 2.0 / (period + 1)
+        self.outputs = (f"ema{period}" + ("" if source == "close" else f"_{source}"),)
+        super().__init__(period, source)
+
+    def reset(self):
+        self.n = 0
+        self.value = math.nan
+        self.seed = 0.0
+
+    def _step(self, x):
+        self.n += 1
+        if self.n <= self.period:
+            self.seed += x
+            if self.n < self.period:
+                return math.nan
+            self.value = self.seed / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def update(self, row):
+        return (self._step(row[self.source]),)
+
+    def batch(self, columns):
+        return {self.outputs[0]: self._recurrence(columns[self.source])}
+
+class RSI(Indicator):
+    """RSI Wilder: rata-rata gain/loss diawali SMA `period` perubahan pertama."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.outputs = (f"rsi{period}",)
+        super().__init__(period)
+
+    def reset(self):
+        self.prev = None
+        self.n = 0
+        self.avg_gain = self.avg_loss = 0.0
+
+    def _step(self, close):
+        prev, self.prev = self.prev, close
+        if prev is None:
+            return math.nan
+        change = close - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.n += 1
+        if self.n <= self.period:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if self.n < self.period:
+                return math.nan
+            self.avg_gain /= self.period
+            self.avg_loss /= self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        if self.avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def update(self, row):
+        return (self._step(row['close']),)
+
+    def batch(self, columns):
+        return {self.outputs[0]: self._recurrence(columns['close'])}
+
+class Donchian(Indicator):
+    """Channel Donchian: high tertinggi / low terendah `period` candle (termasuk candle ini)."""
+
+    def __init__(self, period=20):
+        self.period = period
+        self.outputs = (f"donchian{period}_upper", f"donchian{period}_lower")
+        super().__init__(period)
+
+    def reset(self):
+        self.i = 0
+        self.highs = collections.deque()  # Monotonic (index, high) menurun: max window di depan
+        self.lows = collections.deque()   # Monotonic (index, low) menaik: min window di depan
+
+    def update(self, row):
+        i, high, low = self.i, row['high'], row['low']
+        self.i += 1
+        highs, lows = self.highs, self.lows
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((i, high))
+        if highs[0][0] <= i - self.period:
+            highs.popleft()
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((i, low))
+        if lows[0][0] <= i - self.period:
+            lows.popleft()
+        if self.i < self.period:
+            return math.nan, math.nan
+        return highs[0][1], lows[0][1]
+
+    def batch(self, columns):
+        upper, lower = self.outputs
+        return {upper: _rolling(columns['high'], self.period, np.max),
+                lower: _rolling(columns['low'], self.period, np.min)}
+
+class Bollinger(Indicator):
+    """Bollinger band: SMA(period) ± k x standar deviasi populasi; garis tengah = kolom SMA."""
+
+    def __init__(self, period=20, k=2.0):
+        self.period, self.k = period, k
+        self.sma = SMA(period)
+        self.outputs = (f"bb{period}_{k:g}_upper", f"bb{period}_{k:g}_lower")
+        super().__init__(period, k)
+
+    def requires(self):
+        return (self.sma,)
+
+    def reset(self):
+        self.shift = None  # Nilai pertama; jumlah dihitung dari x - shift supaya varians tidak kehilangan presisi
+        self.sum = _WindowSum(self.period)
+        self.sum_sq = _WindowSum(self.period)
+
+    def _step(self, x):
+        """Standar deviasi populasi window (NaN sebelum window penuh)."""
+        if self.shift is None:
+            self.shift = x
+        d = x - self.shift
+        total, total_sq = self.sum.push(d), self.sum_sq.push(d * d)
+        mean = total / self.period
+        return math.sqrt(max(total_sq / self.period - mean * mean, 0.0))
+
+    def update(self, row):
+        std = self._step(row['close'])
+        mid = row[self.sma.outputs[0]]
+        return mid + self.k * std, mid - self.k * std
+
+    def batch(self, columns):
+        std = self._recurrence(columns['close'])
+        mid = columns[self.sma.outputs[0]]
+        upper, lower = self.outputs
+        return {upper: mid + self.k * std, lower: mid - self.k * std}
+
+def resolve_indicators(indicators):
+    """Indikator beserta dependensinya, dependensi lebih dulu, tiap key hanya sekali."""
+    ordered, seen = [], set()
+
+    def visit(indicator):
+        if indicator.key in seen:
+            return
+        for dependency in indicator.requires():
+            visit(dependency)
+        seen.add(indicator.key)
+        ordered.append(indicator)
+
+    for indicator in indicators:
+        visit(indicator)
+    return ordered
 
 # ====================================================
-# Fungsi WebSocket untuk menerima tick data real-time (digunakan untuk trailing stop)
+# State indikator streaming per simbol (CandleStore + cache indikator)
 # ====================================================
-def on_message(ws, message):
-    global current_prices, open_trades
-    try:
-        data = json.loads(message)
-        trade_data = data.get("data", {})
-        symbol = trade_data.get("s", "")
-        price = float(trade_data.get("p", 0))
-        current_prices[symbol] = price
+class IndicatorSet:
+    """Candle dan indikator satu simbol.
 
-        with data_lock:
-            for trade in open_trades.copy():
-                if trade['symbol'] != symbol:
-                    continue
+    Indikator yang diminta beberapa strategi, atau yang menjadi dependensi indikator lain,
+    dihitung sekali per candle (resolve_indicators). Hasilnya disimpan sebagai kolom
+    tambahan CandleStore, jadi candle()/candles.view() memberi OHLCV + semua indikator.
+    """
 
-                # Mekanisme trailing stop:
-                # Untuk posisi long: jika profit mencapai ≥30% (price ≥ 1.30×entry),
-                # batalkan order SL lama dan buat order SL baru di level break even (entry price).
-                if trade['direction'] == "long" and price >= trade['entry_price'] * 1.30:
-                    try:
-                        client.futures_cancel_order(symbol=symbol, orderId=trade['orders']['stop_order']['orderId'])
-                        new_stop = client.futures_create_order(
-                            symbol=symbol,
-                            side="SELL",
-                            type="STOP_MARKET",
-                            stopPrice=round(trade['entry_price'], 2),
-                            closePosition=True
-                        )
-                        trade['orders']['stop_order'] = new_stop
-                        send_discord_message(f"🔄 Update SL untuk {symbol} (LONG): SL digeser ke BEP = {trade['entry_price']:.4f} USDT")
-                    except Exception as e:
-                        print(f"Error updating SL untuk {symbol}: {e}")
-                # Untuk posisi short: jika profit mencapai ≥30% (price ≤ 0.70×entry), geser SL ke BEP.
-                elif trade['direction'] == "short" and price <= trade['entry_price'] * 0.70:
-                    try:
-                        client.futures_cancel_order(symbol=symbol, orderId=trade['orders']['stop_order']['orderId'])
-                        new_stop = client.futures_create_order(
-                            symbol=symbol,
-                            side="BUY",
-                            type="STOP_MARKET",
-                            stopPrice=round(trade['entry_price'], 2),
-                            closePosition=True
-                        )
-                        trade['orders']['stop_order'] = new_stop
-                        send_discord_message(f"🔄 Update SL untuk {symbol} (SHORT): SL digeser ke BEP = {trade['entry_price']:.4f} USDT")
-                    except Exception as e:
-                        print(f"Error updating SL untuk {symbol}: {e}")
-    except Exception as e:
-        print("Error in on_message:", e)
+    def __init__(self, indicators, size=None):
+        self.indicators = [indicator.clone() for indicator in resolve_indicators(indicators)]
+        # Minimal 2 candle untuk sinyal breakout (candidate + current)
+        self.size = max(size or candle_retention, 2)
+        self.candles = CandleStore(self.size, extra=[name for ind in self.indicators for name in ind.outputs])
+        self.count = 0
 
-def on_error(ws, error):
-    print("WebSocket error:", error)
+    def warm_up(self, rows):
+        """Isi dari array KLINE_DTYPE (open_time epoch ms, tanpa konversi zona waktu)."""
+        for open_time, open_, high, low, close, volume in rows.tolist():
+            self.update(open_time, open_, high, low, close, volume)
+        return self
 
-def on_close(ws, close_status_code, close_msg):
-    print("WebSocket closed")
+    def update(self, open_time, open_, high, low, close, volume=math.nan):
+        """Tambah satu candle close; mengembalikan dict OHLCV + nilai semua indikator."""
+        row = {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+        for indicator in self.indicators:
+            row.update(zip(indicator.outputs, indicator.update(row)))
+        self.candles.append(open_time, [row[name] for name in self.candles.names])
+        self.count += 1
+        return row
 
-def on_open(ws):
-    print("WebSocket connection opened.")
-
-def start_websocket():
-    streams = [f"{symbol.lower()}@trade" for symbol in pairs]
-    stream_url = "wss://stream.binancefuture.com/stream?streams=" + "/".join(streams)
-    ws = websocket.WebSocketApp(
-        stream_url,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-    ws.on_open = on_open
-    ws.run_forever()
+    @staticmethod
+    def batch(indicators, columns):
+        """Semua indikator (dan dependensinya) untuk seluruh seri; columns = dict OHLCV -> array."""
+        columns = dict(columns)
+        for indicator in resolve_indicators(indicators):
+            columns.update(indicator.batch(columns))
+        return columns
+
+    @property
+    def last_open_time(self):
+        return int(self.candles.open_time[(self.count - 1) % self.size]) if self.count else None
+
+    def candle(self, offset=-1):
+        """Candle ke-`offset` dari belakang (-1 = terakhir), seperti df.iloc[offset]."""
+        i = self.candles.slot(offset)
+        candle = dict(zip(self.candles.names, self.candles.values[i].tolist()))
+        candle['open_time'] = int(self.candles.open_time[i])
+        return candle
+
+    def __len__(self):
+        return self.count
+
+class ATRState(IndicatorSet):
+    """IndicatorSet berisi ATR(period) saja.
+
+    Setiap update() berjalan O(1) waktu dan memori dan mengembalikan ATR yang sama
+    dengan calculate_atr(period); candle() juga memuat kolom 'tr' dan 'atr'.
+    """
+
+    def __init__(self, period=14, size=None):
+        self.period = period
+        self.atr_name = ATR(period).outputs[0]
+        super().__init__([ATR(period)], size)
+
+    def update(self, open_time, open_, high, low, close, volume=math.nan):
+        return super().update(open_time, open_, high, low, close, volume)[self.atr_name]
+
+    def candle(self, offset=-1):
+        candle = super().candle(offset)
+        candle['atr'] = candle[self.atr_name]
+        return candle
 
 # ====================================================
-# (Opsional) Fungsi Summary: Daily, Weekly, Monthly
+# Aturan strategi ATR breakout (dipakai live dan backtest)
 # ====================================================
-def daily_summary():
-    global executed_trades, global_balance
-    bot_start_time = datetime.datetime.now(jakarta_tz)
-    last_summary_time = datetime.datetime.now(jakarta_tz)
-    while True:
-        now = datetime.datetime.now(jakarta_tz)
-        if (now - last_summary_time).total_seconds() >= 24 * 3600:
-            with data_lock:
-                times = [trade['exit_time'] for trade in executed_trades if 'exit_time' in trade]
-                balances = [trade['balance_after'] for trade in executed_trades if 'balance_after' in trade]
-            total_trades = len(executed_trades)
-            win_count = sum(1 for t in executed_trades if t.get('pnl', 0) > 0)
-            loss_count = total_trades - win_count
-            win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-            summary_msg = (f"📊 **Daily Summary** sejak {bot_start_time.strftime('%Y-%m-%d %H:%M:%S %Z')}:\n"
-                           f"💵 Final Balance: ${global_balance:.2f}\n"
-                           f"📈 Total Trades: {total_trades}\n"
-                           f"✅ Wins: {win_count}, ❌ Losses: {loss_count}\n"
-                           f"🏆 Win Rate: {win_rate:.2f}%")
-            send_discord_message(summary_msg)
-            print("Daily summary sent.")
-            last_summary_time = now
-        time.sleep(60)
+# Fungsi di bawah hanya memakai operator aritmetika, sehingga bisa menerima skalar
+# (Strategy.signal) maupun array NumPy (backtest) dan hasilnya identik.
+def breakout_levels(entry_price, atr, sign, sl_mult, tp_mult):
+    """Stop loss & take profit; sign = 1 untuk long, -1 untuk short."""
+    stop_loss = entry_price - sign * sl_mult * atr
+    take_profit = entry_price + sign * tp_mult * atr
+    return stop_loss, take_profit
 
-def weekly_summary():
-    global executed_trades, global_balance
-    last_summary_time = datetime.datetime.now(jakarta_tz)
-    while True:
-        now = datetime.datetime.now(jakarta_tz)
-        if (now - last_summary_time).total_seconds() >= 7 * 24 * 3600:
-            start_period = now - datetime.timedelta(days=7)
-            trades_week = [trade for trade in executed_trades if 'exit_time' in trade and trade['exit_time'] >= start_period]
-            total_trades = len(trades_week)
-            win_count = sum(1 for t in trades_week if t.get('pnl', 0) > 0)
-            loss_count = total_trades - win_count
-            win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-            summary_msg = (f"📆 **Weekly Summary** ({start_period.strftime('%Y-%m-%d')} - {now.strftime('%Y-%m-%d')}):\n"
-                           f"💵 Balance: ${global_balance:.2f}\n"
-                           f"📈 Total Trades: {total_trades}\n"
-                           f"✅ Wins: {win_count}, ❌ Losses: {loss_count}\n"
-                           f"🏆 Win Rate: {win_rate:.2f}%")
-            send_discord_message(summary_msg)
-            print("Weekly summary sent.")
-            last_summary_time = now
-        time.sleep(60)
+def breakeven_trigger_price(entry_price, sign, trigger):
+    """Harga yang memicu SL digeser ke entry price (break even)."""
+    return entry_price * (1 + sign * trigger)
 
-def monthly_summary():
-    global executed_trades, global_balance
-    last_summary_time = datetime.datetime.now(jakarta_tz)
-    while True:
-        now = datetime.datetime.now(jakarta_tz)
-        if (now - last_summary_time).total_seconds() >= 30 * 24 * 3600:
-            start_period = now - datetime.timedelta(days=30)
-            trades_month = [trade for trade in executed_trades if 'exit_time' in trade and trade['exit_time'] >= start_period]
-            total_trades = len(trades_month)
-            win_count = sum(1 for t in trades_month if t.get('pnl', 0) > 0)
-            loss_count = total_trades - win_count
-            win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-            summary_msg = (f"📅 **Monthly Summary** ({start_period.strftime('%Y-%m-%d')} - {now.strftime('%Y-%m-%d')}):\n"
-                           f"💵 Balance: ${global_balance:.2f}\n"
-                           f"📈 Total Trades: {total_trades}\n"
-                           f"✅ Wins: {win_count}, ❌ Losses: {loss_count}\n"
-                           f"🏆 Win Rate: {win_rate:.2f}%")
-            send_discord_message(summary_msg)
-            print("Monthly summary sent.")
-            last_summary_time = now
-        time.sleep(60)
+def position_size(entry_price, stop_loss, atr, margin, volatility_scale, base_risk, min_quantity=0.001):
+    """Quantity dengan volatility-adjusted sizing.
+
+    Risk percent dasar (misalnya 5%) dikurangi berdasarkan volatilitas relatif:
+    semakin tinggi ATR relatif terhadap entry_price, semakin kecil risk percent yang digunakan.
+    Pemanggil harus menyaring risk distance nol (entry_price == stop_loss).
+    """
+    dynamic_risk_percent = base_risk / (1 + volatility_scale * (atr / entry_price))
+    risk_amount = dynamic_risk_percent * margin
+    risk_distance = abs(entry_price - stop_loss)
+    return np.maximum(risk_amount / risk_distance, min_quantity)
 
 # ====================================================
-# Fungsi untuk update global balance
+# Plug-in strategi (dievaluasi tiap candle close di evaluate_entry)
 # ====================================================
-def update_global_balance():
-    global global_balance, initial_capital
-    # For simulation, kita set ulang global_balance ke initial_capital
-    global_balance = initial_capital
+Signal = collections.namedtuple("Signal", "sign entry_price stop_loss take_profit atr")
+
+class Strategy:
+    """Dasar strategi: indicators() mendeklarasikan indikator yang dibutuhkan, signal(state)
+    menerima IndicatorSet simbol setelah candle close dan mengembalikan Signal atau None.
+    """
+
+    name = "strategy"
+
+    def indicators(self):
+        return []
+
+    def signal(self, state):
+        raise NotImplementedError
+
+    @staticmethod
+    def _levels(sign, entry_price, atr, sl_mult=None, tp_mult=None):
+        """Signal dengan SL/TP kelipatan ATR; None jika risk distance nol."""
+        sl_mult = sl_atr_mult if sl_mult is None else sl_mult
+        tp_mult = tp_atr_mult if tp_mult is None else tp_mult
+        stop_loss, take_profit = breakout_levels(entry_price, atr, sign, sl_mult, tp_mult)
+        if entry_price == stop_loss:
+            return None
+        return Signal(sign, entry_price, stop_loss, take_profit, atr)
+
+class ATRBreakout(Strategy):
+    """Close candle > high candle sebelumnya (long) atau < low (short); SL/TP dari ATR candle sebelumnya.
+
+    Aturan yang sama dipakai backtest() secara vectorized. Parameter None = nilai global.
+    """
+
+    name = "atr_breakout"
+    min_bars = 15
+
+    def __init__(self, period=None):
+        self.period = period
+
+    def atr(self):
+        return ATR(atr_period if self.period is None else self.period)
+
+    def indicators(self):
+        return [self.atr()]
+
+    def signal(self, state):
+        if len(state) < self.min_bars:
+            return None
+        candidate, current = state.candle(-2), state.candle(-1)
+        atr = candidate[self.atr().outputs[0]]
+        if np.isnan(atr):
+            return None
+        if current['close'] > candidate['high']:
+            sign = 1
+        elif current['close'] < candidate['low']:
+            sign = -1
+        else:
+            return None
+        return self._levels(sign, current['open'], atr)
+
+class DonchianTrend(Strategy):
+    """Close menembus channel Donchian candle sebelumnya searah EMA tren, RSI belum ekstrem."""
+
+    name = "donchian_trend"
+
+    def __init__(self, channel=20, trend=50, rsi=14, rsi_limit=70.0, period=None):
+        self.donchian, self.ema, self.rsi = Donchian(channel), EMA(trend), RSI(rsi)
+        self.rsi_limit = rsi_limit
+        self.period = period
+
+    def atr(self):
+        return ATR(atr_period if self.period is None else self.period)
+
+    def indicators(self):
+        return [self.donchian, self.ema, self.rsi, self.atr()]
+
+    def signal(self, state):
+        if len(state) < 2:
+            return None
+        previous, current = state.candle(-2), state.candle(-1)
+        upper, lower = (previous[name] for name in self.donchian.outputs)
+        ema, rsi = current[self.ema.outputs[0]], current[self.rsi.outputs[0]]
+        atr = previous[self.atr().outputs[0]]
+        if np.isnan([upper, lower, ema, rsi, atr]).any():
+            return None
+        close = current['close']
+        if close > upper and close > ema and rsi < self.rsi_limit:
+            sign = 1
+        elif close < lower and close < ema and rsi > 100.0 - self.rsi_limit:
+            sign = -1
+        else:
+            return None
+        return self._levels(sign, current['open'], atr)
+
+# ====================================================
+# Global Variabel dan Lock
+# ====================================================
+global_balance = 50.0         
+initial_capital = 50.0        
+leverage = 10
+fee_rate = 0.0004             # 0.04%
+slippage_rate = 0.0005        # 0.05%
+
+# Parameter strategi (bisa dicari dengan: python main.py sweep ...)
+atr_period = 14
+sl_atr_mult = 1.5             # Stop loss = 1.5x ATR
+tp_atr_mult = 2.0             # Take profit = 2x ATR
+volatility_scale = 10.0
+base_risk_percent = 0.05      # Risk 5% per trade sebelum disesuaikan volatilitas
+breakeven_trigger = 0.30      # SL digeser ke BEP saat harga bergerak ≥30% searah posisi
+
+# Daftar pair (misal BTCUSDT agar terlihat di Testnet)
+pairs = ["BNBUSDT", "ETHUSDT", "ADAUSDT", "XRPUSDT", "DOGEUSDT"]
+kline_interval = Client.KLINE_INTERVAL_15MINUTE
+# Strategi per candle close, urut prioritas (sinyal pertama yang muncul dipakai),
+# mis. [ATRBreakout(), DonchianTrend()]
+strategies = [ATRBreakout()]
+indicator_states = {}  # symbol -> IndicatorSet (CandleStore + indikator semua strategi)
+current_prices = {}
+open_trades = []      # Menyimpan detail posisi/order terbuka (simulasi order)
+positions = {}        # symbol -> trade aktif/pending; indeks untuk cek duplikasi tanpa scan open_trades
+breakeven_index = {}  # symbol -> (sign, level, trade); tick memicu SL ke BEP jika sign * price >= level
+exit_levels = {}      # symbol -> (sign, sign * stop_loss, sign * take_profit, trade); deteksi SL/TP tersentuh
+ledger = None         # SharedLedger di proses worker mode supervisor, None jika satu proses
+# Trade yang telah ditutup: hanya yang terbaru di memori, semuanya diarsipkan ke disk (TradeArchive)
+executed_trades_in_memory = 1000
+executed_trades = collections.deque(maxlen=executed_trades_in_memory)
+trade_archive_path = os.path.join("data", "trades.jsonl")
+
+data_lock = TimedLock("data_lock")
+candle_queue = queue.Queue()  # Candle close dari stream kline / backfill, dikonsumsi process_candles
+
+# ====================================================
+# Risk portofolio: posisi dalam array, PnL/exposure/drawdown inkremental, batas portofolio
+# ====================================================
+max_open_positions = 10          # Maks posisi aktif + pending sekaligus
+max_correlated_exposure = 10.0   # Maks Σ ρ_ij x notional_j searah entry baru, kelipatan effective margin
+risk_returns_window = 96         # Return candle untuk matriks korelasi (96 x 15m = 24 jam)
+risk_min_returns = 32            # Sebelum ini korelasi antar simbol dianggap 0
+
+def floating_pnl(trade, current_price):
+    """PnL jika posisi ditutup di current_price, dihitung seperti close_position: quantity sudah
+    notional penuh (leverage hanya menentukan margin), dikurangi fee entry + exit."""
+    sign = 1 if trade['direction'] == "long" else -1
+    fill_price = trade.get('fill_price', trade['entry_price'])
+    return trade['quantity'] * (sign * (current_price - fill_price) - fee_rate * (fill_price + current_price))
+
+class PortfolioRisk:
+    """Posisi aktif/pending sebagai array per slot simbol (quantity bertanda, harga entry, harga terakhir).
+
+    update() (tick simbol berposisi) memperbarui PnL, exposure, equity puncak dan drawdown secara
+    inkremental dalam O(1); buka/tutup posisi menghitung ulang total secara vectorized, jadi
+    drift float dari update inkremental tidak menumpuk. Return log tiap candle close disimpan
+    di ring buffer [window x simbol]; saat bar baru dimulai matriks korelasi dihitung ulang dan
+    exposure terkorelasi per simbol (Σ_j ρ_ij x notional_j) disimpan, sehingga cek entry
+    (entry_quantity) hanya lookup.
+    """
+
+    def __init__(self, capacity=8, window=None):
+        self.lock = threading.Lock()
+        self.window = window or risk_returns_window
+        self.index = {}  # symbol -> slot
+        self.held = {}   # symbol -> slot, hanya simbol berposisi (cek cepat di tick path)
+        self.capacity = 0
+        self._grow(capacity)
+        self.floating = 0.0  # Σ PnL floating termasuk fee
+        self.gross = 0.0     # Σ |notional|
+        self.net = 0.0       # Σ notional bertanda (long +)
+        self.peak = None     # Equity tertinggi (saldo + floating)
+        self.drawdown = 0.0
+        self.bar = None      # Bar terbaru di ring buffer return
+        self.bars = 0        # Jumlah bar return yang terisi (maks window)
+        self.gauges = False
+
+    def _grow(self, capacity):
+        old = self.capacity
+        self.capacity = capacity
+        for name, fill in (("qty", 0.0), ("entry", 0.0), ("price", 0.0), ("pnl", 0.0), ("last_close", np.nan),
+                           ("corr_exposure", 0.0)):
+            array = np.full(capacity, fill)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+        last_bar = np.full(capacity, -1, dtype=np.int64)
+        returns = np.zeros((self.window, capacity))
+        corr = np.eye(capacity)
+        if old:
+            last_bar[:old], returns[:, :old], corr[:old, :old] = self.last_bar, self.returns, self.corr
+        self.last_bar, self.returns, self.corr = last_bar, returns, corr
+
+    def _slot(self, symbol):
+        """Slot simbol (dialokasikan saat pertama dipakai); dipanggil dengan self.lock."""
+        i = self.index.get(symbol)
+        if i is None:
+            i = self.index[symbol] = len(self.index)
+            if i >= self.capacity:
+                self._grow(2 * self.capacity)
+            if self.gauges:
+                position_pnl_gauge.labels(symbol).set_function(lambda: float(self.pnl[i]))
+        return i
+
+    def reserve(self, symbols):
+        with self.lock:
+            for symbol in symbols:
+                self._slot(symbol)
+
+    # ---- posisi ----
+    def open(self, trade, price=None):
+        """Daftarkan posisi (pending atau hasil recovery); dipanggil dengan data_lock."""
+        sign = 1 if trade['direction'] == "long" else -1
+        with self.lock:
+            i = self._slot(trade['symbol'])
+            self.qty[i] = sign * trade['quantity']
+            self.entry[i] = trade.get('fill_price', trade['entry_price'])
+            self.price[i] = price or self.entry[i]
+            self.held[trade['symbol']] = i
+            self._resync()
+            self._mark_equity()
+
+    def fill(self, symbol, fill_price):
+        """Harga entry = avgPrice order MARKET."""
+        with self.lock:
+            i = self.held.get(symbol)
+            if i is not None:
+                self.entry[i] = fill_price
+                self._resync()
+
+    def close(self, symbol):
+        """Hapus posisi. Drawdown tidak ditandai di sini: PnL-nya baru masuk saldo di record_closed_trade."""
+        with self.lock:
+            i = self.held.pop(symbol, None)
+            if i is not None:
+                self.qty[i] = 0.0
+                self._resync()
+
+    def _resync(self):
+        """Total ulang secara vectorized + exposure terkorelasi (dipanggil dengan self.lock)."""
+        n = len(self.index)
+        qty, entry, price = self.qty[:n], self.entry[:n], self.price[:n]
+        self.pnl[:n] = qty * (price - entry) - fee_rate * np.abs(qty) * (entry + price)
+        notional = qty * price
+        self.floating = float(self.pnl[:n].sum())
+        self.gross = float(np.abs(notional).sum())
+        self.net = float(notional.sum())
+        self.corr_exposure[:n] = self.corr[:n, :n] @ notional
+
+    def update(self, symbol, price):
+        """Tick @trade: O(1), hanya untuk simbol berposisi."""
+        i = self.held.get(symbol)
+        if i is None:
+            return
+        with self.lock:
+            q, entry = float(self.qty[i]), float(self.entry[i])
+            pnl = q * (price - entry) - fee_rate * abs(q) * (entry + price)
+            self.floating += pnl - float(self.pnl[i])
+            self.pnl[i] = pnl
+            move = price - float(self.price[i])
+            self.net += q * move
+            self.gross += abs(q) * move  # Tanda notional tidak berubah selama posisi terbuka
+            self.price[i] = price
+            self._mark_equity()
+
+    def mark_equity(self):
+        with self.lock:
+            self._mark_equity()
+
+    def equity(self):
+        """Saldo + floating PnL; di worker supervisor saldo dan floating seluruh portofolio."""
+        if ledger is not None:
+            return ledger.effective_margin(self.floating)
+        return global_balance + self.floating
+
+    def _mark_equity(self):
+        equity = self.equity()
+        if self.peak is None or equity > self.peak:
+            self.peak = equity
+        self.drawdown = (self.peak - equity) / self.peak if self.peak > 0 else 0.0
+
+    def symbol_pnl(self, symbol):
+        i = self.held.get(symbol)
+        return float(self.pnl[i]) if i is not None else 0.0
+
+    # ---- batas portofolio ----
+    def entry_quantity(self, symbol, sign, entry_price, quantity, margin):
+        """(quantity yang diizinkan, alasan) untuk entry baru; O(1).
+
+        Ditolak (quantity 0) jika jumlah posisi sudah max_open_positions atau exposure
+        terkorelasi searah sudah mencapai batas; jika masih ada ruang, quantity dipotong
+        supaya Σ ρ x notional tidak melewati max_correlated_exposure x margin.
+        """
+        if len(self.held) >= max_open_positions:
+            return 0.0, "max_positions"
+        i = self.index.get(symbol)
+        correlated = float(self.corr_exposure[i]) if i is not None else 0.0
+        room = max_correlated_exposure * margin - sign * correlated
+        if room <= 0:
+            return 0.0, "correlated_exposure"
+        if quantity * entry_price > room:
+            return room / entry_price, "reduced"
+        return quantity, None
+
+    # ---- return & korelasi ----
+    def candle_closed(self, symbol, open_time, close):
+        """Candle close: simpan return log; bar baru -> korelasi dari bar-bar sebelumnya dihitung ulang."""
+        bar = open_time // INTERVAL_MS[kline_interval]
+        with self.lock:
+            i = self._slot(symbol)
+            if self.bar is None or bar > self.bar:
+                if self.bar is not None:
+                    self._refresh_correlation()
+                    self.bars = min(self.window, self.bars + int(bar - self.bar))
+                    for b in range(max(self.bar + 1, bar - self.window + 1), bar + 1):
+                        self.returns[b % self.window] = 0.0
+                self.bar = bar
+            if self.last_bar[i] == bar - 1 and self.last_close[i] > 0 and bar > self.bar - self.window:
+                self.returns[bar % self.window, i] = math.log(close / self.last_close[i])
+            if bar > self.last_bar[i]:
+                self.last_bar[i], self.last_close[i] = bar, close
+
+    def seed(self, symbol, open_time, close):
+        """Isi ring buffer dari candle historis (array open_time/close, urut naik)."""
+        bars = np.asarray(open_time, dtype=np.int64) // INTERVAL_MS[kline_interval]
+        close = np.asarray(close, dtype=float)
+        if len(bars) == 0:
+            return
+        with self.lock:
+            i = self._slot(symbol)
+            consecutive = np.flatnonzero(np.diff(bars) == 1)[-self.window:] + 1
+            self.returns[bars[consecutive] % self.window, i] = np.log(close[consecutive] / close[consecutive - 1])
+            self.last_bar[i], self.last_close[i] = bars[-1], close[-1]
+            self.bar = int(bars[-1]) if self.bar is None else max(self.bar, int(bars[-1]))
+            self.bars = max(self.bars, min(self.window, len(consecutive)))
+
+    def refresh_correlation(self):
+        with self.lock:
+            self._refresh_correlation()
+
+    def _refresh_correlation(self):
+        n = len(self.index)
+        if self.bars >= risk_min_returns and n:
+            x = self.returns[:, :n] - self.returns[:, :n].mean(axis=0)
+            cov = x.T @ x
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr = cov / np.outer(std, std)
+            corr[~np.isfinite(corr)] = 0.0
+            np.fill_diagonal(corr, 1.0)
+            self.corr[:n, :n] = corr
+        self.corr_exposure[:n] = self.corr[:n, :n] @ (self.qty[:n] * self.price[:n])
+
+    def bind_gauges(self):
+        """Hubungkan gauge PnL/drawdown/exposure ke state ini (dibaca saat scrape)."""
+        self.gauges = True
+        current_pnl_gauge.set_function(lambda: self.equity() - initial_capital)
+        current_drawdown_gauge.set_function(lambda: self.drawdown)
+        exposure_gauge.labels('gross').set_function(lambda: self.gross)
+        exposure_gauge.labels('net').set_function(lambda: self.net)
+        for symbol, i in list(self.index.items()):
+            position_pnl_gauge.labels(symbol).set_function(lambda i=i: float(self.pnl[i]))
+
+portfolio = PortfolioRisk()
+
+def get_effective_margin():
+    if ledger is not None:
+        return ledger.effective_margin()  # Saldo dan floating PnL semua shard
+    return global_balance + portfolio.floating
+
+# ====================================================
+# Filter simbol dari exchangeInfo: kuantisasi dan validasi order sebelum dikirim
+# ====================================================
+exchange_filters_refresh = 3600.0  # Detik; filter jarang berubah, di-refresh di background
+
+SymbolFilters = collections.namedtuple(
+    "SymbolFilters", "trading tick_size price_decimals min_price max_price "
+                     "step_size qty_decimals min_qty max_qty min_notional")
+
+def _decimals(step):
+    """Jumlah desimal dari string step exchange, mis. "0.00100000" -> 3, "1" -> 0."""
+    digits = step.rstrip("0").partition(".")[2] if "." in step else ""
+    return len(digits)
+
+def parse_symbol_filters(info):
+    """SymbolFilters dari satu entri `symbols` futures_exchange_info.
+
+    Quantity order MARKET dibatasi MARKET_LOT_SIZE (fallback LOT_SIZE); bot hanya
+    mengirim quantity di order MARKET (entry dan flatten), SL/TP memakai closePosition.
+    """
+    filters = {f["filterType"]: f for f in info.get("filters", ())}
+    price = filters.get("PRICE_FILTER", {})
+    lot = filters.get("LOT_SIZE", {})
+    market_lot = filters.get("MARKET_LOT_SIZE") or lot
+    tick = price.get("tickSize", "0.01")
+    step = market_lot.get("stepSize") or lot.get("stepSize", "0.001")
+    return SymbolFilters(
+        trading=info.get("status", "TRADING") == "TRADING",
+        tick_size=float(tick), price_decimals=_decimals(tick),
+        min_price=float(price.get("minPrice", 0)), max_price=float(price.get("maxPrice", 0)),
+        step_size=float(step), qty_decimals=_decimals(step),
+        min_qty=float(market_lot.get("minQty", 0)),
+        max_qty=float(market_lot.get("maxQty", 0)) or float(lot.get("maxQty", 0)),
+        min_notional=float(filters.get("MIN_NOTIONAL", {}).get("notional", 0)),
+    )
+
+class ExchangeFilters:
+    """Cache tickSize/stepSize/minNotional/maxQty per simbol dari futures_exchange_info.
+
+    Dimuat sekali saat start (satu request weight 1 untuk semua simbol) lalu di-refresh
+    Scheduler. Dict diganti utuh saat refresh, jadi pembacaan di worker order tidak perlu lock.
+    Simbol tanpa filter (cache belum dimuat, mis. replay/backtest offline) tidak diubah
+    dan tidak divalidasi; main() dan run_shard() memuat cache sebelum trading dimulai.
+    """
+
+    def __init__(self):
+        self.filters = {}  # symbol -> SymbolFilters
+        self.loaded_at = None
+
+    def load(self):
+        info = thread_client().futures_exchange_info()
+        self.filters = {s["symbol"]: parse_symbol_filters(s) for s in info.get("symbols", ())}
+        self.loaded_at = time.time()
+        return len(self.filters)
+
+    def refresh(self):
+        """Job Scheduler: gagal refresh -> filter lama tetap dipakai."""
+        try:
+            self.load()
+        except Exception as e:
+            print("Gagal refresh exchangeInfo:", e)
+
+    def price(self, symbol, price):
+        """Harga dibulatkan ke tickSize terdekat."""
+        f = self.filters.get(symbol)
+        if f is None:
+            return price
+        return round(round(price / f.tick_size) * f.tick_size, f.price_decimals)
+
+    def quantity(self, symbol, quantity):
+        """Quantity dibulatkan ke bawah ke stepSize (risk tidak pernah melebihi hasil sizing),
+        dipotong ke maxQty."""
+        f = self.filters.get(symbol)
+        if f is None:
+            return quantity
+        if f.max_qty:
+            quantity = min(quantity, f.max_qty)
+        return round(math.floor(quantity / f.step_size + 1e-9) * f.step_size, f.qty_decimals)
+
+    def check(self, symbol, quantity=None, price=None, reference_price=None, reduce_only=False):
+        """ValueError jika order (yang sudah dikuantisasi) akan ditolak filter exchange.
+
+        reference_price dipakai untuk minNotional order MARKET (harga entry sinyal);
+        order reduceOnly dibebaskan dari minNotional seperti di Binance.
+        """
+        f = self.filters.get(symbol)
+        if f is None:
+            return
+        if not f.trading:
+            raise ValueError(f"{symbol} tidak dalam status TRADING")
+        if price is not None and (price <= 0 or price < f.min_price or (f.max_price and price > f.max_price)):
+            raise ValueError(f"{symbol}: harga {price} di luar PRICE_FILTER [{f.min_price}, {f.max_price}]")
+        if quantity is not None:
+            if quantity <= 0 or quantity < f.min_qty:
+                raise ValueError(f"{symbol}: quantity {quantity} di bawah minQty {f.min_qty}")
+            notional = quantity * (price or reference_price or 0)
+            if not reduce_only and notional < f.min_notional:
+                raise ValueError(f"{symbol}: notional {notional:.4f} di bawah minNotional {f.min_notional}")
+
+    def bracket(self, symbol, entry_price, stop_loss, take_profit, quantity):
+        """(stop_loss, take_profit, quantity) terkuantisasi untuk place_orders; ValueError jika tidak valid."""
+        stop_loss, take_profit = self.price(symbol, stop_loss), self.price(symbol, take_profit)
+        quantity = self.quantity(symbol, quantity)
+        self.check(symbol, quantity=quantity, reference_price=entry_price)
+        self.check(symbol, price=stop_loss)
+        self.check(symbol, price=take_profit)
+        if (entry_price - stop_loss) * (take_profit - entry_price) <= 0:
+            raise ValueError(f"{symbol}: SL {stop_loss} / TP {take_profit} tidak mengapit entry setelah dibulatkan ke tickSize")
+        return stop_loss, take_profit, quantity
+
+exchange_filters = ExchangeFilters()
+
+# ====================================================
+# Eksekusi order: worker pool dengan antrean per simbol
+# ====================================================
+order_workers = 4
+order_max_retries = 3
+order_backoff_base = 0.25     # Detik; retry ke-n menunggu base * 2^n (maks order_backoff_max) + jitter
+order_backoff_max = 4.0
+
+# Kode error Binance untuk order yang melanggar filter simbol (tick/step/minNotional/maxQty)
+FILTER_REJECT_CODES = {-1013, -1111, -4003, -4014, -4164}
+
+# Tipe order yang oleh python-binance dikirim ke endpoint algoOrder (id: algoId/clientAlgoId)
+CONDITIONAL_ORDER_TYPES = {"STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"}
+
+class OrderExecutor:
+    """Thread pool untuk request order, dengan antrean FIFO per simbol.
+
+    Job untuk simbol yang sama dijalankan berurutan (mis. entry sebelum update SL),
+    job untuk simbol berbeda berjalan paralel. Leg SL/TP dikirim lewat leg_pool
+    terpisah, sehingga job yang menunggu kedua leg tidak bisa menghabiskan worker.
+    """
+
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order")
+        self.leg_pool = ThreadPoolExecutor(max_workers=2 * workers, thread_name_prefix="order-leg")
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.queues = {}  # symbol -> deque job; ada selama antrean simbol itu sedang diproses
+        self.pending = 0
+
+    def submit(self, symbol, fn, *args, **kwargs):
+        """Antrekan fn(*args, **kwargs) untuk simbol; mengembalikan Future tanpa menunggu."""
+        future = Future()
+        with self.lock:
+            self.pending += 1
+            jobs = self.queues.get(symbol)
+            if jobs is None:
+                jobs = self.queues[symbol] = collections.deque()
+                self.pool.submit(self._drain, symbol)
+            jobs.append((future, fn, args, kwargs))
+        return future
+
+    def _drain(self, symbol):
+        while True:
+            with self.lock:
+                jobs = self.queues[symbol]
+                if not jobs:
+                    del self.queues[symbol]
+                    return
+                future, fn, args, kwargs = jobs.popleft()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    print(f"[{symbol}] Order job error: {e}")
+                    future.set_exception(e)
+            with self.lock:
+                self.pending -= 1
+                if not self.pending:
+                    self.idle.notify_all()
+
+    def queue_depth(self, symbol=None):
+        with self.lock:
+            if symbol is not None:
+                return len(self.queues.get(symbol, ()))
+            return sum(len(jobs) for jobs in self.queues.values())
+
+    def wait_idle(self, timeout=None):
+        """Tunggu sampai semua job selesai; False jika timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+order_executor = OrderExecutor(order_workers)
+
+def order_backoff(attempt):
+    return min(order_backoff_max, order_backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+def _find_order(symbol, id_field, client_id):
+    """Cari order berdasarkan client id; None jika tidak ada / exchange tidak bisa dihubungi."""
+    key = "clientAlgoId" if id_field == "clientAlgoId" else "origClientOrderId"
+    try:
+        return thread_client().futures_get_order(symbol=symbol, **{key: client_id})
+    except Exception:
+        return None
+
+def submit_order_leg(leg, max_retries=None, **params):
+    """Kirim satu order dengan retry + exponential backoff; None jika semua percobaan gagal.
+
+    Client order id dibuat sekali sebelum percobaan pertama. Setelah error (mis. timeout),
+    order dicek dulu ke exchange dengan id itu sehingga order yang ternyata sudah
+    diterima tidak dikirim dua kali. Tidak pernah dipanggil sambil memegang data_lock.
+    """
+    max_retries = order_max_retries if max_retries is None else max_retries
+    id_field = "clientAlgoId" if params["type"] in CONDITIONAL_ORDER_TYPES else "newClientOrderId"
+    params.setdefault(id_field, "bot-" + uuid.uuid4().hex[:28])  # Binance: maks 36 karakter
+    # SL/TP/flatten/update SL didahulukan dari entry, entry dari polling data (ApiBudget)
+    with api_priority("order" if leg == "entry" else "protective"):
+        for attempt in range(max_retries):
+            start_time = time.perf_counter()
+            try:
+                order = thread_client().futures_create_order(**params)
+                order_latency_histogram.labels(leg=leg).observe(time.perf_counter() - start_time)
+                return order
+            except Exception as e:
+                order_retry_counter.inc()
+                if isinstance(e, BinanceAPIException) and e.code in FILTER_REJECT_CODES:
+                    order_rejected_counter.labels('exchange').inc()
+                print(f"[{params['symbol']}] {leg} attempt {attempt+1} failed: {e}")
+            order = _find_order(params["symbol"], id_field, params[id_field])
+            if order is not None:
+                return order
+            if attempt + 1 < max_retries:
+                time.sleep(order_backoff(attempt))
+    return None
+
+def cancel_order(symbol, order):
+    """Batalkan order hasil futures_create_order (order biasa atau algo/conditional)."""
+    with api_priority("protective"):
+        if "algoId" in order:
+            return thread_client().futures_cancel_order(symbol=symbol, algoId=order["algoId"])
+        return thread_client().futures_cancel_order(symbol=symbol, orderId=order["orderId"])
+
+def place_orders(symbol, direction, entry_price, stop_loss, take_profit, quantity, max_retries=None,
+                 signal_at=None):
+    """Entry MARKET, lalu STOP_MARKET dan TAKE_PROFIT_MARKET dikirim bersamaan.
+
+    Harga dan quantity dikuantisasi ke filter simbol (exchange_filters) sebelum dikirim;
+    order yang pasti ditolak exchange tidak pernah dikirim.
+
+    Dijalankan di worker OrderExecutor. Setiap leg di-retry sendiri, jadi kegagalan
+    SL/TP tidak mengirim ulang entry. Jika SL atau TP tetap gagal, leg yang sudah
+    terpasang dibatalkan dan posisi ditutup (reduceOnly) agar tidak ada posisi tanpa proteksi.
+    signal_at (perf_counter saat sinyal) mengisi tahap signal_to_fill/signal_to_protected.
+    """
+    max_retries = order_max_retries if max_retries is None else max_retries
+    start_time = time.perf_counter()
+    try:
+        stop_loss, take_profit, quantity = exchange_filters.bracket(symbol, entry_price, stop_loss, take_profit,
+                                                                    quantity)
+    except ValueError as e:
+        order_rejected_counter.labels('local').inc()
+        send_discord_message(f"Order {symbol} tidak dikirim: {e}")
+        return None
+    side = "BUY" if direction == "long" else "SELL"
+    exit_side = "SELL" if direction == "long" else "BUY"
+    market_order = submit_order_leg("entry", max_retries, symbol=symbol, side=side,
+                                    type="MARKET", quantity=quantity)
+    if market_order is None:
+        send_discord_message(f"Failed to place orders for {symbol} after {max_retries} attempts.")
+        return None
+    if signal_at is not None and hot_path_metrics:
+        stage_latency.observe(("signal_to_fill", symbol), time.perf_counter() - signal_at)
+
+    # Atur order stop loss dan take profit (paralel)
+    stop_future = order_executor.leg_pool.submit(
+        submit_order_leg, "stop_loss", max_retries, symbol=symbol, side=exit_side,
+        type="STOP_MARKET", stopPrice=stop_loss, closePosition=True)
+    tp_future = order_executor.leg_pool.submit(
+        submit_order_leg, "take_profit", max_retries, symbol=symbol, side=exit_side,
+        type="TAKE_PROFIT_MARKET", stopPrice=take_profit, closePosition=True)
+    stop_order, tp_order = stop_future.result(), tp_future.result()
+
+    if stop_order is None or tp_order is None:
+        for order in (stop_order, tp_order):
+            if order is not None:
+                try:
+                    cancel_order(symbol, order)
+                except Exception as e:
+                    print(f"[{symbol}] Gagal membatalkan order proteksi: {e}")
+        flatten = submit_order_leg("flatten", max_retries, symbol=symbol, side=exit_side,
+                                   type="MARKET", quantity=quantity, reduceOnly=True)
+        send_discord_message(f"⚠️ Gagal memasang SL/TP untuk {symbol}; posisi "
+                             f"{'ditutup' if flatten is not None else 'GAGAL ditutup, cek manual'}.")
+        return None
+
+    order_latency_histogram.labels(leg="bracket").observe(time.perf_counter() - start_time)
+    if signal_at is not None and hot_path_metrics:
+        stage_latency.observe(("signal_to_protected", symbol), time.perf_counter() - signal_at)
+    return {
+        "market_order": market_order,
+        "stop_order": stop_order,
+        "tp_order": tp_order
+    }
+
+def _arm_breakeven(trade):
+    """Daftarkan trigger break-even untuk trade (dipanggil dengan data_lock)."""
+    symbol = trade['symbol']
+    if positions.get(symbol) is not trade or trade.get('breakeven'):
+        return
+    sign = 1 if trade['direction'] == "long" else -1
+    level = breakeven_trigger_price(trade['entry_price'], sign, breakeven_trigger)
+    breakeven_index[symbol] = (sign, sign * level, trade)
+
+def _arm_exits(trade):
+    """Daftarkan level SL/TP trade untuk deteksi exit di tick path (dipanggil dengan data_lock)."""
+    symbol = trade['symbol']
+    if positions.get(symbol) is not trade:
+        return
+    sign = 1 if trade['direction'] == "long" else -1
+    exit_levels[symbol] = (sign, sign * trade['stop_loss'], sign * trade['take_profit'], trade)
+
+def _exit_claimed(trade):
+    """True jika tick sudah mengklaim exit posisi aktif ini (level dihapus, close_position antre)."""
+    levels = exit_levels.get(trade['symbol'])
+    return trade.get('status') == 'open' and (levels is None or levels[3] is not trade)
+
+def remove_position(trade):
+    """Hapus trade dari open_trades dan indeks per simbol; True jika trade masih terdaftar."""
+    with data_lock:
+        open_trades[:] = [t for t in open_trades if t is not trade]
+        removed = positions.get(trade['symbol']) is trade
+        if removed:
+            del positions[trade['symbol']]
+            breakeven_index.pop(trade['symbol'], None)
+            exit_levels.pop(trade['symbol'], None)
+            portfolio.close(trade['symbol'])
+        active_orders_gauge.set(len(open_trades))
+        if ledger is not None:
+            ledger.publish(portfolio.floating)
+        return removed
+
+def update_shard_balance():
+    """Worker supervisor: global_balance mengikuti saldo portofolio di ledger pusat."""
+    global global_balance
+    global_balance = ledger.balance()
+
+def record_closed_trade(record):
+    """Update saldo, statistik, executed_trades dan arsip untuk satu trade yang ditutup.
+
+    Dipanggil dengan data_lock.
+    """
+    global global_balance
+    global_balance += record['pnl']
+    record['balance_after'] = global_balance
+    portfolio.mark_equity()
+    executed_trades.append(record)
+    trade_stats.record(record['exit_time'], record['pnl'], global_balance)
+    trade_archive.append(record)
+    journal_event("close", record)
+    return record
+
+def close_position(trade, exit_price, reason):
+    """Catat posisi yang ditutup SL/TP di exchange (job OrderExecutor; harga tick pertama yang
+    melewati level), atau yang ternyata sudah tertutup saat rekonsiliasi (harga mark).
+
+    PnL dihitung seperti backtest (quantity x selisih harga, dikurangi fee kedua sisi) dari
+    harga fill entry (avgPrice order MARKET; entry_price jika exchange tidak mengirimnya).
+    Order proteksi yang tersisa dibatalkan lewat OrderExecutor. None jika posisi sudah dicatat ditutup.
+    """
+    if not remove_position(trade):
+        return None
+    sign = 1 if trade['direction'] == "long" else -1
+    fill_price = trade.get('fill_price', trade['entry_price'])
+    pnl = trade['quantity'] * (sign * (exit_price - fill_price) - fee_rate * (fill_price + exit_price))
+    record = {key: trade[key] for key in ('entry_time', 'symbol', 'direction', 'entry_price',
+                                          'stop_loss', 'take_profit', 'quantity')}
+    record.update(fill_price=fill_price, exit_time=datetime.datetime.now(jakarta_tz), exit_price=exit_price, exit_reason=reason, pnl=pnl)
+    if ledger is not None:
+        ledger.closed(record)  # Saldo, statistik dan arsip dipegang proses ledger
+        with data_lock:
+            update_shard_balance()
+            executed_trades.append(record)
+            portfolio.mark_equity()
+        journal_event("close", record)
+    else:
+        with data_lock:
+            record_closed_trade(record)
+    # SL tersentuh -> batalkan TP, dan sebaliknya; hasil rekonsiliasi -> batalkan keduanya
+    legs = {"stop_loss": ('tp_order',), "take_profit": ('stop_order',)}.get(reason, ('stop_order', 'tp_order'))
+    for leg in legs:
+        order_executor.submit(trade['symbol'], _cancel_quietly, trade['symbol'], trade['orders'][leg])
+    msg = (f"🏁 **Trade CLOSED** untuk **{trade['symbol']}** ({reason})\n"
+           f"📉 Exit Price : {exit_price:.4f}\n"
+           f"💰 PnL        : {pnl:.4f} USDT")
+    send_discord_message(msg)
+    print(msg)
+    return record
+
+def _cancel_quietly(symbol, order):
+    try:
+        cancel_order(symbol, order)
+    except Exception as e:
+        print(f"[{symbol}] Order proteksi sudah tidak aktif: {e}")
+
+def move_stop_to_breakeven(trade):
+    """Job OrderExecutor: ganti order SL dengan STOP_MARKET di entry price (break even)."""
+    symbol = trade['symbol']
+    if positions.get(symbol) is not trade or _exit_claimed(trade):
+        return None  # Posisi sudah ditutup (atau exit-nya sudah diklaim tick) sebelum job ini berjalan
+    long = trade['direction'] == "long"
+    try:
+        cancel_order(symbol, trade['orders']['stop_order'])
+    except Exception as e:
+        print(f"Error updating SL untuk {symbol}: {e}")
+        with data_lock:
+            _arm_breakeven(trade)  # Coba lagi pada tick berikutnya
+        return None
+    new_stop = submit_order_leg("stop_update", None, symbol=symbol, side="SELL" if long else "BUY",
+                                type="STOP_MARKET", stopPrice=exchange_filters.price(symbol, trade['entry_price']),
+                                closePosition=True)
+    if new_stop is None:
+        send_discord_message(f"⚠️ SL lama {symbol} sudah dibatalkan tetapi SL BEP gagal dipasang, cek manual.")
+        return None
+    with data_lock:
+        trade['orders']['stop_order'] = new_stop
+        trade['breakeven'] = True
+        trade['stop_loss'] = trade['entry_price']
+        if not _exit_claimed(trade):
+            _arm_exits(trade)
+    journal_event("orders", {'symbol': symbol, 'orders': {'stop_order': new_stop},
+                             'stop_loss': trade['entry_price'], 'breakeven': True})
+    send_discord_message(f"🔄 Update SL untuk {symbol} ({'LONG' if long else 'SHORT'}): "
+                         f"SL digeser ke BEP = {trade['entry_price']:.4f} USDT")
+    return new_stop
+
+def open_position(trade):
+    """Job OrderExecutor untuk trade 'pending' dari evaluate_entry."""
+    symbol = trade['symbol']
+    orders = place_orders(symbol, trade['direction'], trade['entry_price'], trade['stop_loss'],
+                          trade['take_profit'], trade['quantity'], signal_at=trade.get('signal_at'))
+    if orders is None:
+        remove_position(trade)
+        return None
+    fill_price = float(orders['market_order'].get('avgPrice') or 0)
+    with data_lock:
+        trade['orders'] = orders
+        trade['status'] = 'open'
+        if fill_price > 0:
+            trade['fill_price'] = fill_price
+            portfolio.fill(symbol, fill_price)
+        _arm_breakeven(trade)
+        _arm_exits(trade)
+    journal_event("open", journal_trade(trade))
+    if ledger is not None:
+        ledger.opened(trade)
+
+    msg = (f"🚀 **Trade OPENED** untuk **{symbol}** pada {trade['entry_time'].strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
+           f"🔀 Direction   : {trade['direction']}\n"
+           f"📈 Entry Price : {trade['entry_price']:.4f}\n"
+           f"🛑 Stop Loss   : {trade['stop_loss']:.4f}\n"
+           f"🎯 Take Profit : {trade['take_profit']:.4f}\n"
+           f"📦 Quantity    : {trade['quantity']:.4f}")
+    send_discord_message(msg)
+    print(msg)
+    return orders
+
+# ====================================================
+# Inisialisasi data historis + pemrosesan candle close
+# ====================================================
+def new_indicator_state():
+    """IndicatorSet berisi indikator semua strategi (yang sama dihitung sekali)."""
+    return IndicatorSet([indicator for strategy in strategies for indicator in strategy.indicators()])
+
+def history_candles():
+    """Candle historis saat startup: 50 untuk indikator, atau lebih jika window korelasi
+    PortfolioRisk lebih panjang."""
+    return max(50, risk_returns_window + 1)
+
+def init_historical_data():
+    global indicator_states
+
+    # Candle terakhir untuk semua pair sekaligus (paralel, lewat cache di disk)
+    init_end = int(time.time() * 1000)
+    init_start = init_end - history_candles() * INTERVAL_MS[kline_interval]
+    try:
+        history = backfill_klines(pairs, kline_interval, init_start, init_end)
+    except BackfillError as e:
+        # Pair yang gagal mulai dari candle yang ada di cache. backfill_gaps (on_open stream)
+        # mengambil candle setelah candle terakhir itu, atau seluruh history_candles() jika
+        # state pair masih kosong, sebelum candle dari stream diproses
+        history = e.partial
+        send_discord_message(f"⚠️ {e}. History pair tersebut diambil ulang saat stream terhubung.")
+        print(e)
+    portfolio.reserve(pairs)
+    for symbol in pairs:
+        indicator_states[symbol] = new_indicator_state().warm_up(history[symbol])
+        portfolio.seed(symbol, history[symbol]["open_time"], history[symbol]["close"])
+    portfolio.refresh_correlation()
+
+    send_discord_message("Inisialisasi data historis selesai. Menunggu candle close dari WebSocket...")
+    print("Inisialisasi data historis selesai. Menunggu candle close dari WebSocket...")
+
+def backfill_gaps(symbols=None):
+    """Isi candle yang terlewat (mis. setelah reconnect WebSocket) lewat REST.
+
+    Dipanggil dari on_open koneksi stream (untuk pair koneksi itu) sebelum pesan stream
+    diproses, sehingga candle backfill masuk ke candle_queue lebih dulu daripada candle dari stream.
+    State yang masih kosong (backfill startup gagal) diisi history_candles() candle terakhir.
+    Sinyal hanya dievaluasi untuk candle close terakhir, sama seperti polling lama.
+    """
+    now_ms = int(time.time() * 1000)
+    for symbol in pairs if symbols is None else symbols:
+        state = indicator_states.get(symbol)
+        if state is None:
+            continue
+        # Tanpa startTime: candle terbaru, termasuk candle berjalan yang dibuang di bawah
+        window = ({'startTime': state.last_open_time + 1, 'limit': 1000} if state.count
+                  else {'limit': history_candles() + 1})
+        try:
+            with api_priority("data"):  # Thread on_open: salinan client sendiri, session tetap bersama
+                klines = thread_client().futures_klines(symbol=symbol, interval=kline_interval, **window)
+        except Exception as e:
+            print(f"[{symbol}] Gagal backfill candle: {e}")
+            continue
+        closed = [k for k in klines if k[6] < now_ms]
+        for n, k in enumerate(closed, start=1):
+            candle_queue.put({
+                'symbol': symbol,
+                'open_time': int(k[0]),
+                'open': float(k[1]),
+                'high': float(k[2]),
+                'low': float(k[3]),
+                'close': float(k[4]),
+                'evaluate': n == len(closed),
+                'received_at': time.perf_counter()
+            })
+        if closed:
+            print(f"[{symbol}] Backfill {len(closed)} candle setelah reconnect")
+
+def handle_closed_candle(candle):
+    """Update state indikator untuk satu candle close lalu evaluasi sinyal entry.
+
+    Mengembalikan dict trade (status 'pending', order dikirim OrderExecutor) jika
+    sinyal entry muncul, selain itu None.
+    """
+    symbol = candle['symbol']
+    state = indicator_states.get(symbol)
+    if state is None:
+        state = indicator_states[symbol] = new_indicator_state()
+    if state.count and candle['open_time'] <= state.last_open_time:
+        return None
+    if state.count and candle['open_time'] > state.last_open_time + INTERVAL_MS[kline_interval]:
+        fill_candle_gap(symbol, state, candle['open_time'])
+    state.update(candle['open_time'], candle['open'], candle['high'], candle['low'], candle['close'])
+    portfolio.candle_closed(symbol, candle['open_time'], candle['close'])
+    if not candle.get('evaluate', True):
+        return None
+    return evaluate_entry(symbol, state)
+
+def fill_candle_gap(symbol, state, open_time):
+    """Candle stream melompat (kline close terlewat): ambil candle di antaranya lewat REST
+    sebelum candle baru dimasukkan, supaya indikator tidak menghitung melewati lubang."""
+    stream_gaps_counter.labels('kline').inc()
+    try:
+        klines = thread_client().futures_klines(symbol=symbol, interval=kline_interval,
+                                                startTime=state.last_open_time + 1, endTime=open_time - 1,
+                                                limit=1000)
+    except Exception as e:
+        print(f"[{symbol}] Gagal mengisi gap candle: {e}")
+        return
+    for k in klines:
+        if state.last_open_time < int(k[0]) < open_time:
+            state.update(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]))
+            portfolio.candle_closed(symbol, int(k[0]), float(k[4]))
+            stream_backfilled_counter.labels('kline').inc()
+
+def evaluate_entry(symbol, state):
+    # Cegah order duplikasi: jika sudah ada order aktif/pending untuk simbol ini, lewati.
+    if symbol in positions:
+        return None
+
+    for strategy in strategies:
+        signal = strategy.signal(state)
+        if signal is not None:
+            break
+    else:
+        return None
+
+    with data_lock:
+        # Pastikan kembali tidak ada posisi aktif untuk simbol ini (pencegahan duplikasi)
+        if symbol in positions:
+            return None
+
+        entry_time = datetime.datetime.fromtimestamp(state.last_open_time / 1000, tz=jakarta_tz)
+        entry_price, stop_loss, take_profit = signal.entry_price, signal.stop_loss, signal.take_profit
+        direction = "long" if signal.sign > 0 else "short"
+        margin = get_effective_margin()
+        quantity = float(position_size(entry_price, stop_loss, signal.atr, margin, volatility_scale,
+                                       base_risk_percent))
+        quantity, limited = portfolio.entry_quantity(symbol, signal.sign, entry_price, quantity, margin)
+        if limited is not None:
+            risk_rejected_counter.labels(limited).inc()
+            if not quantity:
+                print(f"[{symbol}] Sinyal dilewati: batas portofolio ({limited})")
+                return None
+        # Dibulatkan ke filter exchange di sini juga, supaya level SL/TP yang dipantau tick path
+        # sama dengan order di exchange dan sinyal yang tidak bisa dieksekusi tidak jadi 'pending'.
+        try:
+            stop_loss, take_profit, quantity = exchange_filters.bracket(symbol, entry_price, stop_loss,
+                                                                        take_profit, quantity)
+        except ValueError as e:
+            order_rejected_counter.labels('local').inc()
+            print(f"[{symbol}] Sinyal dilewati: {e}")
+            return None
+
+        # Posisi dicatat 'pending' lebih dulu supaya sinyal berikutnya tidak membuka duplikat;
+        # order dikirim OrderExecutor di luar data_lock dan loop sinyal tidak menunggu.
+        trade = {
+            'entry_time': entry_time,
+            'symbol': symbol,
+            'direction': direction,
+            'entry_price': entry_price,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'quantity': quantity,
+            'orders': None,
+            'status': 'pending',
+            'signal_at': time.perf_counter()
+        }
+        open_trades.append(trade)
+        positions[symbol] = trade
+        portfolio.open(trade, current_prices.get(symbol))
+        active_orders_gauge.set(len(open_trades))
+    order_executor.submit(symbol, open_position, trade)
+    return trade
+
+def process_candles():
+    """Thread konsumen candle_queue: candle close dari stream kline (atau backfill REST)."""
+    while True:
+        candle = candle_queue.get()
+        started = time.perf_counter()
+        try:
+            handle_closed_candle(candle)
+        except Exception as e:
+            print("Error in process_candles:", e)
+        if hot_path_metrics and 'received_at' in candle:
+            symbol = candle['symbol']
+            stage_latency.observe(("candle_queue", symbol), started - candle['received_at'])
+            stage_latency.observe(("decision", symbol), time.perf_counter() - candle['received_at'])
+
+# ====================================================
+# Fungsi WebSocket untuk menerima tick data real-time (digunakan untuk trailing stop)
+# ====================================================
+ws_base_url = "wss://stream.binancefuture.com"
+ws_streams_per_connection = 200   # Binance: maks 1024 stream per koneksi; @trade + @kline per simbol
+ws_ping_interval = 20             # Detik; pong tidak datang dalam ws_ping_timeout -> koneksi ditutup
+ws_ping_timeout = 10
+ws_stale_timeout = 30.0           # Tanpa pesan selama ini -> koneksi dianggap mati dan dibuka ulang
+ws_backoff_base = 1.0             # Reconnect ke-n menunggu base * 2^n (maks ws_backoff_max) + jitter
+ws_backoff_max = 60.0
+ws_backoff_reset = 60.0           # Koneksi yang bertahan selama ini me-reset backoff
+tick_conflation = True            # Tick diproses thread terpisah; jika tertinggal hanya harga terbaru (+ high/low)
+trade_backfill_page = 500         # historicalTrades: maks 500 trade per request
+trade_backfill_max = 5_000        # Gap trade lebih besar -> rekonsiliasi posisi lewat REST
+
+json_loads = orjson.loads if orjson is not None else json.loads
+last_trade_ids = {}  # symbol -> trade id @trade terakhir (deteksi gap)
+gap_backfill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gap-backfill")
+
+def parse_trade(message):
+    """(symbol, harga, trade id) dari pesan @trade combined stream tanpa decode JSON penuh.
+
+    Mengandalkan urutan field payload Binance ("s", lalu "t", lalu "p"); ValueError jika
+    formatnya lain, pemanggil lalu decode penuh.
+    """
+    _, _, rest = message.partition('"s":"')
+    symbol, _, rest = rest.partition('","t":')
+    trade_id, _, rest = rest.partition(',"p":"')
+    price, _, _ = rest.partition('"')
+    return symbol, float(price), int(trade_id)
+
+def on_message(ws, message):
+    started = time.perf_counter()
+    try:
+        if message.find("@kline", 0, 48) < 0:
+            kind = "trade"
+            try:
+                symbol, price, trade_id = parse_trade(message)
+            except ValueError:
+                event = json_loads(message).get("data", {})
+                if event.get("e") != "trade":
+                    return
+                symbol, price, trade_id = event.get("s", ""), float(event.get("p", 0)), event.get("t")
+            decoded = time.perf_counter()
+            on_trade_event(symbol, price, trade_id)
+        else:
+            kind = "kline"
+            event = json_loads(message).get("data", {})
+            symbol = event.get("s", "")
+            decoded = time.perf_counter()
+            on_kline(event)
+        if hot_path_metrics:
+            stage_latency.observe(("decode", symbol), decoded - started)
+            stage_latency.observe((kind, symbol), time.perf_counter() - decoded)
+    except Exception as e:
+        print("Error in on_message:", e)
+
+def on_trade_event(symbol, price, trade_id):
+    """Cek kontinuitas trade id lalu teruskan tick ke tick_sink (on_trade atau conflator)."""
+    if trade_id is not None:
+        last = last_trade_ids.get(symbol)
+        last_trade_ids[symbol] = trade_id
+        if last is not None and trade_id > last + 1:
+            on_trade_gap(symbol, last + 1, trade_id - 1)
+    tick_sink(symbol, price)
+
+def on_trade(symbol, price, high=None, low=None):
+    """Tick @trade yang sudah di-decode: deteksi SL/TP tersentuh dan trigger break-even.
+
+    high/low adalah harga ekstrem tick yang digabung sejak pemrosesan sebelumnya (conflation
+    atau backfill gap); level SL/TP/BEP dicek terhadap ekstrem itu, bukan hanya harga terakhir.
+    """
+    current_prices[symbol] = price
+    portfolio.update(symbol, price)
+    if high is None:
+        high = low = price
+
+    # SL/TP tersentuh -> posisi dianggap ditutup oleh order closePosition di exchange
+    levels = exit_levels.get(symbol)
+    if levels is not None:
+        sign = levels[0]
+        worst, best = (low, high) if sign > 0 else (high, low)
+        if sign * worst <= levels[1] or sign * best >= levels[2]:
+            if exit_levels.pop(symbol, None) is levels:
+                # Tick hanya mengklaim exit; pencatatan (data_lock, journal, Discord) di OrderExecutor.
+                # SL lebih dulu jika keduanya tersentuh dalam tick yang digabung (sama seperti backtest)
+                if sign * worst <= levels[1]:
+                    order_executor.submit(symbol, close_position, levels[3], worst, "stop_loss")
+                else:
+                    order_executor.submit(symbol, close_position, levels[3], best, "take_profit")
+            return
+        if ledger is not None:
+            ledger.publish(portfolio.floating)
+
+    # Mekanisme trailing stop (tanpa data_lock: dict.get/pop atomik, trigger sudah dihitung
+    # saat posisi dibuka). Long: price >= (1 + breakeven_trigger) x entry, short:
+    # price <= (1 - breakeven_trigger) x entry -> SL dipindah ke BEP oleh OrderExecutor.
+    trigger = breakeven_index.get(symbol)
+    if trigger is not None and trigger[0] * (high if trigger[0] > 0 else low) >= trigger[1]:
+        trigger = breakeven_index.pop(symbol, None)  # Hanya satu tick yang menjadwalkan update SL
+        if trigger is not None:
+            order_executor.submit(symbol, move_stop_to_breakeven, trigger[2])
+
+tick_sink = on_trade  # TickConflator.put setelah start_tick_consumer(); replay/benchmark memanggil on_trade langsung
+
+class TickConflator:
+    """Penampung tick terbaru per simbol antara thread WebSocket dan thread pemroses tick.
+
+    put() hanya menimpa slot simbol (harga terakhir, high, low, jumlah tick), jadi selama
+    pemroses mengikuti setiap tick tetap diproses satu per satu; saat pemroses tertinggal,
+    tick yang menumpuk untuk simbol yang sama digabung dan antrean tidak pernah tumbuh
+    melebihi jumlah simbol.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.slots = {}  # symbol -> [harga terakhir, high, low, jumlah tick]
+        self.conflated = 0
+
+    def put(self, symbol, price):
+        with self.lock:
+            slot = self.slots.get(symbol)
+            if slot is None:
+                if not self.slots:
+                    self.ready.notify()
+                self.slots[symbol] = [price, price, price, 1]
+                return
+            slot[0] = price
+            if price > slot[1]:
+                slot[1] = price
+            elif price < slot[2]:
+                slot[2] = price
+            slot[3] += 1
+
+    def take(self, timeout=None):
+        """Ambil semua slot yang terisi (dict symbol -> slot); {} jika timeout."""
+        with self.lock:
+            if not self.slots:
+                self.ready.wait(timeout)
+            slots, self.slots = self.slots, {}
+            return slots
+
+    def depth(self):
+        return len(self.slots)
+
+    def run(self):
+        """Loop thread pemroses tick."""
+        while True:
+            merged = 0
+            for symbol, (price, high, low, count) in self.take().items():
+                merged += count - 1
+                try:
+                    on_trade(symbol, price, high, low)
+                except Exception as e:
+                    print(f"[{symbol}] Error in on_trade:", e)
+            if merged:
+                self.conflated += merged
+                ticks_conflated_counter.inc(merged)
+
+tick_conflator = TickConflator()
+queue_depth_gauge.labels('tick').set_function(lambda: tick_conflator.depth())
+
+def start_tick_consumer():
+    global tick_sink
+    threading.Thread(target=tick_conflator.run, daemon=True, name="ticks").start()
+    tick_sink = tick_conflator.put
+
+def on_trade_gap(symbol, first_id, last_id):
+    """Trade id melompat: tick yang terlewat hanya penting jika simbol punya posisi terbuka."""
+    stream_gaps_counter.labels('trade').inc()
+    if symbol in exit_levels or symbol in breakeven_index:
+        gap_backfill_pool.submit(backfill_trades, symbol, first_id, last_id)
+
+def backfill_trades(symbol, first_id, last_id):
+    """Ambil trade yang terlewat lewat REST historicalTrades dan cek SL/TP/BEP terhadap high/low-nya.
+
+    Gap lebih besar dari trade_backfill_max (mis. koneksi putus lama) tidak diambil per trade;
+    posisi simbol itu dicocokkan langsung dengan exchange (reconcile_positions).
+    """
+    if last_id - first_id + 1 > trade_backfill_max:
+        reconcile_positions([symbol])
+        return
+    prices = []
+    next_id = first_id
+    try:
+        while next_id <= last_id:
+            page = thread_client().futures_historical_trades(
+                symbol=symbol, fromId=next_id, limit=min(trade_backfill_page, last_id - next_id + 1))
+            if not page:
+                break
+            prices += [float(t['price']) for t in page if t['id'] <= last_id]
+            next_id = page[-1]['id'] + 1
+    except Exception as e:
+        print(f"[{symbol}] Gagal backfill trade {first_id}-{last_id}: {e}")
+        reconcile_positions([symbol])
+        return
+    if prices:
+        stream_backfilled_counter.labels('trade').inc(len(prices))
+        on_trade(symbol, current_prices.get(symbol, prices[-1]), max(prices), min(prices))
+
+def on_kline(event):
+    k = event.get("k", {})
+    # Hanya candle yang sudah close (x=true) yang diteruskan ke process_candles
+    if not k.get("x"):
+        return
+    candle_queue.put({
+        'symbol': event.get("s", k.get("s", "")),
+        'open_time': int(k["t"]),
+        'open': float(k["o"]),
+        'high': float(k["h"]),
+        'low': float(k["l"]),
+        'close': float(k["c"]),
+        'evaluate': True,
+        'received_at': time.perf_counter()
+    })
+
+def on_error(ws, error):
+    print("WebSocket error:", error)
+
+def on_close(ws, close_status_code, close_msg):
+    print("WebSocket closed")
+
+def ws_backoff(attempt):
+    return min(ws_backoff_max, ws_backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+class StreamConnection:
+    """Satu koneksi combined stream untuk sebagian pairs, dengan reconnect otomatis.
+
+    run() berulang: connect -> run_forever sampai koneksi putus -> tunggu exponential backoff
+    (+ jitter) -> connect lagi. Setiap kali terbuka (termasuk reconnect), candle yang terlewat
+    diisi lewat REST sebelum pesan stream diproses. check_stale() menutup koneksi yang tidak
+    menerima pesan selama ws_stale_timeout (socket setengah mati tanpa close frame).
+    """
+
+    def __init__(self, name, symbols, base_url=None):
+        self.name = name
+        self.symbols = list(symbols)
+        streams = [f"{symbol.lower()}@trade" for symbol in self.symbols]
+        streams += [f"{symbol.lower()}@kline_{kline_interval}" for symbol in self.symbols]
+        self.url = (base_url or ws_base_url) + "/stream?streams=" + "/".join(streams)
+        self.ws = None
+        self.connected = False
+        self.connects = 0
+        self.downtime = 0.0          # Total detik terputus (putus -> terbuka lagi) sejak koneksi pertama
+        self.disconnected_at = None
+        self.last_message = time.monotonic()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True, name=f"ws-{self.name}")
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        if self.ws is not None:
+            self.ws.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def check_stale(self):
+        if self.connected and time.monotonic() - self.last_message > ws_stale_timeout:
+            print(f"[ws {self.name}] Tidak ada pesan {ws_stale_timeout:.0f}s, koneksi dibuka ulang")
+            self._disconnected()
+            self.ws.close()
+
+    def _disconnected(self):
+        if self.connected:
+            self.connected = False
+            self.disconnected_at = time.monotonic()
+            ws_connected_gauge.labels(self.name).set(0)
+
+    def _on_open(self, ws):
+        self.connects += 1
+        self.last_message = time.monotonic()
+        if self.disconnected_at is not None:
+            self.downtime += self.last_message - self.disconnected_at
+        print(f"[ws {self.name}] WebSocket connection opened ({len(self.symbols)} pair).")
+        if self.connects > 1:
+            ws_reconnects_counter.labels(self.name).inc()
+        # REST hanya dipakai untuk mengisi candle yang terlewat selama koneksi terputus
+        backfill_gaps(self.symbols)
+        self.connected = True
+        ws_connected_gauge.labels(self.name).set(1)
+
+    def _on_message(self, ws, message):
+        self.last_message = time.monotonic()
+        on_message(ws, message)
+
+    def run(self):
+        attempt = 0
+        while not self.stopping.is_set():
+            opened = time.monotonic()
+            self.ws = websocket.WebSocketApp(self.url, on_open=self._on_open, on_message=self._on_message,
+                                             on_error=on_error, on_close=on_close)
+            try:
+                self.ws.run_forever(ping_interval=ws_ping_interval, ping_timeout=ws_ping_timeout)
+            except Exception as e:
+                print(f"[ws {self.name}] run_forever error: {e}")
+            self._disconnected()
+            if self.stopping.is_set():
+                break
+            if time.monotonic() - opened >= ws_backoff_reset:
+                attempt = 0
+            delay = ws_backoff(attempt)
+            attempt += 1
+            print(f"[ws {self.name}] Terputus, reconnect dalam {delay:.1f}s")
+            self.stopping.wait(delay)
+
+ws_connections = []
+
+def start_websocket(symbols=None, base_url=None):
+    """Buka koneksi stream untuk semua pair, dibagi per ws_streams_per_connection stream."""
+    symbols = pairs if symbols is None else symbols
+    per_connection = max(1, ws_streams_per_connection // 2)  # @trade + @kline per simbol
+    for i in range(0, len(symbols), per_connection):
+        connection = StreamConnection(str(len(ws_connections)), symbols[i:i + per_connection], base_url)
+        ws_connections.append(connection.start())
+    return ws_connections
+
+def check_stale_connections():
+    for connection in ws_connections:
+        connection.check_stale()
+
+# ====================================================
+# Scheduler tunggal untuk job periodik (summary, dll.)
+# ====================================================
+class Scheduler:
+    """Satu thread untuk semua job periodik.
+
+    Job disimpan di heap berdasarkan waktu jalan berikutnya (epoch detik); thread tidur
+    sampai job terdekat jatuh tempo atau ada job baru, bukan polling per job.
+    next_time(t) mengembalikan waktu jalan berikutnya setelah t.
+    """
+
+    max_sleep = 300.0  # Bangun berkala supaya perubahan jam sistem tidak membuat job terlambat jauh
+
+    def __init__(self):
+        self.heap = []
+        self.cond = threading.Condition()
+        self.seq = itertools.count()
+        self.thread = None
+
+    def add(self, name, next_time, fn):
+        with self.cond:
+            heapq.heappush(self.heap, (next_time(time.time()), next(self.seq), name, next_time, fn))
+            self.cond.notify()
+
+    def every(self, seconds, fn, name=None):
+        self.add(name or fn.__name__, lambda t: t + seconds, fn)
+
+    def jobs(self):
+        """(nama, waktu jalan berikutnya) untuk semua job, terurut."""
+        with self.cond:
+            return [(job[2], job[0]) for job in sorted(self.heap)]
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True, name="scheduler")
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while True:
+                    now = time.time()
+                    if self.heap and self.heap[0][0] <= now:
+                        break
+                    delay = self.heap[0][0] - now if self.heap else self.max_sleep
+                    self.cond.wait(min(delay, self.max_sleep))
+                due, _, name, next_time, fn = heapq.heappop(self.heap)
+                heapq.heappush(self.heap, (next_time(max(now, due)), next(self.seq), name, next_time, fn))
+            try:
+                fn()
+            except Exception as e:
+                print(f"Error in scheduled job {name}: {e}")
+
+scheduler = Scheduler()
+
+def next_midnight(t, days=1):
+    """Jadwal cron-style: pukul 00:00 WIB, `days` hari setelah tanggal t."""
+    date = datetime.datetime.fromtimestamp(t, jakarta_tz).date() + datetime.timedelta(days=days)
+    return jakarta_tz.localize(datetime.datetime.combine(date, datetime.time())).timestamp()
+
+def next_monday(t):
+    weekday = datetime.datetime.fromtimestamp(t, jakarta_tz).weekday()
+    return next_midnight(t, 7 - weekday)
+
+def next_month_start(t):
+    date = datetime.datetime.fromtimestamp(t, jakarta_tz).date()
+    first = (date.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+    return jakarta_tz.localize(datetime.datetime.combine(first, datetime.time())).timestamp()
+
+# ====================================================
+# Statistik trade inkremental + arsip trade di disk
+# ====================================================
+class TradeStats:
+    """Agregat trade dalam satu periode: jumlah, win, PnL, dan max drawdown saldo.
+
+    Drawdown dihitung dari saldo setelah tiap trade (relatif terhadap puncak). Dua
+    periode berurutan bisa digabung dengan merge() tanpa melihat trade satu per satu.
+    """
+
+    __slots__ = ("count", "wins", "pnl", "high", "low", "max_drawdown")
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.pnl = 0.0
+        self.high = -math.inf          # Saldo tertinggi dalam periode (termasuk saldo awal)
+        self.low = math.inf            # Saldo terendah dalam periode
+        self.max_drawdown = 0.0        # Dalam fraksi puncak
+
+    def add(self, pnl, balance_after):
+        if not self.count:
+            start = balance_after - pnl
+            self.high = max(self.high, start)
+            self.low = min(self.low, start)
+        self.count += 1
+        self.wins += pnl > 0
+        self.pnl += pnl
+        self.high = max(self.high, balance_after)
+        self.low = min(self.low, balance_after)
+        if self.high > 0:
+            self.max_drawdown = max(self.max_drawdown, 1 - balance_after / self.high)
+
+    def merge(self, later):
+        """Gabungan periode ini dengan periode `later` yang terjadi sesudahnya."""
+        merged = TradeStats()
+        merged.count = self.count + later.count
+        merged.wins = self.wins + later.wins
+        merged.pnl = self.pnl + later.pnl
+        merged.high = max(self.high, later.high)
+        merged.low = min(self.low, later.low)
+        cross = 1 - later.low / self.high if self.high > 0 and later.count else 0.0
+        merged.max_drawdown = max(self.max_drawdown, later.max_drawdown, cross)
+        return merged
+
+    def to_list(self):
+        return [self.count, self.wins, self.pnl, self.high, self.low, self.max_drawdown]
+
+    @classmethod
+    def from_list(cls, values):
+        stats = cls()
+        stats.count, stats.wins, stats.pnl, stats.high, stats.low, stats.max_drawdown = values
+        return stats
+
+    @property
+    def losses(self):
+        return self.count - self.wins
+
+    @property
+    def win_rate(self):
+        return self.wins / self.count * 100 if self.count else 0.0
+
+class RollingTradeStats:
+    """TradeStats per hari (WIB) untuk `days_kept` hari terakhir, plus total sejak start.
+
+    Summary mingguan/bulanan menggabungkan paling banyak ~31 bucket harian, sehingga
+    biayanya konstan berapa pun jumlah trade yang sudah tercatat.
+    """
+
+    def __init__(self, days_kept=62):
+        self.days_kept = days_kept
+        self.days = {}  # datetime.date -> TradeStats
+        self.total = TradeStats()
+
+    def record(self, exit_time, pnl, balance_after):
+        day = exit_time.astimezone(jakarta_tz).date()
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = TradeStats()
+            oldest = day - datetime.timedelta(days=self.days_kept)
+            for stale in [d for d in self.days if d <= oldest]:
+                del self.days[stale]
+        bucket.add(pnl, balance_after)
+        self.total.add(pnl, balance_after)
+
+    def to_dict(self):
+        return {"days_kept": self.days_kept, "total": self.total.to_list(),
+                "days": {day.isoformat(): stats.to_list() for day, stats in self.days.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        rolling = cls(data["days_kept"])
+        rolling.total = TradeStats.from_list(data["total"])
+        rolling.days = {datetime.date.fromisoformat(day): TradeStats.from_list(values)
+                        for day, values in data["days"].items()}
+        return rolling
+
+    def window(self, start_day, end_day):
+        """Gabungan bucket harian dari start_day sampai sebelum end_day."""
+        stats = TradeStats()
+        day = start_day
+        while day < end_day:
+            bucket = self.days.get(day)
+            if bucket is not None:
+                stats = stats.merge(bucket)
+            day += datetime.timedelta(days=1)
+        return stats
+
+class TradeArchive:
+    """Arsip append-only (JSONL) semua trade yang ditutup; path None = nonaktif."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        if self.path is None:
+            return
+        line = json.dumps(record, default=_json_default) + "\n"
+        with self.lock:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(line)
+            self.file.flush()
+
+    def __iter__(self):
+        """Baca ulang semua trade dari arsip (exit_time/entry_time sebagai string ISO)."""
+        if self.path is None or not os.path.exists(self.path):
+            return iter(())
+        with open(self.path, encoding="utf-8") as f:
+            return iter([json.loads(line) for line in f if line.strip()])
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} tidak bisa di-serialize ke JSON")
+
+trade_stats = RollingTradeStats()
+trade_archive = TradeArchive(trade_archive_path)
+
+# ====================================================
+# Journal persisten (SQLite WAL, group commit) + recovery state
+# ====================================================
+journal_path = os.path.join("data", "journal.sqlite")
+journal_snapshot_every = 10_000   # Snapshot state tiap N event; recovery = snapshot terakhir + tail log
+journal_synchronous = "FULL"      # PRAGMA synchronous; FULL = commit bertahan walau OS crash
+journal_max_batch = 5_000         # Maks event per transaksi group commit
+journal_retry_delay = 0.5         # Detik sebelum batch yang gagal di-commit dicoba lagi (backoff eksponensial, maks 30 s)
+journal_close_retries = 3         # Saat close(), batch yang terus gagal dibuang setelah N percobaan
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value) if isinstance(value, str) else value
+
+class JournalState:
+    """State yang dibangun ulang dari journal: saldo, posisi terbuka, dan statistik trade.
+
+    Event: "open" (trade lengkap dengan order), "orders" (order/SL diganti), "close"
+    (record trade ditutup), "balance" (saldo di-set).
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.balance = None
+        self.positions = {}  # symbol -> trade (datetime bisa berupa string ISO)
+        self.stats = RollingTradeStats()
+
+    def apply(self, seq, kind, payload):
+        symbol = payload.get('symbol')
+        if kind == "open":
+            self.positions[symbol] = payload
+        elif kind == "orders":
+            trade = self.positions.get(symbol)
+            if trade is not None:
+                trade['orders'] = dict(trade['orders'], **payload['orders'])
+                for key in ('stop_loss', 'breakeven'):
+                    if key in payload:
+                        trade[key] = payload[key]
+        elif kind == "close":
+            self.positions.pop(symbol, None)
+            if 'balance_after' in payload:  # Record dari worker supervisor tidak membawa saldo
+                self.balance = payload['balance_after']
+                self.stats.record(_parse_time(payload['exit_time']), payload['pnl'], payload['balance_after'])
+        elif kind == "balance":
+            self.balance = payload['balance']
+        self.seq = seq
+
+    def to_json(self):
+        return json.dumps({"seq": self.seq, "balance": self.balance, "positions": self.positions,
+                           "stats": self.stats.to_dict()}, default=_json_default)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        state = cls()
+        state.seq, state.balance, state.positions = data["seq"], data["balance"], data["positions"]
+        state.stats = RollingTradeStats.from_dict(data["stats"])
+        return state
+
+class Journal:
+    """Journal append-only di SQLite (mode WAL) dengan group commit.
+
+    append() hanya memberi nomor urut dan memasukkan event ke antrean, jadi jalur order
+    tidak menunggu disk. Thread writer menulis semua event yang sudah mengantre dalam
+    satu transaksi, lalu (setelah COMMIT) menerapkannya ke JournalState bayangan dan
+    menyimpan snapshot state itu setiap snapshot_every event. Batch yang gagal di-commit
+    di-ROLLBACK dan dicoba lagi; event baru ikut masuk batch itu sampai journal_max_batch.
+    """
+
+    def __init__(self, path, snapshot_every=None, synchronous=None):
+        self.path = path
+        self.snapshot_every = journal_snapshot_every if snapshot_every is None else snapshot_every
+        self.synchronous = synchronous or journal_synchronous
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.seq = 0
+        self.written = 0
+        self.since_snapshot = 0
+        self.commits = 0
+        self.state = None
+        self.db = None
+        self.thread = None
+
+    def open(self, use_snapshot=True):
+        """Buka database dan bangun ulang state. Mengembalikan (JournalState, jumlah event tail)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={self.synchronous}")
+        db.execute("CREATE TABLE IF NOT EXISTS events "
+                   "(seq INTEGER PRIMARY KEY, ts REAL NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS snapshots (seq INTEGER PRIMARY KEY, ts REAL NOT NULL, state TEXT NOT NULL)")
+        row = db.execute("SELECT seq, state FROM snapshots ORDER BY seq DESC LIMIT 1").fetchone() if use_snapshot else None
+        state = JournalState.from_json(row[1]) if row else JournalState()
+        tail = 0
+        for seq, kind, payload in db.execute("SELECT seq, kind, payload FROM events WHERE seq > ? ORDER BY seq",
+                                             (state.seq,)):
+            state.apply(seq, kind, json.loads(payload))
+            tail += 1
+        self.db, self.state = db, state
+        self.seq = self.written = state.seq
+        self.since_snapshot = tail
+        self.thread = threading.Thread(target=self._run, daemon=True, name="journal")
+        self.thread.start()
+        return state, tail
+
+    def append(self, kind, payload):
+        """Catat event (payload harus bisa di-serialize JSON); tidak menunggu commit."""
+        with self.lock:
+            self.seq += 1
+            self.queue.put((self.seq, time.time(), kind, payload))
+            return self.seq
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua event yang sudah di-append ter-commit; False jika timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.written >= self.seq, timeout)
+
+    def close(self):
+        """Commit sisa antrean, simpan snapshot terakhir, dan hentikan thread writer."""
+        self.queue.put(None)
+        self.thread.join()
+        self._snapshot()
+        self.db.close()
+
+    def _snapshot(self):
+        self.db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                        (self.state.seq, time.time(), self.state.to_json()))
+        self.since_snapshot = 0
+
+    def _collect(self, batch):
+        """Tambahkan event dari antrean ke batch (menunggu hanya jika batch kosong).
+
+        True jika close() dipanggil (sentinel None sudah diambil dari antrean).
+        """
+        try:
+            item = self.queue.get_nowait() if batch else self.queue.get()
+        except queue.Empty:
+            return False
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= journal_max_batch:
+                return False
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return False
+        return True
+
+    def _commit(self, batch):
+        """Tulis batch dalam satu transaksi; gagal -> ROLLBACK dan exception diteruskan.
+
+        State bayangan baru diperbarui setelah COMMIT berhasil, jadi batch yang gagal
+        tidak meninggalkan state setengah jadi dan bisa dicoba lagi apa adanya.
+        """
+        rows = [(seq, ts, kind, json.dumps(payload, default=_json_default)) for seq, ts, kind, payload in batch]
+        with self.lock:
+            try:
+                self.db.execute("BEGIN")
+                self.db.executemany("INSERT INTO events VALUES (?, ?, ?, ?)", rows)
+                self.db.execute("COMMIT")
+            except Exception:
+                if self.db.in_transaction:
+                    self.db.execute("ROLLBACK")
+                raise
+            self.written = batch[-1][0]
+            self.commits += 1
+            self.idle.notify_all()
+            try:
+                for seq, _, kind, payload in batch:
+                    self.state.apply(seq, kind, payload)
+                self.since_snapshot += len(batch)
+                if self.snapshot_every and self.since_snapshot >= self.snapshot_every:
+                    self._snapshot()
+            except Exception as e:  # Event sudah tersimpan; snapshot dicoba lagi di batch berikutnya
+                print("Error updating journal snapshot:", e)
+
+    def _run(self):
+        stopping = False
+        batch = []     # Batch yang gagal di-commit tetap di sini dan dicoba lagi
+        failures = 0
+        while True:
+            if not stopping:
+                stopping = self._collect(batch)
+            if not batch:
+                if stopping:
+                    return
+                continue
+            try:
+                self._commit(batch)
+            except Exception as e:
+                failures += 1
+                print(f"Error writing journal ({len(batch)} event, percobaan {failures}):", e)
+                if stopping and failures >= journal_close_retries:
+                    print(f"Journal ditutup, {len(batch)} event tidak tersimpan")
+                    return
+                time.sleep(min(journal_retry_delay * 2 ** (failures - 1), 30.0))
+                continue
+            failures = 0
+            batch = []
+
+journal = None  # Journal, dibuka di main()/run_shard()/run_ledger()
+
+def journal_event(kind, payload):
+    if journal is not None:
+        journal.append(kind, payload)
+
+def journal_trade(trade):
+    """Salinan trade untuk journal (order di-copy supaya perubahan berikutnya tidak ikut)."""
+    payload = {key: trade[key] for key in ('entry_time', 'symbol', 'direction', 'entry_price', 'stop_loss',
+                                           'take_profit', 'quantity') if key in trade}
+    for key in ('fill_price', 'breakeven'):
+        if key in trade:
+            payload[key] = trade[key]
+    payload['orders'] = dict(trade['orders'])
+    return payload
+
+def open_journal(path):
+    """Buka journal global dan pulihkan state-nya; None jika path None (journal mati)."""
+    global journal
+    if path is None:
+        return None
+    journal = Journal(path)
+    started = time.perf_counter()
+    state, tail = journal.open()
+    print(f"Journal {path}: saldo {state.balance}, {len(state.positions)} posisi terbuka, "
+          f"{tail} event setelah snapshot, recovery {(time.perf_counter() - started) * 1000:.1f} ms")
+    return state
+
+def restore_state(state):
+    """Bangun ulang statistik, open_trades dan indeks per simbol dari JournalState."""
+    global trade_stats
+    with data_lock:
+        trade_stats = RollingTradeStats.from_dict(state.stats.to_dict())
+        for symbol, payload in state.positions.items():
+            trade = dict(payload, entry_time=_parse_time(payload['entry_time']),
+                         orders=dict(payload['orders']), status='open')
+            open_trades.append(trade)
+            positions[symbol] = trade
+            portfolio.open(trade)
+            _arm_breakeven(trade)
+            _arm_exits(trade)
+        active_orders_gauge.set(len(open_trades))
+
+def _order_id(order):
+    return order.get('algoId', order.get('orderId'))
+
+def reconcile_positions(symbols=None):
+    """Cocokkan posisi hasil recovery dengan posisi dan open order di exchange.
+
+    Posisi yang sudah tidak ada di exchange dicatat ditutup (harga mark saat ini),
+    SL/TP yang hilang dipasang ulang, posisi exchange tanpa catatan dilaporkan ke Discord.
+    symbols membatasi pengecekan ke sebagian pair (mis. setelah gap stream yang besar);
+    None = semua posisi hasil recovery dan semua posisi di exchange.
+    """
+    try:
+        with api_priority("order"):
+            amounts = {p['symbol']: float(p['positionAmt']) for p in thread_client().futures_position_information()}
+    except Exception as e:
+        print("Gagal rekonsiliasi posisi:", e)
+        return
+    for trade in list(open_trades):
+        symbol = trade['symbol']
+        if (symbols is not None and symbol not in symbols) or trade['status'] != 'open':
+            continue
+        try:
+            if not amounts.get(symbol):
+                with api_priority("order"):
+                    price = float(thread_client().futures_mark_price(symbol=symbol)['markPrice'])
+                levels = exit_levels.get(symbol)
+                # Klaim exit seperti tick path, supaya posisi tidak ditutup dua kali
+                if levels is not None and levels[3] is trade and exit_levels.pop(symbol, None) is levels:
+                    close_position(trade, price, "reconcile")
+                continue
+            with api_priority("order"):
+                open_ids = {_order_id(o) for o in thread_client().futures_get_open_orders(symbol=symbol)}
+                open_ids |= {_order_id(o) for o in thread_client().futures_get_open_orders(symbol=symbol,
+                                                                                          conditional=True)}
+        except Exception as e:
+            print(f"[{symbol}] Gagal rekonsiliasi: {e}")
+            continue
+        missing = [leg for leg in ('stop_order', 'tp_order') if _order_id(trade['orders'][leg]) not in open_ids]
+        if missing:
+            order_executor.submit(symbol, replace_protective_orders, trade, missing)
+    unknown = [symbol for symbol, amount in amounts.items()
+               if amount and (symbols is None or symbol in symbols) and symbol not in positions]
+    if unknown:
+        send_discord_message(f"⚠️ Posisi di exchange tanpa catatan journal: {', '.join(unknown)}. Cek manual.")
+
+def replace_protective_orders(trade, legs):
+    """Job OrderExecutor: pasang ulang SL/TP yang tidak ada lagi di exchange."""
+    symbol = trade['symbol']
+    exit_side = "SELL" if trade['direction'] == "long" else "BUY"
+    orders = {}
+    for leg in legs:
+        order_type, price = (("STOP_MARKET", trade['stop_loss']) if leg == 'stop_order'
+                             else ("TAKE_PROFIT_MARKET", trade['take_profit']))
+        order = submit_order_leg("stop_loss" if leg == 'stop_order' else "take_profit", None, symbol=symbol,
+                                 side=exit_side, type=order_type, stopPrice=exchange_filters.price(symbol, price),
+                                 closePosition=True)
+        if order is None:
+            send_discord_message(f"⚠️ Gagal memasang ulang {order_type} untuk {symbol}, cek manual.")
+            continue
+        orders[leg] = order
+    if orders:
+        with data_lock:
+            trade['orders'].update(orders)
+        journal_event("orders", {'symbol': symbol, 'orders': orders})
+        send_discord_message(f"🔧 {symbol}: {', '.join(orders)} dipasang ulang setelah rekonsiliasi.")
+    return orders
+
+# ====================================================
+# Summary: Daily, Weekly, Monthly (job Scheduler)
+# ====================================================
+bot_start_time = datetime.datetime.now(jakarta_tz)
+
+def _summary_lines(stats):
+    return (f"📈 Total Trades: {stats.count}\n"
+            f"✅ Wins: {stats.wins}, ❌ Losses: {stats.losses}\n"
+            f"🏆 Win Rate: {stats.win_rate:.2f}%\n"
+            f"💰 PnL: {stats.pnl:.2f} USDT, 📉 Max Drawdown: {stats.max_drawdown * 100:.2f}%")
+
+def daily_summary():
+    with data_lock:
+        stats = trade_stats.total
+        summary_msg = (f"📊 **Daily Summary** sejak {bot_start_time.strftime('%Y-%m-%d %H:%M:%S %Z')}:\n"
+                       f"💵 Final Balance: ${global_balance:.2f}\n" + _summary_lines(stats))
+    send_discord_message(summary_msg)
+    print("Daily summary sent.")
+
+def weekly_summary():
+    now = datetime.datetime.now(jakarta_tz)
+    start_period = now - datetime.timedelta(days=7)
+    with data_lock:
+        stats = trade_stats.window(start_period.date(), now.date())
+        summary_msg = (f"📆 **Weekly Summary** ({start_period.strftime('%Y-%m-%d')} - {now.strftime('%Y-%m-%d')}):\n"
+                       f"💵 Balance: ${global_balance:.2f}\n" + _summary_lines(stats))
+    send_discord_message(summary_msg)
+    print("Weekly summary sent.")
+
+def monthly_summary():
+    now = datetime.datetime.now(jakarta_tz)
+    start_period = (now.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)  # Awal bulan lalu
+    with data_lock:
+        stats = trade_stats.window(start_period.date(), now.date().replace(day=1))
+        summary_msg = (f"📅 **Monthly Summary** ({start_period.strftime('%Y-%m')}):\n"
+                       f"💵 Balance: ${global_balance:.2f}\n" + _summary_lines(stats))
+    send_discord_message(summary_msg)
+    print("Monthly summary sent.")
+
+def schedule_summaries():
+    """Daftarkan summary ke scheduler: harian 00:00 WIB, mingguan Senin 00:00, bulanan tanggal 1."""
+    scheduler.add("daily_summary", next_midnight, daily_summary)
+    scheduler.add("weekly_summary", next_monday, weekly_summary)
+    scheduler.add("monthly_summary", next_month_start, monthly_summary)
+
+# ====================================================
+# Fungsi untuk update global balance
+# ====================================================
+def update_global_balance(recovered=None):
+    global global_balance, initial_capital
+    if recovered is not None:
+        global_balance = recovered  # Saldo terakhir dari journal
+        return
+    # For simulation, kita set ulang global_balance ke initial_capital
+    global_balance = initial_capital
+    journal_event("balance", {'balance': global_balance})
+
+# ====================================================
+# Backtest offline (vectorized, aturan sama dengan evaluate_entry)
+# ====================================================
+EXIT_STOP, EXIT_TAKE_PROFIT, EXIT_END = 1, 2, 3
+EXIT_REASONS = {EXIT_STOP: "stop_loss", EXIT_TAKE_PROFIT: "take_profit", EXIT_END: "end_of_data"}
+
+def _frame_to_rows(df):
+    rows = np.empty(len(df), dtype=KLINE_DTYPE)
+    rows["open_time"] = df["datetime"].dt.tz_convert("UTC").dt.as_unit("ms").astype("int64").to_numpy()
+    for col in ("open", "high", "low", "close"):
+        rows[col] = df[col].to_numpy(dtype=float)
+    rows["volume"] = df["volume"].to_numpy(dtype=float) if "volume" in df else np.nan
+    return rows
+
+def prepare_backtest_arrays(data):
+    """Gabungkan data banyak simbol menjadi satu set array datar untuk backtest.
+
+    `data`: dict symbol -> DataFrame hasil prepare_data atau array KLINE_DTYPE.
+    Bar milik simbol yang sama bersebelahan; seg_start/seg_end menandai batasnya.
+    Kolom yang tidak bergantung pada parameter (TR, kumulatif TR, breakout) dihitung
+    sekali di sini supaya bisa dipakai ulang oleh banyak run backtest.
+    """
+    symbols = list(data)
+    parts = [data[s] if isinstance(data[s], np.ndarray) else _frame_to_rows(data[s]) for s in symbols]
+    lengths = np.array([len(p) for p in parts], dtype=np.int64)
+    seg_end = np.cumsum(lengths)
+    seg_start = seg_end - lengths
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=KLINE_DTYPE)
+    n = len(rows)
+
+    symbol_idx = np.repeat(np.arange(len(symbols)), lengths)
+    pos = np.arange(n) - np.repeat(seg_start, lengths)
+    open_ = np.ascontiguousarray(rows["open"])
+    high = np.ascontiguousarray(rows["high"])
+    low = np.ascontiguousarray(rows["low"])
+    close = np.ascontiguousarray(rows["close"])
+
+    # TR sama seperti calculate_atr: bar pertama tiap simbol hanya memakai high-low
+    prev_close = np.empty(n)
+    prev_close[1:] = close[:-1]
+    prev_close[seg_start[lengths > 0]] = np.nan
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr_cumsum = np.empty(n)
+    for a, b in zip(seg_start, seg_end):
+        np.cumsum(tr[a:b], out=tr_cumsum[a:b])
+
+    # Breakout: close bar ini di atas high / di bawah low bar sebelumnya
+    long_break = np.zeros(n, dtype=bool)
+    short_break = np.zeros(n, dtype=bool)
+    long_break[1:] = close[1:] > high[:-1]
+    short_break[1:] = close[1:] < low[:-1]
+    long_break[pos == 0] = False
+    short_break[pos == 0] = False
+
+    return {
+        "symbols": symbols, "seg_start": seg_start, "seg_end": seg_end,
+        "symbol_idx": symbol_idx, "pos": pos, "open_time": np.ascontiguousarray(rows["open_time"]),
+        "open": open_, "high": high, "low": low, "close": close,
+        "tr": tr, "tr_cumsum": tr_cumsum, "long_break": long_break, "short_break": short_break,
+    }
+
+def rolling_atr(arrays, period=14):
+    """ATR per bar dari kumulatif TR (rolling mean TR per simbol, NaN sebelum window penuh)."""
+    csum = arrays["tr_cumsum"]
+    pos = arrays["pos"]
+    atr = np.full(len(csum), np.nan)
+    full = np.flatnonzero(pos >= period - 1)
+    before = np.zeros(len(full))
+    has_before = pos[full] >= period
+    before[has_before] = csum[full[has_before] - period]
+    atr[full] = (csum[full] - before) / period
+    return atr
+
+def _resolve_exits(arrays, fill_bar, sign, stop_loss, take_profit, be_price, be_trigger_price):
+    """Cari bar & harga exit untuk semua entry sekaligus.
+
+    Tiap iterasi memajukan satu bar untuk semua posisi yang belum selesai (vectorized),
+    jadi jumlah iterasi = durasi posisi terpanjang, bukan jumlah bar data.
+    Per bar: SL dicek sebelum TP (SL didahulukan jika keduanya tersentuh di bar yang
+    sama), dan gap melewati level di open terisi di harga open. Stop digeser ke
+    be_price mulai bar berikutnya setelah harga menyentuh be_trigger_price.
+    Posisi short dihitung dengan harga yang dinegasikan, sehingga logikanya sama dengan long.
+    """
+    m = len(fill_bar)
+    exit_bar = np.full(m, -1, dtype=np.int64)
+    exit_price = np.full(m, np.nan)
+    reason = np.zeros(m, dtype=np.int8)
+    seg_end = arrays["seg_end"][arrays["symbol_idx"][fill_bar]]
+    close = arrays["close"]
+    for direction in (1, -1):
+        idx = np.flatnonzero(sign == direction)
+        if not idx.size:
+            continue
+        if direction > 0:
+            open_, high, low = arrays["open"], arrays["high"], arrays["low"]
+        else:
+            open_, high, low = -arrays["open"], -arrays["low"], -arrays["high"]
+        # Array posisi aktif dipadatkan tiap iterasi (bukan di-gather dari array penuh)
+        rows = idx
+        j = fill_bar[idx]
+        stop = direction * stop_loss[idx]
+        take = direction * take_profit[idx]
+        be = direction * be_price[idx]
+        trigger = direction * be_trigger_price[idx]
+        end = seg_end[idx]
+        while rows.size:
+            hi = high[j]
+            # Harga open selalu di dalam [low, high], jadi gap di open sudah tercakup di sini
+            hit_stop = low[j] <= stop
+            hit_tp = hi >= take
+            finished = hit_stop | hit_tp | (j + 1 >= end)
+            f = np.flatnonzero(finished)
+            if f.size:
+                jf, sf, tf = j[f], hit_stop[f], hit_tp[f]
+                o = open_[jf]
+                # Exit SL di min(open, SL) dan TP di max(open, TP): gap di open terisi di harga open
+                price = np.where(sf, np.minimum(o, stop[f]), np.maximum(o, take[f]))
+                out = rows[f]
+                exit_bar[out] = jf
+                exit_price[out] = np.where(sf | tf, direction * price, close[jf])
+                reason[out] = np.where(sf, EXIT_STOP, np.where(tf, EXIT_TAKE_PROFIT, EXIT_END))
+                running = ~finished
+                rows, j, stop, take, be, trigger, end, hi = (
+                    a[running] for a in (rows, j, stop, take, be, trigger, end, hi))
+
+            # Break-even: geser SL ke entry untuk posisi yang masih berjalan
+            moved = hi >= trigger
+            if moved.any():
+                stop = np.where(moved, be, stop)
+            j = j + 1
+    return exit_bar, exit_price, reason
+
+def _select_chain(arrays, signal_bar, exit_bar):
+    """Satu posisi per simbol: entry berikutnya hanya dari sinyal pada/sesudah bar exit."""
+    m = len(signal_bar)
+    if not m:
+        return signal_bar
+    seg_end = arrays["seg_end"][arrays["symbol_idx"][signal_bar]]
+    nxt = np.searchsorted(signal_bar, exit_bar, side="left")
+    ok = nxt < m
+    ok[ok] = signal_bar[nxt[ok]] < seg_end[ok]
+    nxt[~ok] = -1
+    firsts = np.searchsorted(signal_bar, arrays["seg_start"], side="left")
+    valid = firsts < m
+    valid[valid] = signal_bar[firsts[valid]] < arrays["seg_end"][valid]
+    firsts = firsts[valid]
+    chosen = []
+    cur = firsts
+    while cur.size:
+        chosen.append(cur)
+        cur = nxt[cur]
+        cur = cur[cur >= 0]
+    return np.sort(np.concatenate(chosen))
+
+def simulate_trade_path(arrays, period, sl_mult, tp_mult, be_trigger, min_bars=15):
+    """Entry & exit semua trade (tanpa sizing): hanya bergantung pada parameter sinyal/level.
+
+    Hasilnya bisa dipakai ulang untuk banyak kombinasi volatility scale, base risk,
+    fee, slippage, dan leverage.
+    """
+    open_, pos, open_time = arrays["open"], arrays["pos"], arrays["open_time"]
+    atr = arrays.get("atr", {}).get(period)
+    if atr is None:
+        atr = rolling_atr(arrays, period)
+    seg_len = (arrays["seg_end"] - arrays["seg_start"])[arrays["symbol_idx"]]
+    # Sama dengan live: minimal `min_bars` candle, ATR candle sebelumnya valid, dan
+    # masih ada candle berikutnya untuk fill
+    eligible = (pos >= max(min_bars - 1, period)) & (pos + 1 < seg_len)
+    signal_bar = np.flatnonzero(eligible & (arrays["long_break"] | arrays["short_break"]))
+    sign = np.where(arrays["long_break"][signal_bar], 1, -1)
+    entry_price = open_[signal_bar]
+    atr_c = atr[signal_bar - 1]
+    stop_loss, take_profit = breakout_levels(entry_price, atr_c, sign, sl_mult, tp_mult)
+    keep = entry_price != stop_loss
+    signal_bar, sign, entry_price, atr_c = signal_bar[keep], sign[keep], entry_price[keep], atr_c[keep]
+    stop_loss, take_profit = stop_loss[keep], take_profit[keep]
+
+    fill_bar = signal_bar + 1
+    exit_bar, exit_ref, reason = _resolve_exits(
+        arrays, fill_bar, sign, stop_loss, take_profit, entry_price, breakeven_trigger_price(entry_price, sign, be_trigger))
+    chosen = _select_chain(arrays, signal_bar, exit_bar)
+    path = {
+        "signal_bar": signal_bar[chosen], "sign": sign[chosen], "entry_price": entry_price[chosen],
+        "atr": atr_c[chosen], "stop_loss": stop_loss[chosen], "take_profit": take_profit[chosen],
+        "fill_bar": fill_bar[chosen], "exit_bar": exit_bar[chosen], "exit_ref": exit_ref[chosen],
+        "reason": reason[chosen],
+    }
+    # Urutan event untuk sizing: entry (open bar fill) sebelum exit pada bar yang sama
+    k = len(path["signal_bar"])
+    keys = np.concatenate([open_time[path["fill_bar"]] * 2, open_time[path["exit_bar"]] * 2 + 1])
+    path["event_order"] = np.lexsort((np.tile(np.arange(k), 2), keys))
+    return path
+
+def backtest(data, period=None, sl_mult=None, tp_mult=None, vol_scale=None, base_risk=None,
+             be_trigger=None, initial_balance=None, compound=True, fee=None, slippage=None,
+             max_leverage=None, min_bars=15, cache=None):
+    """Backtest ATR breakout untuk banyak simbol sekaligus.
+
+    Aturan sama dengan evaluate_entry: sinyal saat close candle > high candle sebelumnya
+    (long) atau < low (short), SL/TP dari open candle sinyal ± kelipatan ATR candle
+    sebelumnya, quantity dari position_size. Order market diasumsikan terisi di open
+    candle berikutnya. Slippage memperburuk harga fill entry & exit, fee dihitung dari
+    notional entry + exit, dan notional dibatasi free margin × leverage.
+
+    Penyederhanaan: margin untuk sizing = saldo realized (compound=True) atau
+    initial_balance (compound=False); floating PnL posisi lain tidak dihitung.
+
+    `data`: dict symbol -> DataFrame prepare_data / array KLINE_DTYPE, atau hasil
+    prepare_backtest_arrays. Parameter strategi yang None memakai nilai global
+    (atr_period, sl_atr_mult, ...). `cache` (dict) menyimpan hasil simulate_trade_path
+    untuk dipakai ulang oleh run lain yang hanya berbeda di parameter sizing/biaya.
+    Mengembalikan (DataFrame trade, dict ringkasan).
+    """
+    arrays = data if isinstance(data, dict) and "tr_cumsum" in data else prepare_backtest_arrays(data)
+    period = atr_period if period is None else period
+    sl_mult = sl_atr_mult if sl_mult is None else sl_mult
+    tp_mult = tp_atr_mult if tp_mult is None else tp_mult
+    vol_scale = volatility_scale if vol_scale is None else vol_scale
+    base_risk = base_risk_percent if base_risk is None else base_risk
+    be_trigger = breakeven_trigger if be_trigger is None else be_trigger
+    initial_balance = initial_capital if initial_balance is None else initial_balance
+    fee = fee_rate if fee is None else fee
+    slippage = slippage_rate if slippage is None else slippage
+    max_leverage = leverage if max_leverage is None else max_leverage
+
+    key = (period, sl_mult, tp_mult, be_trigger, min_bars)
+    path = cache.get(key) if cache is not None else None
+    if path is None:
+        path = simulate_trade_path(arrays, period, sl_mult, tp_mult, be_trigger, min_bars)
+        if cache is not None:
+            cache[key] = path
+    open_time = arrays["open_time"]
+    signal_bar, sign, fill_bar, exit_bar = path["signal_bar"], path["sign"], path["fill_bar"], path["exit_bar"]
+    entry_price, stop_loss, take_profit = path["entry_price"], path["stop_loss"], path["take_profit"]
+
+    entry_fill = arrays["open"][fill_bar] * (1 + sign * slippage)
+    exit_fill = path["exit_ref"] * (1 - sign * slippage)
+    unit_pnl = sign * (exit_fill - entry_fill) - fee * (entry_fill + exit_fill)
+
+    # Sizing berurutan per event (bukan per bar): saldo & margin terpakai berubah saat
+    # exit, dan exit pada bar t diproses setelah entry yang terisi di open bar t.
+    k = len(signal_bar)
+    qty_per_margin = position_size(entry_price, stop_loss, path["atr"], 1.0, vol_scale, base_risk, 0.0)
+    order = path["event_order"]
+    quantity = [0.0] * k
+    balance_after = [math.nan] * k
+    q1, fill, unit = qty_per_margin.tolist(), entry_fill.tolist(), unit_pnl.tolist()
+    cap_margin = math.isfinite(max_leverage)
+    margin_per_notional = 1.0 / max_leverage
+    balance = float(initial_balance)
+    used_margin = 0.0
+    for event in order.tolist():
+        if event >= k:
+            t = event - k
+            qty = quantity[t]
+            if qty:
+                balance += qty * unit[t]
+                used_margin -= qty * fill[t] * margin_per_notional
+            balance_after[t] = balance
+            continue
+        qty = q1[event] * (balance if compound else initial_balance)
+        if qty < 0.001:
+            qty = 0.001
+        if cap_margin:
+            # Notional dibatasi free margin x leverage
+            free_qty = (balance - used_margin) * max_leverage / fill[event]
+            if qty > free_qty:
+                qty = free_qty if free_qty > 0 else 0.0
+            used_margin += qty * fill[event] * margin_per_notional
+        quantity[event] = qty
+    quantity = np.array(quantity)
+    balance_after = np.array(balance_after)
+
+    pnl = quantity * unit_pnl
+    traded = quantity > 0
+    symbols = np.asarray(arrays["symbols"], dtype=object)
+    trades = pd.DataFrame({
+        "symbol": symbols[arrays["symbol_idx"][signal_bar]],
+        "entry_time": pd.to_datetime(open_time[signal_bar], unit="ms", utc=True).tz_convert(jakarta_tz),
+        "exit_time": pd.to_datetime(open_time[exit_bar], unit="ms", utc=True).tz_convert(jakarta_tz),
+        "direction": np.where(sign > 0, "long", "short"),
+        "entry_price": entry_price,
+        "fill_price": entry_fill,
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "quantity": quantity,
+        "exit_price": exit_fill,
+        "exit_reason": pd.Categorical.from_codes(path["reason"] - 1, list(EXIT_REASONS.values())),
+        "fees": fee * quantity * (entry_fill + exit_fill),
+        "pnl": pnl,
+        "balance_after": balance_after,
+        "signal_bar": signal_bar,
+        "exit_bar": exit_bar,
+    })[traded].sort_values(["exit_time", "symbol"], kind="stable").reset_index(drop=True)
+
+    equity = np.concatenate([[initial_balance], initial_balance + np.cumsum(trades["pnl"].to_numpy())])
+    peak = np.maximum.accumulate(equity)
+    wins = int((trades["pnl"] > 0).sum())
+    summary = {
+        "symbols": len(arrays["symbols"]),
+        "bars": int(len(arrays["open"])),
+        "initial_balance": float(initial_balance),
+        "final_balance": float(equity[-1]),
+        "total_trades": int(len(trades)),
+        "wins": wins,
+        "losses": int(len(trades)) - wins,
+        "win_rate": wins / len(trades) * 100 if len(trades) else 0.0,
+        "total_fees": float(trades["fees"].sum()),
+        "max_drawdown": float(np.max((peak - equity) / peak)) if len(equity) else 0.0,
+        "margin_skipped": int((~traded).sum()),
+    }
+    return trades, summary
+
+def backtest_cli(argv=None):
+    """python main.py backtest --start 2023-01-01 --end 2024-01-01 [--pairs ...]"""
+    global client
+
+    parser = argparse.ArgumentParser(prog="main.py backtest", description="Backtest offline ATR breakout")
+    parser.add_argument("--pairs", nargs="+", default=pairs)
+    parser.add_argument("--interval", default=kline_interval)
+    parser.add_argument("--start", required=True, help="tanggal UTC, mis. 2023-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--no-compound", action="store_true", help="sizing dari initial_capital, bukan saldo berjalan")
+    parser.add_argument("--trades-csv", default=None, help="simpan daftar trade ke CSV")
+    args = parser.parse_args(argv)
+
+    # Klines adalah endpoint publik; tidak perlu API key maupun ping
+    client = Client(testnet=True, ping=False)
+    start_ms = int(pd.Timestamp(args.start, tz="UTC").timestamp() * 1000)
+    end_ms = int(pd.Timestamp(args.end, tz="UTC").timestamp() * 1000) if args.end else None
+    data = backfill_klines(args.pairs, args.interval, start_ms, end_ms)
+    t0 = time.perf_counter()
+    trades, summary = backtest(data, compound=not args.no_compound)
+    elapsed = time.perf_counter() - t0
+    for key, value in summary.items():
+        print(f"{key:>16}: {value:.4f}" if isinstance(value, float) else f"{key:>16}: {value}")
+    print(f"{'runtime':>16}: {elapsed:.3f} s")
+    if args.trades_csv:
+        trades.to_csv(args.trades_csv, index=False)
+
+# ====================================================
+# Parameter sweep (grid / random search, multi-process)
+# ====================================================
+SWEEP_PARAMS = ("period", "sl_mult", "tp_mult", "vol_scale", "base_risk", "be_trigger")
+
+def _parse_number(text):
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+def parse_sweep_space(specs):
+    """['period=10,14,20', 'sl_mult=1.0:2.5'] -> {'period': [10, 14, 20], 'sl_mult': (1.0, 2.5)}
+
+    Daftar dipisah koma = nilai diskrit; `lo:hi` = rentang (hanya untuk random search).
+    """
+    space = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in SWEEP_PARAMS:
+            raise ValueError(f"Parameter sweep tidak dikenal: {name} (pilihan: {', '.join(SWEEP_PARAMS)})")
+        if ":" in values:
+            lo, hi = (_parse_number(v) for v in values.split(":", 1))
+            space[name] = (lo, hi)
+        else:
+            space[name] = [_parse_number(v) for v in values.split(",")]
+    return space
+
+def parameter_grid(space):
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"Grid search butuh daftar nilai untuk {name}, bukan rentang")
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+def random_parameters(space, n, seed=0):
+    rng = np.random.default_rng(seed)
+    combos = []
+    for _ in range(n):
+        combo = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                combo[name] = values[rng.integers(len(values))]
+            elif isinstance(values[0], int) and isinstance(values[1], int):
+                combo[name] = int(rng.integers(values[0], values[1] + 1))
+            else:
+                combo[name] = float(rng.uniform(values[0], values[1]))
+        combos.append(combo)
+    return combos
+
+def save_backtest_arrays(arrays, directory):
+    """Simpan hasil prepare_backtest_arrays sebagai .npy supaya bisa di-mmap oleh proses lain."""
+    meta = {"symbols": arrays["symbols"], "atr": []}
+    for name, value in arrays.items():
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(directory, f"{name}.npy"), value)
+    for period, atr in arrays.get("atr", {}).items():
+        np.save(os.path.join(directory, f"atr_{period}.npy"), atr)
+        meta["atr"].append(period)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def load_backtest_arrays(directory):
+    """Kebalikan save_backtest_arrays; array dibuka read-only memory-mapped (tanpa copy)."""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {"symbols": meta["symbols"]}
+    for name in os.listdir(directory):
+        if name.endswith(".npy") and not name.startswith("atr_"):
+            arrays[name[:-4]] = np.load(os.path.join(directory, name), mmap_mode="r")
+    arrays["atr"] = {p: np.load(os.path.join(directory, f"atr_{p}.npy"), mmap_mode="r") for p in meta["atr"]}
+    return arrays
+
+_sweep_arrays = None
+_sweep_paths = {}  # Cache simulate_trade_path per worker
+
+def _sweep_init(directory):
+    global _sweep_arrays
+    _sweep_arrays = load_backtest_arrays(directory)
+
+def _sweep_run(params):
+    start = time.perf_counter()
+    if len(_sweep_paths) > 16:
+        _sweep_paths.clear()
+    _, summary = backtest(_sweep_arrays, cache=_sweep_paths, **params)
+    return {**params, **summary, "runtime": time.perf_counter() - start}
+
+def _trade_path_key(combo):
+    return tuple(combo.get(name, -1) for name in ("period", "sl_mult", "tp_mult", "be_trigger"))
+
+def sweep(arrays, combos, workers=None, rank_by="final_balance"):
+    """Jalankan backtest untuk banyak kombinasi parameter di process pool.
+
+    Array OHLC dan kolom turunan yang sama untuk semua kombinasi (TR, breakout, dan
+    ATR per period yang muncul di `combos`) dihitung sekali di sini, lalu dibagikan ke
+    worker lewat file .npy memory-mapped, sehingga worker tidak menyalin data.
+    Kombinasi diurutkan supaya yang hanya berbeda di parameter sizing jatuh ke worker
+    yang sama dan memakai ulang simulate_trade_path.
+    Mengembalikan DataFrame hasil terurut berdasarkan `rank_by`.
+    """
+    combos = sorted(combos, key=_trade_path_key)
+    arrays = arrays if "tr_cumsum" in arrays else prepare_backtest_arrays(arrays)
+    periods = sorted({combo.get("period", atr_period) for combo in combos})
+    arrays = dict(arrays, atr={p: rolling_atr(arrays, p) for p in periods})
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix="sweep-") as directory:
+        save_backtest_arrays(arrays, directory)
+        del arrays
+        with ProcessPoolExecutor(max_workers=workers, initializer=_sweep_init, initargs=(directory,)) as pool:
+            rows = list(pool.map(_sweep_run, combos, chunksize=max(1, len(combos) // (workers * 4))))
+    results = pd.DataFrame(rows).sort_values(rank_by, ascending=rank_by == "max_drawdown", kind="stable")
+    results.insert(0, "rank", range(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+def sweep_cli(argv=None):
+    """python main.py sweep --start 2024-01-01 --param period=10,14,20 --param sl_mult=1.0,1.5,2.0"""
+    global client
+
+    parser = argparse.ArgumentParser(prog="main.py sweep", description="Grid / random search parameter strategi")
+    parser.add_argument("--pairs", nargs="+", default=pairs)
+    parser.add_argument("--interval", default=kline_interval)
+    parser.add_argument("--start", required=True, help="tanggal UTC, mis. 2023-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--param", action="append", default=[], metavar="NAMA=NILAI",
+                        help=f"{', '.join(SWEEP_PARAMS)}; 'a,b,c' untuk grid, 'lo:hi' untuk rentang random")
+    parser.add_argument("--random", type=int, default=0, help="jumlah kombinasi random search (0 = grid)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="final_balance")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default=None, help="simpan tabel hasil lengkap ke CSV")
+    args = parser.parse_args(argv)
+
+    space = parse_sweep_space(args.param)
+    combos = random_parameters(space, args.random, args.seed) if args.random else parameter_grid(space)
+
+    client = Client(testnet=True, ping=False)
+    start_ms = int(pd.Timestamp(args.start, tz="UTC").timestamp() * 1000)
+    end_ms = int(pd.Timestamp(args.end, tz="UTC").timestamp() * 1000) if args.end else None
+    data = backfill_klines(args.pairs, args.interval, start_ms, end_ms)
+
+    t0 = time.perf_counter()
+    results = sweep(data, combos, workers=args.workers, rank_by=args.rank_by)
+    elapsed = time.perf_counter() - t0
+    columns = ["rank", *space, "final_balance", "total_trades", "win_rate", "max_drawdown", "runtime"]
+    print(results[columns].head(args.top).to_string(index=False))
+    runtime = results["runtime"]
+    print(f"\n{len(results)} kombinasi dalam {elapsed:.2f} s ({len(results) / elapsed:.1f} kombinasi/s); runtime per "
+          f"kombinasi p50 {runtime.median():.3f} s, p95 {runtime.quantile(0.95):.3f} s, max {runtime.max():.3f} s")
+    if args.out:
+        results.to_csv(args.out, index=False)
+
+# ====================================================
+# Mode supervisor: pairs dibagi ke beberapa proses worker + proses ledger pusat
+# ====================================================
+def shard_pairs(symbols, shards):
+    """Bagi simbol round-robin ke `shards` kelompok."""
+    return [list(symbols[i::shards]) for i in range(shards)]
+
+class SharedLedger:
+    """Sisi worker dari ledger pusat.
+
+    slots adalah RawArray double di shared memory dengan 1 + 2 x shards slot:
+    slots[0] saldo awal (ditulis proses ledger saat start), slots[1 + shard] floating PnL
+    shard ini (hanya ditulis worker ini) dan slots[1 + shards + shard] PnL realisasi shard
+    ini yang sudah dibukukan proses ledger (hanya ditulis ledger). Tiap slot punya satu
+    penulis, sehingga saldo dan effective margin seluruh portofolio dibaca tanpa lock
+    antar proses dan tanpa round-trip IPC; sum(slots) adalah equity portofolio.
+    Posisi dibuka/ditutup dikirim ke proses ledger lewat `events`.
+    """
+
+    def __init__(self, slots, shard, events):
+        self.slots = slots
+        self.shard = shard
+        self.shards = (len(slots) - 1) // 2
+        self.slot = 1 + shard
+        self.applied = 1 + self.shards + shard
+        self.realized = slots[self.applied]  # Worker yang di-restart melanjutkan PnL shard-nya
+        self.events = events
+
+    def balance(self):
+        """Saldo portofolio: PnL shard lain yang sudah dibukukan ledger + PnL shard ini
+        yang sudah dikirim (belum tentu diproses ledger)."""
+        booked = self.slots[1 + self.shards:]  # Satu salinan: slot shard ini dibaca sekali
+        return self.slots[0] + sum(booked) - booked[self.shard] + self.realized
+
+    def effective_margin(self, floating=None):
+        """Saldo + floating PnL semua shard; `floating` menggantikan nilai shard ini yang terakhir dipublish."""
+        others = sum(self.slots[1:1 + self.shards])
+        if floating is not None:
+            others += floating - self.slots[self.slot]
+        return self.balance() + others
+
+    def publish(self, floating):
+        """Floating PnL shard ini (PortfolioRisk.floating)."""
+        self.slots[self.slot] = floating
+
+    def opened(self, trade):
+        self.events.put(("open", self.shard, trade['symbol'], trade['direction'],
+                         trade['entry_price'], trade['quantity']))
+
+    def closed(self, record):
+        self.realized += record['pnl']
+        self.events.put(("close", self.shard, record))
+
+ledger_journal_path = os.path.join("data", "journal-ledger.sqlite")
+
+def shard_journal_path(shard):
+    return os.path.join("data", f"journal-shard{shard}.sqlite")
+
+def run_ledger(slots, events, initial_balance, metrics_port=None, summaries=True, archive_path=trade_archive_path,
+               journal_file=ledger_journal_path):
+    """Proses ledger: saldo, posisi semua shard, metrics PnL/drawdown, arsip trade, dan summary."""
+    global global_balance, initial_capital, trade_archive
+    initial_capital = global_balance = initial_balance
+    state = open_journal(journal_file)
+    if state is not None:
+        update_global_balance(state.balance)
+        restore_state(state)
+    slots[0] = global_balance
+    shards = (len(slots) - 1) // 2
+    trade_archive = TradeArchive(archive_path)
+    if metrics_port:
+        start_http_server(metrics_port)
+    if summaries:
+        schedule_summaries()
+        scheduler.start()
+    book = {}  # symbol -> (shard, direction, entry_price, quantity)
+    peak = initial_balance
+    while True:
+        try:
+            event = events.get(timeout=1.0)
+        except queue.Empty:
+            event = None
+        if event is not None:
+            if event[0] == "stop":
+                break
+            if event[0] == "open":
+                book[event[2]] = event[1:2] + event[3:]
+            elif event[0] == "close":
+                record = event[2]
+                book.pop(record['symbol'], None)
+                with data_lock:
+                    record_closed_trade(record)
+                slots[1 + shards + event[1]] += record['pnl']
+        equity = sum(slots)
+        peak = max(peak, equity)
+        active_orders_gauge.set(len(book))
+        current_pnl_gauge.set(equity - initial_capital)
+        current_drawdown_gauge.set((peak - equity) / peak if peak > 0 else 0.0)
+
+def start_ledger(shards, initial_balance=None, metrics_port=None, summaries=False, context=None,
+                 archive_path=trade_archive_path, journal_file=ledger_journal_path):
+    """Jalankan proses ledger; mengembalikan (process, slots, events) untuk diberikan ke worker."""
+    ctx = context or multiprocessing.get_context("spawn")
+    initial_balance = initial_capital if initial_balance is None else initial_balance
+    slots = ctx.RawArray('d', 1 + 2 * shards)
+    slots[0] = initial_balance
+    events = ctx.Queue()
+    process = ctx.Process(target=run_ledger, name="ledger", daemon=True,
+                          args=(slots, events, initial_balance, metrics_port, summaries, archive_path, journal_file))
+    process.start()
+    return process, slots, events
+
+def stop_ledger(process, events, timeout=10.0):
+    events.put(("stop",))
+    process.join(timeout)
+
+def run_shard(shard, symbols, slots, events, metrics_port=None):
+    """Proses worker: WebSocket, indikator, dan order untuk sebagian pairs."""
+    global client, pairs, ledger
+    pairs = list(symbols)
+    ledger = SharedLedger(slots, shard, events)
+    update_shard_balance()
+    if metrics_port:
+        start_http_server(metrics_port)
+    install_profiler_toggle()
+    client = use_api_budget(Client(api_key, api_secret, testnet=True))
+    exchange_filters.load()
+    state = open_journal(shard_journal_path(shard))
+    init_historical_data()
+    restore_state(state)
+    for trade in open_trades:
+        ledger.opened(trade)
+    reconcile_positions()
+    start_trading()
+    while True:
+        time.sleep(1)
+
+def supervisor(workers=None):
+    """Bagi `pairs` ke beberapa proses worker dan jalankan ledger pusat.
+
+    Worker yang mati dijalankan ulang dengan shard yang sama; posisi terbukanya
+    dipulihkan dari journal shard dan direkonsiliasi dengan exchange. Metrics ledger di metrics_port,
+    worker ke-i di metrics_port + 1 + i.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pairs)))
+    shards = shard_pairs(pairs, workers)
+    ctx = multiprocessing.get_context("spawn")
+    ledger_process, slots, events = start_ledger(workers, initial_capital, metrics_port, summaries=True, context=ctx)
+
+    def spawn(i):
+        process = ctx.Process(target=run_shard, name=f"shard-{i}", daemon=True,
+                              args=(i, shards[i], slots, events, metrics_port + 1 + i))
+        process.start()
+        return process
+
+    start_msg = (f"🤖 Supervisor STARTED pada {datetime.datetime.now(jakarta_tz).strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
+                 f"💱 {len(pairs)} pairs di {workers} worker\n"
+                 f"🔢 Leverage: {leverage}x")
+    send_discord_message(start_msg)
+    print(start_msg)
+    processes = [spawn(i) for i in range(workers)]
+    try:
+        while ledger_process.is_alive():
+            time.sleep(5)
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"Worker shard-{i} berhenti (exit code {process.exitcode}), dijalankan ulang")
+                    send_discord_message(f"⚠️ Worker shard-{i} ({', '.join(shards[i])}) berhenti, dijalankan ulang.")
+                    processes[i] = spawn(i)
+        print("Proses ledger berhenti, supervisor dihentikan.")
+    except KeyboardInterrupt:
+        print("Supervisor dihentikan oleh user.")
+    finally:
+        for process in processes:
+            process.terminate()
+        if ledger_process.is_alive():
+            stop_ledger(ledger_process, events)
+        discord_notifier.flush(timeout=10)
+
+def supervisor_cli(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py supervisor",
+                                     description="Jalankan bot di beberapa proses worker (pairs dibagi per worker)")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses worker (default: jumlah CPU)")
+    parser.add_argument("--pairs", nargs="+", default=None, help="override daftar pairs")
+    args = parser.parse_args(argv)
+    global pairs
+    if args.pairs:
+        pairs = args.pairs
+    supervisor(args.workers)
 
 # ====================================================
 # Fungsi utama
 # ====================================================
+def start_trading():
+    """Jalankan thread pemrosesan candle dan tick, koneksi websocket dan watchdog-nya, serta
+    refresh filter exchange (setelah init_historical_data)."""
+    candle_thread = threading.Thread(target=process_candles, daemon=True)
+    candle_thread.start()
+
+    if tick_conflation:
+        start_tick_consumer()
+    start_websocket()
+    scheduler.every(ws_stale_timeout / 3, check_stale_connections)
+    scheduler.every(exchange_filters_refresh, exchange_filters.refresh, name="exchange_filters")
+    scheduler.start()
+
 def main():
+    global client
     start_msg = (f"🤖 Bot STARTED pada {datetime.datetime.now(jakarta_tz).strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
                  f"💱 Pairs: {', '.join(pairs)}\n"
                  f"🔢 Leverage: {leverage}x")
+    start_http_server(metrics_port)
+    install_profiler_toggle()
+    client = use_api_budget(Client(api_key, api_secret, testnet=True))
+    exchange_filters.load()  # Tanpa filter order tidak bisa dibulatkan dengan benar: gagal -> bot tidak start
+
     send_discord_message(start_msg)
     print(start_msg)
 
-    update_global_balance()  # Inisialisasi saldo
+    state = open_journal(journal_path)
+    update_global_balance(state.balance)  # Saldo terakhir dari journal, atau initial_capital
+    portfolio.bind_gauges()  # Mode supervisor: PnL/drawdown portofolio di-export proses ledger
 
-    # Jalankan thread polling candle, websocket, dan summary
-    candle_thread = threading.Thread(target=poll_candles, daemon=True)
-    candle_thread.start()
+    init_historical_data()
+
+    # Posisi yang masih terbuka saat bot berhenti, lalu cocokkan dengan exchange
+    restore_state(state)
+    reconcile_positions()
 
-    ws_thread = threading.Thread(target=start_websocket, daemon=True)
-    ws_thread.start()
+    # Jalankan thread pemrosesan candle, websocket, dan summary
+    start_trading()
 
-    daily_thread = threading.Thread(target=daily_summary, daemon=True)
-    daily_thread.start()
-    weekly_thread = threading.Thread(target=weekly_summary, daemon=True)
-    weekly_thread.start()
-    monthly_thread = threading.Thread(target=monthly_summary, daemon=True)
-    monthly_thread.start()
+    schedule_summaries()
+    scheduler.start()
 
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         print("Bot dihentikan oleh user.")
+        discord_notifier.flush(timeout=10)
+        journal.close()
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["backtest"]:
+        backtest_cli(sys.argv[2:])
+    elif sys.argv[1:2] == ["sweep"]:
+        sweep_cli(sys.argv[2:])
+    elif sys.argv[1:2] == ["supervisor"]:
+        supervisor_cli(sys.argv[2:])
+    else:
+        main()
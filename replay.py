@@ -0,0 +1,280 @@
+"""Replay stream pasar (rekaman atau sintetis) lewat handler bot asli, tanpa koneksi ke testnet.
+
+Pesan combined stream (@trade, @kline) dimasukkan ke main.on_message dengan kecepatan
+tertentu: 1x mengikuti waktu terima rekaman, --speed 0 secepat mungkin. Candle close diproses
+handle_closed_candle seperti thread process_candles, dan order dikirim OrderExecutor ke
+FakeExchange lokal (latency dan peluang gagal create/cancel bisa diatur).
+
+Contoh:
+    python replay.py --fixture fixtures/stream_synthetic_15m.jsonl --speed 60
+    python replay.py --days 7 --pairs 20 --latency 0.02 --failure-rate 0.05
+    python replay.py --fixture fixtures/stream_live.jsonl --profile data/profiles/replay.folded
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import resource
+import time
+import zlib
+
+import numpy as np
+
+import main as bot
+from fake_exchange import FakeExchange, FakeExchangeServer
+
+
+# ====================================================
+# Bot offline: client palsu, tanpa Discord/journal, state global bersih
+# ====================================================
+class NullClient:
+    """Pengganti binance Client untuk replay offline: order selalu sukses, tanpa network."""
+
+    def __init__(self):
+        self._order_ids = itertools.count(1)  # Dipakai bersama oleh salinan per-thread (thread_client)
+
+    def futures_create_order(self, **params):
+        order = {"orderId": next(self._order_ids), **params}
+        if params.get("type") == "MARKET":
+            order["avgPrice"] = str(bot.current_prices.get(params["symbol"], 0.0))  # Fill di harga tick terakhir
+        return order
+
+    def futures_cancel_order(self, **params):
+        return params
+
+    def futures_klines(self, **params):
+        return []
+
+    def futures_historical_trades(self, **params):
+        return []
+
+
+@contextlib.contextmanager
+def offline_bot(client=None):
+    """Jalankan handler bot dengan client palsu, tanpa Discord, dan state global bersih.
+
+    Output print bot dibuang ke devnull (bukan ditampung), supaya replay panjang
+    tidak menumpuk memori dari log.
+    """
+    saved = (bot.client, bot.send_discord_message, bot.ledger, bot.trade_stats, bot.trade_archive, bot.journal,
+             bot.global_balance, bot.exchange_filters, bot.portfolio)
+    bot.client = client or NullClient()
+    bot.send_discord_message = lambda *args, **kwargs: None
+    bot.ledger = None
+    bot.journal = None
+    bot.global_balance = bot.initial_capital
+    bot.exchange_filters = bot.ExchangeFilters()  # Kosong: harga/quantity dikirim apa adanya
+    bot.portfolio = bot.PortfolioRisk()
+    bot.trade_stats = bot.RollingTradeStats()
+    bot.trade_archive = bot.TradeArchive(None)
+    bot.indicator_states.clear()
+    bot.open_trades.clear()
+    bot.executed_trades.clear()
+    bot.positions.clear()
+    bot.breakeven_index.clear()
+    bot.exit_levels.clear()
+    bot.current_prices.clear()
+    bot.last_trade_ids.clear()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield bot
+            bot.order_executor.wait_idle()
+    finally:
+        (bot.client, bot.send_discord_message, bot.ledger, bot.trade_stats, bot.trade_archive, bot.journal,
+         bot.global_balance, bot.exchange_filters, bot.portfolio) = saved
+
+
+# ====================================================
+# Sumber pesan: fixture JSONL ({"recv_ms": ..., "raw": "<pesan>"}) atau generator sintetis
+# ====================================================
+def iter_records(path):
+    """Baca fixture baris per baris (fixture rekaman berjam-jam tidak dimuat sekaligus)."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def synthetic_market(symbols, days, trades_per_candle=20, seed=0, start_ms=1_700_000_000_000,
+                     interval_ms=15 * 60 * 1000, volatility=0.0015):
+    """Stream @trade + @kline close sintetis selama `days` hari, dibuat per candle (lazy).
+
+    Harga tiap simbol random walk yang hanya bergantung pada nama simbol dan seed. Tick
+    tersebar rata di dalam candle; kline close diterima 40-250 ms setelah close_time.
+    """
+    rngs = [np.random.default_rng([seed, zlib.crc32(symbol.encode())]) for symbol in symbols]
+    delay_rng = np.random.default_rng([seed, len(symbols)])
+    names = [(symbol, symbol.lower()) for symbol in symbols]
+    last = np.full(len(symbols), 100.0)
+    for i in range(days * 86_400_000 // interval_ms):
+        t0 = start_ms + i * interval_ms
+        steps = np.column_stack([rng.normal(0, volatility, trades_per_candle) for rng in rngs])
+        prices = last * np.exp(np.cumsum(steps, axis=0))
+        opens, highs, lows, closes = last.tolist(), prices.max(axis=0), prices.min(axis=0), prices[-1].tolist()
+        highs, lows = np.maximum(highs, last).tolist(), np.minimum(lows, last).tolist()
+        for j, row in enumerate(prices.tolist()):
+            ts = t0 + (j + 1) * interval_ms // (trades_per_candle + 1)
+            trade_id = i * trades_per_candle + j + 1  # Berurutan per simbol, seperti trade id Binance
+            for (symbol, stream), price in zip(names, row):
+                yield {"recv_ms": ts + 5,
+                       "raw": f'{{"stream":"{stream}@trade","data":{{"e":"trade","E":{ts},"T":{ts},"s":"{symbol}",'
+                              f'"t":{trade_id},"p":"{price:.6f}","q":"1.000","m":false}}}}'}
+        close_time = t0 + interval_ms - 1
+        delays = delay_rng.integers(40, 250, len(symbols)).tolist()
+        for k in np.argsort(delays, kind="stable").tolist():
+            symbol, stream = names[k]
+            yield {"recv_ms": close_time + 1 + delays[k],
+                   "raw": f'{{"stream":"{stream}@kline_15m","data":{{"e":"kline","E":{close_time + 1},"s":"{symbol}",'
+                          f'"k":{{"t":{t0},"T":{close_time},"s":"{symbol}","i":"15m","o":"{opens[k]:.6f}",'
+                          f'"c":"{closes[k]:.6f}","h":"{highs[k]:.6f}","l":"{lows[k]:.6f}","v":"100.0",'
+                          f'"n":{trades_per_candle},"x":true}}}}}}'}
+        last = prices[-1]
+
+
+def rss_bytes():
+    """Resident set size proses saat ini (Linux /proc; selain itu peak RSS dari getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ====================================================
+# Replay
+# ====================================================
+class MarketReplay:
+    """Replay record stream lewat on_message/handle_closed_candle dan OrderExecutor bot.
+
+    speed: kelipatan waktu rekaman (1.0 = real time), None/0 = secepat mungkin.
+    deterministic: tunggu OrderExecutor selesai setelah pesan yang memicu order, sehingga
+    tick berikutnya selalu melihat posisi yang sudah terpasang dan hasil replay sama
+    setiap kali dijalankan. False = order berjalan paralel dengan stream seperti live.
+    Memori (RSS) dicatat tiap `sample_every_ms` waktu simulasi.
+    """
+
+    def __init__(self, records, exchange=None, speed=None, deterministic=True, sample_every_ms=86_400_000):
+        self.records = records
+        self.exchange = exchange or FakeExchange()
+        self.speed = speed or None
+        self.deterministic = deterministic
+        self.sample_every_ms = sample_every_ms
+        self.messages = 0
+        self.klines = 0
+        self.candles = 0
+        self.signals = 0
+        self.opened = 0
+        self.closed = 0
+        self.pnl = 0.0
+        self.elapsed = 0.0
+        self.simulated_ms = 0
+        self.max_lag = 0.0       # Detik tertinggal dari jadwal speed (0 jika secepat mungkin)
+        self.signal_latency = []  # Detik: kline close diterima -> SL/TP terpasang
+        self.memory = []          # (waktu simulasi ms, RSS byte)
+
+    def _protected(self, trade, received):
+        # Job OrderExecutor setelah open_position di antrean simbol yang sama (FIFO)
+        if trade['status'] == 'open':
+            self.opened += 1
+            self.signal_latency.append(time.perf_counter() - received)
+
+    def run(self):
+        exchange = self.exchange
+        exchange.price_source = bot.current_prices.get  # Fill MARKET di harga tick terakhir replay
+        with FakeExchangeServer(exchange) as server, offline_bot(server.client()) as b:
+            executor, candles = b.order_executor, b.candle_queue
+            first_ms = next_sample = None
+            start = time.perf_counter()
+            for record in self.records:
+                recv_ms, raw = record["recv_ms"], record["raw"]
+                if first_ms is None:
+                    first_ms = next_sample = recv_ms
+                if self.speed:
+                    due = start + (recv_ms - first_ms) / 1000 / self.speed
+                    lag = time.perf_counter() - due
+                    if lag < 0:
+                        time.sleep(-lag)
+                    elif lag > self.max_lag:
+                        self.max_lag = lag
+                received = time.perf_counter()
+                b.on_message(None, raw)
+                self.messages += 1
+                if "@kline" in raw[:48]:
+                    self.klines += 1
+                    while not candles.empty():
+                        self.candles += 1
+                        trade = b.handle_closed_candle(candles.get_nowait())
+                        if trade is not None:
+                            self.signals += 1
+                            executor.submit(trade['symbol'], self._protected, trade, received)
+                if self.deterministic and executor.pending:
+                    executor.wait_idle()
+                if recv_ms >= next_sample:
+                    self.memory.append((recv_ms - first_ms, rss_bytes()))
+                    next_sample += self.sample_every_ms
+            executor.wait_idle()
+            self.elapsed = time.perf_counter() - start
+            self.simulated_ms = 0 if first_ms is None else recv_ms - first_ms
+            self.memory.append((self.simulated_ms, rss_bytes()))
+            self.closed = b.trade_stats.total.count
+            self.pnl = b.global_balance - b.initial_capital
+        return self
+
+    def report(self):
+        ticks = self.messages - self.klines
+        elapsed = max(self.elapsed, 1e-9)
+        lines = [
+            f"pesan          : {self.messages} ({ticks} @trade, {self.klines} @kline, {self.candles} candle close) "
+            f"dalam {self.elapsed:.2f} s, waktu simulasi {self.simulated_ms / 3_600_000:.1f} jam",
+            f"throughput     : {ticks / elapsed:,.0f} tick/s, {self.candles / elapsed:,.0f} candle/s "
+            f"({self.simulated_ms / 1000 / elapsed:,.0f}x real time)",
+            f"trade          : {self.signals} sinyal, {self.opened} terpasang, {self.closed} ditutup, "
+            f"PnL {self.pnl:+.4f} USDT",
+            f"exchange       : {self.exchange.requests} request, {self.exchange.failures} gagal buatan",
+        ]
+        if self.signal_latency:
+            p50, p90, p99 = np.percentile(self.signal_latency, [50, 90, 99]) * 1e3
+            lines.append(f"close->protect : p50 {p50:.2f} ms  p90 {p90:.2f} ms  p99 {p99:.2f} ms")
+        if self.speed:
+            lines.append(f"speed {self.speed:g}x     : tertinggal maks {self.max_lag * 1e3:.1f} ms dari jadwal")
+        if self.memory:
+            lines.append(f"RSS            : {self.memory[0][1] / 2**20:.1f} MB -> {self.memory[-1][1] / 2**20:.1f} MB")
+        return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stream pasar lewat handler bot terhadap fake exchange")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixture", help="Fixture JSONL (bench.py record / gen-fixture)")
+    source.add_argument("--days", type=int, default=7, help="Hari stream sintetis jika tanpa --fixture")
+    parser.add_argument("--pairs", type=int, default=20, help="Jumlah pair stream sintetis")
+    parser.add_argument("--trades-per-candle", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=0.0, help="Kelipatan real time; 0 = secepat mungkin")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency request order fake exchange (detik)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Peluang create order gagal (HTTP 503)")
+    parser.add_argument("--cancel-failure-rate", type=float, default=0.0, help="Peluang cancel order gagal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Jangan tunggu order selesai per pesan (seperti live, hasil tidak deterministik)")
+    parser.add_argument("--profile", help="Tulis stack folded profiler sampling ke path ini")
+    args = parser.parse_args(argv)
+
+    if args.fixture:
+        records = iter_records(args.fixture)
+    else:
+        symbols = [f"P{i:03d}USDT" for i in range(args.pairs)]
+        records = synthetic_market(symbols, args.days, args.trades_per_candle, seed=args.seed)
+    exchange = FakeExchange(order_latency=args.latency, failure_rate=args.failure_rate,
+                            cancel_failure_rate=args.cancel_failure_rate, seed=args.seed)
+    replay = MarketReplay(records, exchange, speed=args.speed, deterministic=not args.concurrent)
+    if args.profile:
+        bot.profiler.start()
+    replay.run()
+    if args.profile:
+        bot.profiler.stop(args.profile)
+    print("\n".join(replay.report()))
+
+
+if __name__ == "__main__":
+    main()